@@ -0,0 +1,199 @@
+"""
+In-memory account state with per-field dirty tracking.
+
+accounts.json is read once (and again only if someone else rewrites it). Scan
+cycles stage their changes against the in-memory copy; the file is rewritten
+only when something changed. Configuration and position fields flush at the
+end of the cycle; volatile runtime fields (balance, validation status, raw
+previews) are batched and flushed at most every `volatile_flush_interval`.
+
+load() hands out LoadedAccounts: the copies plus the state they were taken
+from. commit()/diff() compare against that snapshot, so only the fields the
+caller changed are applied; an API save() that lands while a scan holds its
+copies is kept instead of being reverted field by field.
+"""
+from __future__ import annotations
+
+import copy
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from records import AccountRecord
+from storage import atomic_write_json, file_signature
+
+VOLATILE_FIELDS = frozenset({
+    "balance",
+    "last_balance",
+    "validated",
+    "last_validation_error",
+    "last_raw_preview",
+})
+
+_MISSING = object()
+
+# {account_id: {"set": {field: value}, "unset": [field, ...]}}
+AccountChanges = Dict[str, Dict[str, Any]]
+
+
+class LoadedAccounts(list):
+    """The account copies load() returned, with the snapshot they were copied from."""
+
+    __slots__ = ("baseline",)
+
+    def __init__(self, accounts: Iterable[Dict[str, Any]] = (), baseline: Optional[Dict[str, Dict[str, Any]]] = None):
+        super().__init__(accounts)
+        self.baseline = baseline if baseline is not None else {}
+
+    def subset(self, keep: Callable[[Dict[str, Any]], bool]) -> "LoadedAccounts":
+        return LoadedAccounts((a for a in self if keep(a)), self.baseline)
+
+
+class AccountStore:
+    def __init__(self, path: str, lock: Optional[threading.RLock] = None,
+                 volatile_fields: frozenset = VOLATILE_FIELDS, volatile_flush_interval: float = 60.0,
+                 log: Callable[[str], None] = print):
+        self.path = path
+        self.lock = lock or threading.RLock()
+        self.volatile_fields = volatile_fields
+        self.volatile_flush_interval = float(volatile_flush_interval)
+        self.log = log
+        self._accounts: Optional[List[AccountRecord]] = None
+        self._signature: Optional[tuple] = None
+        self._dirty_durable: Dict[str, Set[str]] = {}
+        self._dirty_volatile: Dict[str, Set[str]] = {}
+        self._last_flush = time.time()
+        self.writes = 0
+        self.skipped = 0
+        # bumped whenever what load() returns may have changed (read caches key on it)
+        self.version = 0
+
+    # ------------------ loading ------------------
+    def _read_file(self) -> List[AccountRecord]:
+        with open(self.path, "r") as fh:
+            data = json.load(fh)
+        if not isinstance(data, list):
+            return []
+        return [AccountRecord.from_dict(a) for a in data if isinstance(a, dict)]
+
+    def _ensure_loaded(self):
+        sig = file_signature(self.path)
+        if self._accounts is not None and sig == self._signature:
+            return
+        disk = self._read_file()
+        if self._accounts is not None:
+            # someone else rewrote the file: take it, but keep our newer runtime fields
+            mine = {a.get("id"): a for a in self._accounts if a.get("id")}
+            for acct in disk:
+                current = mine.get(acct.get("id"))
+                if current is None:
+                    continue
+                for field in self._dirty_volatile.get(acct.get("id"), ()):
+                    if current.has(field):
+                        acct.update({field: current.get(field)})
+        self._accounts = disk
+        self._signature = sig
+        self.version += 1
+
+    def refresh(self):
+        """Pick up external rewrites of the file (cheap when nothing changed)."""
+        with self.lock:
+            self._ensure_loaded()
+
+    def load(self) -> LoadedAccounts:
+        """Copies of all accounts; callers may mutate them and hand them back to commit()."""
+        with self.lock:
+            self._ensure_loaded()
+            # records are only ever reassigned field by field, so shallow copies hold the snapshot
+            baseline = {a.get("id"): a.to_dict(copy_nested=False) for a in self._accounts if a.get("id")}
+            return LoadedAccounts((a.to_dict() for a in self._accounts), baseline)
+
+    # ------------------ writing ------------------
+    def save(self, accounts: List[Dict[str, Any]]):
+        """Replace the whole list and write it now (API add/delete/edit path)."""
+        with self.lock:
+            self._accounts = [AccountRecord.from_dict(a) for a in accounts]
+            self.version += 1
+            self._dirty_durable.clear()
+            self._dirty_volatile.clear()
+            self._write()
+
+    def _write(self):
+        atomic_write_json(self.path, [a.to_dict(copy_nested=False) for a in self._accounts])
+        self._signature = file_signature(self.path)
+        self._last_flush = time.time()
+        self.writes += 1
+
+    def diff(self, accounts: List[Dict[str, Any]]) -> AccountChanges:
+        """
+        Field-level changes the caller made to `accounts` (no side effects): against
+        the snapshot load() gave it for LoadedAccounts, else against the in-memory state.
+        """
+        baseline = accounts.baseline if isinstance(accounts, LoadedAccounts) else None
+        with self.lock:
+            self._ensure_loaded()
+            current = {a.get("id"): a for a in self._accounts if a.get("id")}
+            changes: AccountChanges = {}
+            for acct in accounts:
+                acct_id = acct.get("id")
+                if acct_id not in current:
+                    # deleted (or never saved) while the caller held it
+                    continue
+                old = current[acct_id] if baseline is None else baseline.get(acct_id)
+                if old is None:
+                    continue
+                set_fields = {k: v for k, v in acct.items() if old.get(k, _MISSING) != AccountRecord.coerce(k, v)}
+                unset = [k for k in old.keys() if k not in acct]
+                if set_fields or unset:
+                    changes[acct_id] = {"set": copy.deepcopy(set_fields), "unset": unset}
+            return changes
+
+    def apply(self, changes: AccountChanges):
+        """Apply field changes to memory and mark them dirty."""
+        if not changes:
+            return
+        with self.lock:
+            self._ensure_loaded()
+            current = {a.get("id"): a for a in self._accounts if a.get("id")}
+            for acct_id, change in changes.items():
+                acct = current.get(acct_id)
+                if acct is None:
+                    continue
+                fields = list(change.get("set", {}).keys()) + list(change.get("unset", []))
+                if fields:
+                    self.version += 1
+                acct.update(change.get("set", {}))
+                for field in change.get("unset", []):
+                    acct.unset(field)
+                for field in fields:
+                    target = self._dirty_volatile if field in self.volatile_fields else self._dirty_durable
+                    target.setdefault(acct_id, set()).add(field)
+
+    def flush(self, force: bool = False) -> bool:
+        """Write if durable fields are dirty, or volatile ones are and the batch window elapsed."""
+        with self.lock:
+            due = time.time() - self._last_flush >= self.volatile_flush_interval
+            if not (self._dirty_durable or (self._dirty_volatile and (due or force))):
+                self.skipped += 1
+                return False
+            self._write()
+            self._dirty_durable.clear()
+            self._dirty_volatile.clear()
+            return True
+
+    def commit(self, accounts: List[Dict[str, Any]]) -> bool:
+        """diff + apply + flush. Returns True if the file was written."""
+        with self.lock:
+            self.apply(self.diff(accounts))
+            return self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "writes": self.writes,
+            "version": self.version,
+            "skipped_flushes": self.skipped,
+            "last_flush": self._last_flush,
+            "dirty_durable": sum(len(v) for v in self._dirty_durable.values()),
+            "dirty_volatile": sum(len(v) for v in self._dirty_volatile.values()),
+        }
@@ -1,5 +1,71 @@
-from bot_fib_scoring import BotController
+import asyncio
+import threading
+from typing import Optional
 
-# Global BotController instance
-# This allows services and the server to share the same bot state
-bc = BotController()
+from bot_fib_scoring import BotController, TRADE_SETTINGS
+from response_cache import ResponseCache
+
+# The global BotController is shared by services and the server. It is built on
+# first use (not at import), so importing the app or its services stays cheap.
+_lock = threading.Lock()
+_bc: Optional[BotController] = None
+_supervisor = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_bc() -> BotController:
+    """The shared BotController, created on first call."""
+    global _bc, _supervisor
+    if _bc is None:
+        with _lock:
+            if _bc is None:
+                if TRADE_SETTINGS.get("async_engine", False):
+                    from async_engine import AsyncBotController
+                    controller = AsyncBotController()
+                else:
+                    controller = BotController()
+                if _loop is not None and hasattr(controller, "bind_loop"):
+                    controller.bind_loop(_loop)
+                # With workerProcesses > 1 the accounts are sharded across worker processes;
+                # bc stays the single writer of the shared data files.
+                if TRADE_SETTINGS.get("worker_processes", 1) > 1:
+                    from sharding import ShardSupervisor
+                    _supervisor = ShardSupervisor(controller, TRADE_SETTINGS["worker_processes"])
+                _bc = controller
+    return _bc
+
+
+def current_bc() -> Optional[BotController]:
+    """The controller if it has been created, without creating it."""
+    return _bc
+
+
+def get_supervisor():
+    get_bc()
+    return _supervisor
+
+
+def set_event_loop(loop: asyncio.AbstractEventLoop):
+    """Remember the server loop; the async engine schedules its scan loop on it."""
+    global _loop
+    _loop = loop
+    if _bc is not None and hasattr(_bc, "bind_loop"):
+        _bc.bind_loop(loop)
+
+
+def engine():
+    """The object that runs trading: the shard supervisor if configured, else bc."""
+    return get_supervisor() or get_bc()
+
+
+# GET responses of the dashboard/history/accounts APIs, invalidated by state writes
+response_cache = ResponseCache(lambda: get_bc().state_version())
+
+
+def __getattr__(name):
+    # `from app_state import bc` keeps working, but creates the controller lazily
+    if name == "bc":
+        return get_bc()
+    if name == "supervisor":
+        return get_supervisor()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
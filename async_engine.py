@@ -0,0 +1,598 @@
+"""
+Asyncio-native trading engine.
+
+AsyncBotController keeps BotController's start/stop/is_running API but runs its
+scan loop as a task on the web server's event loop. Market data, wallet calls
+and orders go through AsyncBybitClient (httpx, Bybit v5 REST), so every
+in-flight request is a coroutine instead of a blocked thread. The file work a
+scan does (accounts, trades.json, the candle store, the capture) runs in
+worker threads through asyncio.to_thread so it never stalls the loop. Strategy
+rules, sizing and trade bookkeeping are shared with the threaded controller.
+
+stop() only asks the loop to finish its cycle; astop() also waits for it (and
+cancels it after a timeout). start() refuses while a stopped loop is still
+finishing, so two loops never run at once.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+import httpx
+
+from bot_fib_scoring import (
+    ALLOWED_COINS,
+    SCORE_SETTINGS,
+    TIMEFRAME,
+    TRADE_SETTINGS,
+    BotController,
+)
+from exchanges import ExchangeAdapter, create_exchange, fetch_ohlcv_all
+from klines import KlineColumns
+from latency import LatencyTrace
+from rate_limiter import PUBLIC_BUCKET, RateLimiter
+from resilience import CircuitOpenError
+from signals import SignalSet
+
+MAINNET_URL = "https://api.bybit.com"
+TESTNET_URL = "https://api-testnet.bybit.com"
+MARKET_CATEGORY = "spot"
+
+
+class BybitAPIError(RuntimeError):
+    pass
+
+
+# -------------------- Async REST client --------------------
+class AsyncBybitClient:
+    """Minimal Bybit v5 REST client; one per account, sharing a pooled httpx client."""
+
+    def __init__(self, http: httpx.AsyncClient, api_key: Optional[str] = None, api_secret: Optional[str] = None,
+                 recv_window: int = 5000):
+        self.http = http
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.recv_window = str(recv_window)
+
+    def _auth_headers(self, payload: str) -> Dict[str, str]:
+        ts = str(int(time.time() * 1000))
+        to_sign = ts + (self.api_key or "") + self.recv_window + payload
+        sign = hmac.new((self.api_secret or "").encode(), to_sign.encode(), hashlib.sha256).hexdigest()
+        return {
+            "X-BAPI-API-KEY": self.api_key or "",
+            "X-BAPI-TIMESTAMP": ts,
+            "X-BAPI-RECV-WINDOW": self.recv_window,
+            "X-BAPI-SIGN": sign,
+        }
+
+    async def _get(self, path: str, params: Dict[str, Any], signed: bool = False) -> Dict[str, Any]:
+        query = urlencode({k: v for k, v in params.items() if v is not None})
+        headers = self._auth_headers(query) if signed else {}
+        resp = await self.http.get(f"{path}?{query}" if query else path, headers=headers)
+        resp.raise_for_status()
+        return resp.json()
+
+    async def _post(self, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        payload = json.dumps(body, separators=(",", ":"))
+        headers = self._auth_headers(payload)
+        headers["Content-Type"] = "application/json"
+        resp = await self.http.post(path, content=payload, headers=headers)
+        resp.raise_for_status()
+        return resp.json()
+
+    # ------------------ public ------------------
+    async def get_kline(self, symbol: str, interval: str = TIMEFRAME, limit: int = 200,
+                        category: str = MARKET_CATEGORY) -> Dict[str, Any]:
+        return await self._get("/v5/market/kline", {"category": category, "symbol": symbol, "interval": interval, "limit": limit})
+
+    async def get_tickers(self, category: str = MARKET_CATEGORY, symbol: Optional[str] = None) -> Dict[str, Any]:
+        return await self._get("/v5/market/tickers", {"category": category, "symbol": symbol})
+
+    async def get_instruments_info(self, category: str, limit: Optional[int] = None,
+                                   cursor: Optional[str] = None) -> Dict[str, Any]:
+        return await self._get("/v5/market/instruments-info", {"category": category, "limit": limit, "cursor": cursor})
+
+    # ------------------ private ------------------
+    async def get_wallet_balance(self, accountType: str = "UNIFIED") -> Dict[str, Any]:
+        return await self._get("/v5/account/wallet-balance", {"accountType": accountType}, signed=True)
+
+    async def place_order(self, **params: Any) -> Dict[str, Any]:
+        return await self._post("/v5/order/create", params)
+
+
+# -------------------- Async controller --------------------
+class AsyncBotController(BotController):
+    def __init__(self, log_queue=None):
+        super().__init__(log_queue)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Any = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self._clients: Dict[Tuple[str, str], AsyncBybitClient] = {}
+        self.concurrency = max(1, int(TRADE_SETTINGS.get("async_concurrency", 50)))
+        # market-data adapters for TRADE_SETTINGS["market_exchanges"] and their latest rankings
+        self._exchanges: Dict[str, ExchangeAdapter] = {}
+        self.market_rankings: Dict[str, Dict[str, Any]] = {}
+
+    # ------------------ lifecycle ------------------
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """Called from the FastAPI startup hook with the uvicorn loop."""
+        self._loop = loop
+
+    def _loop_alive(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self._running:
+            return
+        if self._loop_alive():
+            self.log("Previous run loop is still finishing its cycle; start refused")
+            return
+        loop = self._loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        loop = loop or running
+        if loop is None:
+            self.log("No event loop bound; falling back to the threaded run loop")
+            self._task = None
+            return super().start()
+        self._running = True
+        self._stop.clear()
+        self.started_at = time.time()
+        if running is loop:
+            self._task = loop.create_task(self._run_loop_async())
+        else:
+            # sync FastAPI routes run in a threadpool
+            self._task = asyncio.run_coroutine_threadsafe(self._run_loop_async(), loop)
+        self.log("AsyncBotController started")
+
+    def stop(self):
+        if self._task is None:
+            return super().stop()  # started on the threaded fallback
+        # the loop notices within half a second; in-flight orders are allowed to finish,
+        # and the loop flushes what it buffered on its way out
+        self._stop.set()
+        self._running = False
+        self.log("Stop requested")
+        if not self._loop_alive():
+            self._flush_on_stop()
+            self.log("Stopped")
+
+    async def astop(self, timeout: float = 30.0):
+        """stop() and wait for the loop to exit; cancel it if it is still busy after `timeout`."""
+        self.stop()
+        task = self._task
+        if task is None or task.done():
+            return
+        waiter = task if isinstance(task, asyncio.Future) else asyncio.wrap_future(task)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            self.log(f"Run loop still busy after {timeout:.0f}s; cancelling it")
+            task.cancel()
+            try:
+                await waiter
+            except BaseException:
+                pass
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+            self._clients.clear()
+        for adapter in self._exchanges.values():
+            try:
+                await adapter.close()
+            except Exception as e:
+                self.log(f"exchange close error ({adapter.exchange_id}): {e}")
+        self._exchanges.clear()
+
+    async def _run_loop_async(self):
+        self.profiler.loop_thread = threading.get_ident()
+        try:
+            while not self._stop.is_set():
+                started = time.monotonic()
+                interval = int(TRADE_SETTINGS.get("scan_interval", 10))
+                self.health.begin_cycle(interval)
+                error = None
+                try:
+                    # the market universes are scanned alongside the accounts, not after them;
+                    # they are the first work shed while cycles overrun
+                    jobs = [] if self.health.shedding() else [self._scan_markets_logged()]
+                    # daily limit: per account in _can_open, like the threaded loop
+                    jobs.append(self._scan_once_async())
+                    await self.profiler.run_async(lambda: asyncio.gather(*jobs))
+                except Exception as e:
+                    error = str(e)
+                    self.log(f"Run loop error: {e}")
+                self.health.end_cycle(error)
+                remaining = interval - (time.monotonic() - started)
+                while remaining > 0 and not self._stop.is_set():
+                    await asyncio.sleep(min(0.5, remaining))
+                    remaining = interval - (time.monotonic() - started)
+        finally:
+            self._running = False
+            if self._stop.is_set():
+                await asyncio.to_thread(self._flush_on_stop)
+                self.log("Stopped")
+
+    # ------------------ clients ------------------
+    def _http_client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            base = TESTNET_URL if TRADE_SETTINGS.get("test_on_testnet", False) else MAINNET_URL
+            limits = httpx.Limits(max_connections=self.concurrency * 2, max_keepalive_connections=self.concurrency)
+            self._http = httpx.AsyncClient(base_url=base, timeout=10.0, limits=limits)
+        return self._http
+
+    def _get_async_client(self, account: Dict[str, Any]) -> Optional[AsyncBybitClient]:
+        if self._is_paper(account):
+            # paper accounts share one keyless client for market data
+            self.paper.open_account(account)
+            creds = ("", "")
+            client = self._clients.get(creds)
+            if client is None:
+                client = self._clients[creds] = self._recorded(AsyncBybitClient(self._http_client()))
+            return client
+        creds = self._account_credentials(account)
+        if not creds:
+            return None
+        client = self._clients.get(creds)
+        if client is None:
+            client = AsyncBybitClient(self._http_client(), api_key=creds[0], api_secret=creds[1])
+            client = self._clients[creds] = self._recorded(client)
+        return client
+
+    def _exchange(self, name: str) -> ExchangeAdapter:
+        adapter = self._exchanges.get(name)
+        if adapter is None:
+            adapter = create_exchange(name, testnet=TRADE_SETTINGS.get("test_on_testnet", False))
+            self._exchanges[name] = adapter
+        return adapter
+
+    # ------------------ multi-exchange market scan ------------------
+    async def scan_markets_async(self) -> Dict[str, List[Tuple[str, int, Dict[str, Any]]]]:
+        """
+        Fetch OHLCV for every configured exchange universe concurrently and rank
+        each with the batch scorer. Results are kept in market_rankings.
+        """
+        configured = TRADE_SETTINGS.get("market_exchanges") or {}
+        if not configured:
+            return {}
+        universes = {name: (self._exchange(name), list(symbols or ALLOWED_COINS)) for name, symbols in configured.items()}
+        fetched = await fetch_ohlcv_all(universes, TIMEFRAME, TRADE_SETTINGS["kline_limit"], self.concurrency)
+        rankings: Dict[str, List[Tuple[str, int, Dict[str, Any]]]] = {}
+        for name, results in fetched.items():
+            series: Dict[str, Any] = {}
+            failed: List[Tuple[str, int, Dict[str, Any]]] = []
+            for symbol, rows in results.items():
+                if isinstance(rows, BaseException):
+                    failed.append((symbol, 0, {"error": f"klines_fetch_failed: {rows}"}))
+                else:
+                    series[symbol] = self._scoring_series(rows)
+            rankings[name] = self._rank_series(series) + failed
+            self.market_rankings[name] = {"scanned_at": time.time(), "ranked": rankings[name]}
+        return rankings
+
+    async def _scan_markets_logged(self):
+        try:
+            with self.health.phase("markets"):
+                await self.scan_markets_async()
+        except Exception as e:
+            self.log(f"Market scan error: {e}")
+
+    # ------------------ awaitable I/O with limits + breakers ------------------
+    async def _call(self, fn, endpoint: str, lane: str, account_id: Optional[str] = None,
+                    private_client: Optional[AsyncBybitClient] = None, attempts: Optional[int] = None) -> Any:
+        bucket = PUBLIC_BUCKET if private_client is None else RateLimiter.private_key(private_client.api_key)
+
+        async def attempt():
+            await self.rate_limiter.acquire_async(bucket, lane=lane)
+            resp = await fn()
+            if isinstance(resp, dict) and resp.get("retCode") not in (0, "0", None):
+                raise BybitAPIError(f"{resp.get('retCode')}: {resp.get('retMsg')}")
+            return resp
+
+        return await self.retry_policy.call_async(
+            attempt,
+            breaker=self.breakers.get(endpoint, account_id),
+            budget=self.retry_budget,
+            attempts=attempts,
+        )
+
+    async def fetch_klines_async(self, client: AsyncBybitClient, symbol: str, account_id: Optional[str] = None,
+                                 lane: str = "scoring", limit: int = 300) -> Any:
+        return await self._call(lambda: client.get_kline(symbol, TIMEFRAME, limit), "klines", lane, account_id)
+
+    async def fetch_ticker_async(self, client: AsyncBybitClient, symbol: str, account_id: Optional[str] = None,
+                                 lane: str = "market") -> Any:
+        return await self._call(lambda: client.get_tickers(symbol=symbol), "ticker", lane, account_id)
+
+    async def _ensure_instruments_async(self, client: AsyncBybitClient) -> bool:
+        async def fetch(category: str, cursor: Optional[str]) -> Any:
+            return await self._call(
+                lambda: client.get_instruments_info(category, limit=None if category == "spot" else 1000, cursor=cursor),
+                "instruments", "market",
+            )
+        try:
+            return await self.instruments.ensure_loaded_async(fetch)
+        except Exception as e:
+            self.log(f"_ensure_instruments_async error: {e}")
+            return False
+
+    async def validate_account_async(self, account: Dict[str, Any]) -> Tuple[bool, Optional[float], str]:
+        if self._is_paper(account):
+            return self._paper_validation(account)
+        client = self._get_async_client(account)
+        if not client:
+            return False, None, "missing_api_credentials"
+        last_err = ""
+        for account_type in ("UNIFIED", "SPOT"):
+            try:
+                resp = await self._call(lambda: client.get_wallet_balance(accountType=account_type), "wallet", "account",
+                                        account.get("id"), private_client=client, attempts=1)
+                self._capture_preview(account, resp, label="balance")
+                balance = self._balance_from_response(resp)
+                if balance is not None:
+                    return True, balance, ""
+            except Exception as e:
+                last_err = str(e)
+        return False, None, last_err or "unrecognized_balance_shape"
+
+    async def score_symbol_async(self, client: AsyncBybitClient, symbol: str,
+                                 account_id: Optional[str] = None) -> Tuple[int, Dict[str, Any]]:
+        try:
+            raw_klines = await self._fetch_scoring_klines_async(client, symbol, account_id)
+        except Exception as e:
+            return 0, {"error": f"klines_fetch_failed: {e}"}
+        return self._score_klines(raw_klines)
+
+    async def score_symbols_async(self, client: AsyncBybitClient, symbols: List[str],
+                                  account_id: Optional[str] = None) -> List[Tuple[str, int, Dict[str, Any]]]:
+        """Concurrent kline fetches, then one array pass over all symbols (see score_symbols)."""
+        series, failed = await self._fetch_series_async(client, symbols, account_id)
+        return self._rank_series(series) + failed
+
+    async def _fetch_series_async(self, client: AsyncBybitClient, symbols: List[str],
+                                  account_id: Optional[str] = None, until: Optional[int] = None):
+        results = await asyncio.gather(
+            *(self._fetch_scoring_klines_async(client, symbol, account_id) for symbol in symbols),
+            return_exceptions=True,
+        )
+        series: Dict[str, Any] = {}
+        failed: List[Tuple[str, int, Dict[str, Any]]] = []
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, BaseException):
+                failed.append((symbol, 0, {"error": f"klines_fetch_failed: {result}"}))
+            else:
+                series[symbol] = self._scoring_series(result, until)
+        return series, failed
+
+    async def current_signals_async(self, client: AsyncBybitClient, account_id: Optional[str] = None) -> SignalSet:
+        """current_signals for the event loop; accounts scanned concurrently share one build."""
+        async def build(candle_ts: int) -> SignalSet:
+            with self.health.phase("signals"):
+                series, failed = await self._fetch_series_async(client, self._scoring_universe(), account_id,
+                                                                until=candle_ts)
+                self.health.record_failed(len(failed))
+                return self._build_signals(candle_ts, series, self._rank_series(series) + failed)
+        return await self.signal_bus.get_async(build)
+
+    async def _fetch_scoring_klines_async(self, client: AsyncBybitClient, symbol: str,
+                                          account_id: Optional[str] = None) -> KlineColumns:
+        full = TRADE_SETTINGS["kline_limit"]
+        limit = self._kline_fetch_limit(symbol, full)
+        raw_klines = await self.fetch_klines_async(client, symbol, account_id, limit=limit)
+        # the candle store is memory-mapped files: read and write it off the loop
+        cols = await asyncio.to_thread(self._record_candles, symbol, raw_klines)
+        if limit < full:
+            stored = await asyncio.to_thread(self._stored_klines, symbol, full)
+            if stored is None:
+                raw_klines = await self.fetch_klines_async(client, symbol, account_id, limit=full)
+                cols = await asyncio.to_thread(self._record_candles, symbol, raw_klines)
+            else:
+                cols = self._parse_klines(stored)
+        return cols
+
+    async def _place_market_order_async(self, client: AsyncBybitClient, symbol: str, side: str, qty: float,
+                                        price_hint: Optional[float] = None, account_id: Optional[str] = None,
+                                        trace: Optional[LatencyTrace] = None) -> Dict[str, Any]:
+        if self._trades_on_paper(account_id):
+            return self.paper.market_order(account_id, symbol, side, qty, price_hint, trace=trace)
+        await self._ensure_instruments_async(client)
+        params, error = self._order_params(self.instruments.get(symbol), symbol, side, qty, price_hint)
+        if error:
+            return error
+        lane = "exit" if side.lower() == "sell" else "order"
+        async def send():
+            if trace is not None:
+                trace.mark("submit")  # after the rate limiter, like the sync path
+            return await client.place_order(**params)
+
+        try:
+            # market orders are not idempotent: breaker only, never retried
+            resp = await self._call(send, "order", lane, account_id, private_client=client, attempts=1)
+            if trace is not None:
+                trace.mark("ack")
+        except CircuitOpenError as e:
+            return {"error": f"order endpoint unavailable: {e}", "params": params}
+        except Exception as e:
+            return {"error": str(e), "params": params}
+        return self._order_result(resp, "place_order", params)
+
+    # ------------------ scan ------------------
+    async def _scan_once_async(self):
+        with self.trade_batch():  # see BotController._scan_once
+            await self._scan_accounts_async()
+
+    async def _scan_accounts_async(self):
+        accounts = await asyncio.to_thread(self.load_accounts)
+        if self.recorder is not None:
+            await asyncio.to_thread(self.recorder.mark_cycle, accounts)
+        ids_assigned = any(not a.get("id") for a in accounts)
+        sem = asyncio.Semaphore(self.concurrency)
+
+        # exits first and all at once (see BotController._scan_once)
+        holding = [a for a in accounts if a.get("position") == "open" and a.get("open_trade_id")]
+        with self.health.phase("exits"):
+            if holding:
+                await self._load_trade_batch_async()
+            await self._check_open_positions_async(holding)
+        skip = {id(a) for a in holding}
+
+        async def run(acct: Dict[str, Any]):
+            async with sem:
+                await self._process_account_async(acct, check_entry=id(acct) not in skip)
+
+        with self.health.phase("accounts"):
+            await asyncio.gather(*(run(a) for a in accounts))
+        with self.health.phase("persist"):
+            await self._flush_trade_batch_async()
+            await asyncio.to_thread(self.save_accounts if ids_assigned else self.commit_accounts, accounts)
+
+    async def _load_trade_batch_async(self):
+        """Read trades.json for this scan's batch off the loop (closes look trades up in it)."""
+        batch = self._own_batch()
+        if batch is not None and batch["known"] is None:
+            trades = await asyncio.to_thread(self._read_trades)
+            batch["known"] = {t.get("id"): t for t in trades if isinstance(t, dict)}
+
+    async def _flush_trade_batch_async(self):
+        """flush_trade_batch with the trades.json rewrite in a worker thread."""
+        batch = self._own_batch()
+        if batch is not None and batch["ops"]:
+            ops, batch["ops"] = batch["ops"], []
+            await asyncio.to_thread(self._apply_trade_ops, ops)
+
+    async def _process_account_async(self, acct: Dict[str, Any], check_entry: bool = True):
+        acct.setdefault("id", str(uuid.uuid4()))
+        try:
+            ok, bal, err = await self.validate_account_async(acct)
+            acct["validated"] = ok
+            acct["balance"] = bal
+            acct["last_validation_error"] = err
+        except Exception as e:
+            acct["validated"] = False
+            acct["balance"] = None
+            acct["last_validation_error"] = str(e)
+
+        acct.setdefault("position", acct.get("position", "closed"))
+        acct.setdefault("monitoring", acct.get("monitoring", False))
+        acct.setdefault("current_symbol", acct.get("current_symbol"))
+        acct.setdefault("buy_price", acct.get("buy_price"))
+
+        try:
+            if check_entry:
+                await self._attempt_trade_async(acct)
+            acct["last_balance"] = acct.get("balance", acct.get("last_balance", 0.0))
+        except Exception as e:
+            self.log(f"Account scan error for {acct.get('id')}: {e}")
+
+    async def _attempt_trade_async(self, acct: Dict[str, Any]):
+        if not self._can_open(acct):
+            return
+        client = self._get_async_client(acct)
+        if not client:
+            acct.setdefault("last_validation_error", "missing_client")
+            return
+        await self._ensure_instruments_async(client)
+
+        bal = acct.get("balance")
+        if not acct.get("validated") or not bal or float(bal) <= 0.0:
+            return
+        usd_alloc = self._allocation(bal)
+        if usd_alloc is None:
+            return
+
+        signals = await self.current_signals_async(client, acct.get("id"))
+        best = self._pick_candidate([
+            (sig.symbol, sig.score, sig.diagnostics)
+            for sig in signals.candidates(SCORE_SETTINGS.get("min_entry_score", 3))
+        ])
+        if best is None:
+            return
+        best_symbol, best_score, best_diag = best
+
+        price = best_diag.get("current_price")
+        try:
+            price = self._parse_price(await self.fetch_ticker_async(client, best_symbol, acct.get("id"))) or price
+        except Exception as e:
+            self.log(f"ticker error for {best_symbol}: {e}")
+        if not price or price <= 0:
+            self.log(f"Invalid price for {best_symbol}; skipping")
+            return
+
+        entry = self._entry_from_signal(signals.get(best_symbol), usd_alloc, price)
+        if entry is None:
+            return
+        trace = LatencyTrace(signals.computed_ns, signals.computed_at)
+        resp = await self._place_market_order_async(client, best_symbol, "Buy", entry["qty"], price_hint=price,
+                                                    account_id=acct.get("id"), trace=trace)
+        if isinstance(resp, dict) and resp.get("error"):
+            self.log(f"Order error for {best_symbol}: {resp.get('error')}; skipping.")
+            return
+        self._open_position(acct, best_symbol, best_score, entry, resp, price, trace=trace)
+
+    async def _check_open_position_async(self, acct: Dict[str, Any]):
+        await self._check_open_positions_async([acct])
+
+    async def _check_open_positions_async(self, accounts: List[Dict[str, Any]]):
+        """_check_open_positions for the event loop: tickers per symbol, exits gathered deepest breach first."""
+        watch = []
+        for acct in accounts:
+            client = self._get_async_client(acct)
+            symbol = acct.get("current_symbol")
+            if client and symbol:
+                watch.append((acct, client, symbol))
+        if not watch:
+            return
+        by_symbol: Dict[str, Tuple[Dict[str, Any], AsyncBybitClient]] = {}
+        for acct, client, symbol in watch:
+            by_symbol.setdefault(symbol, (acct, client))
+
+        async def price_of(symbol: str) -> Tuple[Optional[float], int, float]:
+            acct, client = by_symbol[symbol]
+            try:
+                tick = await self.fetch_ticker_async(client, symbol, acct.get("id"), lane="exit")
+                self._capture_preview(acct, tick, label="ticker_check")
+            except Exception as e:
+                self.log(f"ticker error for {symbol}: {e}")
+                return None, time.perf_counter_ns(), time.time()
+            price = self._parse_price(tick)
+            if price is None:
+                self.log(f"Could not parse ticker price for {symbol}")
+            return price, time.perf_counter_ns(), time.time()
+
+        prices = dict(zip(by_symbol, await asyncio.gather(*(price_of(sym) for sym in by_symbol))))
+        exits = []
+        for acct, client, symbol in watch:
+            price, observed, observed_wall = prices[symbol]
+            if price is None:
+                continue
+            label = self._exit_label(acct, price)
+            if label:
+                exits.append({"acct": acct, "client": client, "symbol": symbol, "price": price, "label": label,
+                              "trace": LatencyTrace(observed, observed_wall),
+                              "breach": self._breach_depth(acct, price, label)})
+        if not exits:
+            return
+        # tasks start in this order, so the deepest breaches reach the rate limiter first
+        exits.sort(key=lambda e: e["breach"], reverse=True)
+
+        async def send(item: Dict[str, Any]):
+            try:
+                resp = await self._place_market_order_async(item["client"], item["symbol"], "Sell",
+                                                            item["acct"].get("entry_qty"), price_hint=item["price"],
+                                                            account_id=item["acct"].get("id"), trace=item["trace"])
+            except Exception as e:
+                resp = {"error": str(e)}
+            self._close_position(item["acct"], resp, item["price"], item["label"], exit_stats=self._exit_stats(item, resp))
+
+        await asyncio.gather(*(send(item) for item in exits))
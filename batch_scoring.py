@@ -0,0 +1,204 @@
+"""
+Cross-sectional scoring: the BotController._score_klines rules evaluated for
+every symbol at once on (symbols x bars) numpy arrays.
+
+Recursive indicators (Wilder RSI, EMA seeds and smoothing, momentum EMA) still
+step through the bars, but each step is one vector operation over all symbols
+instead of a Python loop per symbol, and every step performs the same float
+operations in the same order as the scalar helpers in bot_fib_scoring, so the
+scores match them exactly.
+
+Symbols are grouped by bar count, so ragged histories (a freshly listed coin
+with fewer bars) are scored with the same length-dependent rules as before.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+# per-symbol input: (opens, highs, lows, closes), oldest first
+Series = Tuple[Sequence[float], Sequence[float], Sequence[float], Sequence[float]]
+
+
+def _seq_sum(window: np.ndarray, count: int) -> np.ndarray:
+    # left-to-right like sum(); np.sum's pairwise summation rounds differently
+    total = np.zeros(window.shape[0])
+    for i in range(count):
+        total = total + window[:, i]
+    return total
+
+
+def ema_last(values: np.ndarray, period: int) -> np.ndarray:
+    """calc_ema for each row (rows need at least `period` columns)."""
+    k = 2.0 / (period + 1)
+    ema = _seq_sum(values, period) / period
+    for i in range(period, values.shape[1]):
+        ema = values[:, i] * k + ema * (1 - k)
+    return ema
+
+
+def wilder_rsi_last(closes: np.ndarray, period: int = 14) -> np.ndarray:
+    """wilder_rsi for each row; NaN where there are fewer than period + 1 closes."""
+    rows, n = closes.shape
+    if n < period + 1:
+        return np.full(rows, np.nan)
+    d = closes[:, 1:] - closes[:, :-1]
+    gains = np.zeros(rows)
+    losses = np.zeros(rows)
+    for i in range(period):
+        gains = gains + np.where(d[:, i] > 0, d[:, i], 0.0)
+        losses = losses + np.where(d[:, i] > 0, 0.0, -d[:, i])
+    avg_gain = gains / period
+    avg_loss = losses / period
+    flat = (avg_gain == 0) & (avg_loss == 0)
+    for i in range(period, n - 1):
+        gain = np.where(d[:, i] > 0, d[:, i], 0.0)
+        loss = np.where(d[:, i] < 0, -d[:, i], 0.0)
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - (100.0 / (1.0 + avg_gain / avg_loss))
+    rsi = np.where(avg_loss == 0, 100.0, rsi)
+    return np.where(flat, 50.0, rsi)
+
+
+def smoothed_momentum_last(closes: np.ndarray, lookback: int = 5, smooth_span: int = 3) -> np.ndarray:
+    """smoothed_momentum_pct for each row."""
+    rows, n = closes.shape
+    if n < lookback + 1:
+        return np.zeros(rows)
+    prev = closes[:, :n - lookback]
+    denom = np.where(prev != 0, prev, 1.0)
+    raw = ((closes[:, lookback:] - prev) / denom) * 100.0
+    alpha = 2.0 / (smooth_span + 1.0)
+    ema = raw[:, 0]
+    for i in range(1, raw.shape[1]):
+        ema = raw[:, i] * alpha + ema * (1.0 - alpha)
+    return ema
+
+
+def bullish_candle_last(opens: np.ndarray, highs: np.ndarray, lows: np.ndarray, closes: np.ndarray) -> np.ndarray:
+    """detect_bullish_candle on each row's last two bars (engulfing or hammer)."""
+    o, h, l, c = opens[:, -1], highs[:, -1], lows[:, -1], closes[:, -1]
+    if opens.shape[1] >= 2:
+        po, pc = opens[:, -2], closes[:, -2]
+        engulfing = (pc < po) & (c > o) & (c > po) & (o < pc)
+    else:
+        engulfing = np.zeros(o.shape[0], dtype=bool)
+    body = np.abs(c - o)
+    lower_wick = np.where(o > c, o - l, c - l)
+    upper_wick = h - np.maximum(o, c)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hammer = (body > 0) & (lower_wick / body >= 2) & (upper_wick / body <= 0.5)
+    return engulfing | hammer
+
+
+def _pivot_columns(n: int, lookback: int) -> List[int]:
+    # same slicing as pivot_fib_levels_from_confirmed_window, on column indexes
+    cols = list(range(n))
+    if n < lookback:
+        lookback = n
+    picked = cols[-lookback - 1:-1] if n >= lookback + 1 else cols[:-1] if n > 1 else cols
+    return picked or cols[-lookback:]
+
+
+def score_matrix(opens: np.ndarray, highs: np.ndarray, lows: np.ndarray, closes: np.ndarray,
+                 settings: Mapping[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Score rows of equal length. `settings` is SCORE_SETTINGS. Returns one array per
+    diagnostic (NaN where the scalar scorer reports None) plus "score".
+    """
+    rows, n = closes.shape
+    weights = settings["score_weights"]
+    period = settings["rsi_period"]
+
+    rsi = wilder_rsi_last(closes[:, -(period + 50):], period)
+    ema50 = ema_last(closes[:, -220:], 50) if n >= 50 else np.full(rows, np.nan)
+    ema200 = ema_last(closes[:, -500:], 200) if n >= 200 else np.full(rows, np.nan)
+    momentum = smoothed_momentum_last(closes, lookback=5, smooth_span=3)
+    candle_ok = bullish_candle_last(opens, highs, lows, closes) if n >= 5 else np.zeros(rows, dtype=bool)
+
+    cols = _pivot_columns(n, settings.get("fib_lookback", 50))
+    swing_high = highs[:, cols].max(axis=1)
+    swing_low = lows[:, cols].min(axis=1)
+    diff = swing_high - swing_low
+    lo = swing_high - 0.382 * diff
+    hi = swing_high - 0.618 * diff
+    price = closes[:, -1]
+    in_fib = (np.minimum(lo, hi) <= price) & (price <= np.maximum(lo, hi))
+
+    with np.errstate(invalid="ignore"):
+        score = np.zeros(rows, dtype=np.int64)
+        score += np.where(rsi <= settings["rsi_oversold_threshold"], int(weights["rsi"] * 1.5),
+                          np.where(rsi <= 55, weights["rsi"], 0))
+        score += np.where(momentum > settings["momentum_entry_threshold_pct"], weights["momentum"], 0)
+        score += momentum >= settings["momentum_strong_pct"]
+        score += momentum >= settings["momentum_very_strong_pct"]
+        bull = ema50 > ema200
+        score += np.where(bull, weights["ema"], 0)
+    score += np.where(candle_ok, weights["candle"], 0)
+    score += np.where(in_fib, weights["fib_zone"], 0)
+
+    return {
+        "score": score,
+        "rsi": rsi,
+        "momentum_pct": momentum,
+        "ema50": ema50,
+        "ema200": ema200,
+        "bull": bull,
+        "candle_ok": candle_ok,
+        "swing_high": swing_high,
+        "swing_low": swing_low,
+        "in_fib_zone": in_fib,
+        "current_price": price,
+    }
+
+
+def _opt(value: float, enough_bars: bool) -> Optional[float]:
+    # None only where the scalar helper has too few bars; a NaN close stays NaN, as it does there
+    return float(value) if enough_bars else None
+
+
+def _diagnostics(cols: Dict[str, np.ndarray], i: int, fib_levels, bars: int, rsi_period: int) -> Dict[str, Any]:
+    # same keys as BotController._score_klines
+    return {
+        "rsi": _opt(cols["rsi"][i], bars >= rsi_period + 1),
+        "momentum_pct": float(cols["momentum_pct"][i]),
+        "ema50": _opt(cols["ema50"][i], bars >= 50),
+        "ema200": _opt(cols["ema200"][i], bars >= 200),
+        "candle_ok": bool(cols["candle_ok"][i]),
+        "fib_levels": fib_levels(float(cols["swing_high"][i]), float(cols["swing_low"][i])),
+        "current_price": float(cols["current_price"][i]),
+        "trend": "bull" if cols["bull"][i] else "not_bull",
+        "in_fib_zone": bool(cols["in_fib_zone"][i]),
+        "score": int(cols["score"][i]),
+    }
+
+
+def score_universe(series: Mapping[str, Series], settings: Mapping[str, Any],
+                   fib_levels) -> List[Tuple[str, int, Dict[str, Any]]]:
+    """
+    Score every symbol and rank them: [(symbol, score, diagnostics)], best first,
+    ties in input order (like sorting the per-symbol results). Symbols with no
+    bars get score 0 and {"error": "no_closes"}. `fib_levels` is calc_fib_levels.
+    """
+    symbols = list(series)
+    scores = np.zeros(len(symbols), dtype=np.int64)
+    diags: List[Dict[str, Any]] = [{"error": "no_closes"} for _ in symbols]
+
+    by_length: Dict[int, List[int]] = {}
+    for idx, symbol in enumerate(symbols):
+        n = len(series[symbol][3])
+        if n:
+            by_length.setdefault(n, []).append(idx)
+
+    for n, idxs in by_length.items():
+        o, h, l, c = (np.array([series[symbols[i]][k] for i in idxs], dtype=float) for k in range(4))
+        cols = score_matrix(o, h, l, c, settings)
+        for row, idx in enumerate(idxs):
+            scores[idx] = cols["score"][row]
+            diags[idx] = _diagnostics(cols, row, fib_levels, n, settings["rsi_period"])
+
+    order = np.argsort(-scores, kind="stable")
+    return [(symbols[i], int(scores[i]), diags[i]) for i in order]
@@ -0,0 +1,153 @@
+"""
+Replay benchmark: run scan cycles against a recorded exchange capture.
+
+Record a capture by setting "recordExchange": "capture.ndjson.gz" in config.json
+and letting the bot run a few cycles. Then, from the repository root:
+
+    python bench_replay.py capture.ndjson.gz [--speed 0] [--cycles N] [--reseed] [--async]
+
+Each recorded cycle is replayed once against a throwaway copy of the recorded
+accounts (app/data is not touched), with the signal clock pinned to the
+recorded cycle's wall time and a seeded paper fill model. --speed 1 answers
+every call after its recorded duration, 0 answers at once. --reseed resets the
+accounts to the recorded state before every cycle instead of letting the build
+carry its own state forward. Replay a capture with the engine that recorded it
+(--async for the async engine): the two call the exchange with different
+arguments, and unmatched calls count as misses.
+
+Prints one JSON document: per-cycle timings and phases, and the trading
+decisions (orders sent, trades opened/closed). Diff the "decisions" of two
+builds to check a change did not alter behaviour; compare "cycles" for speed.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import bot_fib_scoring as bfs  # noqa: E402
+from replay import Capture, ReplayClient  # noqa: E402
+
+
+def _point_data_at(directory: str):
+    """Keep the controller's files in `directory` (set before constructing it)."""
+    bfs.ACCOUNTS_FILE = os.path.join(directory, "accounts.json")
+    bfs.TRADES_FILE = os.path.join(directory, "trades.json")
+    bfs.TRADE_ARCHIVE_DIR = os.path.join(directory, "archive")
+    bfs.CANDLE_CACHE_DIR = os.path.join(directory, "candles")
+    bfs.TRADE_SETTINGS["candle_cache"] = False
+    bfs.TRADE_SETTINGS["record_exchange"] = None
+
+
+def _controller(replay: ReplayClient, asynchronous: bool, seed: int):
+    if asynchronous:
+        from async_engine import AsyncBotController
+
+        bc = AsyncBotController()
+        bc._get_async_client = lambda account: (bc.paper.open_account(account), replay)[1] \
+            if bc._is_paper(account) else replay
+    else:
+        bc = bfs.BotController()
+        bc._get_client = lambda account: (bc.paper.open_account(account), replay)[1] \
+            if bc._is_paper(account) else replay
+        bc._public_client = lambda: replay
+    bc.log = lambda msg: None
+    bc.paper.fill_model._rng.seed(seed)
+    return bc
+
+
+def _decision(trade: Dict[str, Any]) -> Dict[str, Any]:
+    keys = ("account_id", "symbol", "side", "qty", "entry_price", "exit_price", "open", "profit_pct")
+    return {k: trade.get(k) for k in keys if k in trade}
+
+
+def run(path: str, speed: float, cycles: int, reseed: bool, asynchronous: bool, seed: int) -> Dict[str, Any]:
+    capture = Capture(path)
+    recorded = [c for c in capture.cycles if c.wall is not None]
+    if cycles:
+        recorded = recorded[:cycles]
+    if not recorded:
+        raise SystemExit(f"{path}: no scan cycles recorded")
+
+    with tempfile.TemporaryDirectory(prefix="replay-") as tmp:
+        _point_data_at(tmp)
+        with open(bfs.ACCOUNTS_FILE, "w") as fh:
+            json.dump(recorded[0].accounts, fh)
+        replay = ReplayClient(capture, speed=speed, asynchronous=asynchronous)
+        bc = _controller(replay, asynchronous, seed)
+        wall = {"t": recorded[0].wall}
+        bc.signal_bus.clock = lambda: wall["t"]
+
+        results: List[Dict[str, Any]] = []
+        decisions: List[Dict[str, Any]] = []
+        seen_trades: Dict[str, str] = {}
+        for cycle in recorded:
+            if reseed and cycle.index != recorded[0].index:
+                bc.save_accounts(json.loads(json.dumps(cycle.accounts)))
+            replay.start_cycle(cycle.index)
+            wall["t"] = cycle.wall
+            misses = replay.misses
+            bc.health.begin_cycle()
+            error = None
+            started = time.perf_counter()
+            try:
+                if asynchronous:
+                    asyncio.run(bc._scan_once_async())
+                else:
+                    bc._scan_once()
+            except Exception as e:
+                error = str(e)
+            elapsed = time.perf_counter() - started
+            bc.health.end_cycle(error)
+            for trade in bc._read_trades():
+                tid = str(trade.get("id"))
+                state = "open" if trade.get("open") else "closed"
+                if seen_trades.get(tid) != state:
+                    seen_trades[tid] = state
+                    decisions.append({"cycle": cycle.index, **_decision(trade)})
+            results.append({
+                "cycle": cycle.index,
+                "seconds": round(elapsed, 4),
+                "phases_s": bc.health.last.get("phases_s"),
+                "replay_misses": replay.misses - misses,
+                "error": error,
+            })
+
+    seconds = [r["seconds"] for r in results]
+    return {
+        "capture": path,
+        "speed": speed,
+        "engine": "async" if asynchronous else "threaded",
+        "calls": replay.calls,
+        "misses": replay.misses,
+        "cycle_median_s": round(statistics.median(seconds), 4),
+        "cycle_total_s": round(sum(seconds), 4),
+        "cycles": results,
+        "decisions": decisions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("capture", help="gzip NDJSON capture written with recordExchange")
+    parser.add_argument("--speed", type=float, default=0.0, help="1 = recorded latency, 0 = no waiting")
+    parser.add_argument("--cycles", type=int, default=0, help="replay only the first N cycles")
+    parser.add_argument("--reseed", action="store_true", help="reset accounts to the recording every cycle")
+    parser.add_argument("--async", dest="asynchronous", action="store_true", help="use the async engine")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the paper fill model")
+    args = parser.parse_args()
+    report = run(args.capture, args.speed, args.cycles, args.reseed, args.asynchronous, args.seed)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
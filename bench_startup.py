@@ -0,0 +1,102 @@
+"""
+Startup benchmark: import time of the app modules and time to first response.
+
+Each measurement runs in a fresh interpreter so module caches don't hide the
+cost. Run from the repository root:
+
+    python bench_startup.py [--runs 5] [--port 8765] [--path /api/dashboard/]
+
+Prints one JSON document (median / min / max in milliseconds).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT_TARGETS = ["bot_fib_scoring", "app_state", "main"]
+
+_IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import {module}; "
+    "print((time.perf_counter() - t) * 1000.0)"
+)
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    return {
+        "median_ms": round(statistics.median(samples), 2),
+        "min_ms": round(min(samples), 2),
+        "max_ms": round(max(samples), 2),
+        "runs": len(samples),
+    }
+
+
+def measure_import(module: str, runs: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _IMPORT_SNIPPET.format(module=module)],
+            cwd=HERE, capture_output=True, text=True, check=True,
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return _summary(samples)
+
+
+def measure_first_response(port: int, path: str, runs: int, timeout: float = 60.0) -> Dict[str, float]:
+    """Spawn `uvicorn main:app` and time spawn -> first successful response on path."""
+    samples = []
+    url = f"http://127.0.0.1:{port}{path}"
+    for _ in range(runs):
+        started = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=HERE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            while True:
+                if proc.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {proc.returncode}")
+                if time.perf_counter() - started > timeout:
+                    raise RuntimeError(f"no response from {url} within {timeout}s")
+                try:
+                    with urllib.request.urlopen(url, timeout=5) as resp:
+                        resp.read()
+                    break
+                except (urllib.error.URLError, ConnectionError):
+                    time.sleep(0.01)
+            samples.append((time.perf_counter() - started) * 1000.0)
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+    return _summary(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--path", default="/api/dashboard/", help="endpoint for the first-response timing")
+    parser.add_argument("--skip-server", action="store_true", help="only measure import time")
+    args = parser.parse_args()
+
+    report: Dict[str, object] = {"python": sys.version.split()[0]}
+    report["import"] = {m: measure_import(m, args.runs) for m in IMPORT_TARGETS}
+    if not args.skip_server:
+        report["first_response"] = {args.path: measure_first_response(args.port, args.path, args.runs)}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
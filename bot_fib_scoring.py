@@ -9,21 +9,42 @@ Key features:
 - Take profit on Fibonacci extensions (1.272 -> 1.618 -> 2.618)
 - Stop loss = 1% below swing low (ensures SL below entry)
 - Order response validation, retry wrapper, file locking
+- Cached instrument filters (qty step, tick size, min order value)
 - Dry-run support
 - Daily trade limit (30 trades/24h cycle)
 """
 from __future__ import annotations
 
+import itertools
 import json
 import os
 import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple, Callable
-
-# Exchange client used in original repo
-from pybit.unified_trading import HTTP
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from candles import CandleStore, interval_minutes
+from klines import KlineColumns, parse_klines
+from instruments import InstrumentCache, InstrumentSpec
+from latency import LatencyTrace
+from paper import FillModel, PaperBroker
+from profiler import ScanProfiler
+from replay import CaptureWriter, RecordingClient
+from scan_health import ScanHealth
+from account_store import AccountStore, LoadedAccounts
+from rate_limiter import PUBLIC_BUCKET, RateLimiter
+from signals import Signal, SignalBus, SignalSet
+from storage import atomic_write_json, file_signature, iter_json_array
+from records import TradeRecord
+from trade_archive import TradeArchive
+from resilience import BreakerRegistry, CircuitOpenError, RetryBudget, RetryPolicy
+
+if TYPE_CHECKING:
+    # Exchange client used in original repo; imported lazily in _get_client
+    from pybit.unified_trading import HTTP
 
 # -------------------- CONFIG --------------------
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -70,6 +91,7 @@ SCORE_SETTINGS = {
     "momentum_strong_pct": float(CONFIG.get("momentumStrong", 0.5)),
     "momentum_very_strong_pct": float(CONFIG.get("momentumVeryStrong", 1.5)),
     "fib_lookback": int(CONFIG.get("fibLookback", 50)),
+    "min_entry_score": int(CONFIG.get("minEntryScore", 3)),
     "score_weights": {
         "rsi": int(CONFIG.get("scoreWeightRsi", 1)),
         "momentum": int(CONFIG.get("scoreWeightMomentum", 1)),
@@ -88,20 +110,72 @@ TRADE_SETTINGS = {
     "debug_raw_responses": CONFIG.get("debugRawResponses", False),
     "dry_run": CONFIG.get("dryRun", False),
     "max_trades_per_day": int(CONFIG.get("maxTradesPerDay", 30)), # New limit
+    "instrument_refresh_seconds": int(CONFIG.get("instrumentRefreshSeconds", 3600)),
+    "order_category": CONFIG.get("orderCategory"),  # None -> spot if listed, else linear
+    "worker_processes": int(CONFIG.get("workerProcesses", 1)),  # >1 shards accounts across processes
+    "accounts_flush_interval": float(CONFIG.get("accountsFlushInterval", 60)),  # batch window for balances etc.
+    "async_engine": bool(CONFIG.get("asyncEngine", False)),  # run the scan loop on the web server's event loop
+    "async_concurrency": int(CONFIG.get("asyncConcurrency", 50)),
+    "live_trades_max": int(CONFIG.get("liveTradesMax", 500)),  # closed trades beyond this roll into the archive
+    "aggregate_timeframes": tuple(str(tf) for tf in CONFIG.get("aggregateTimeframes", ["5", "15", "60"])),
+    "candle_cache": bool(CONFIG.get("candleCache", True)),  # keep base klines on disk for warm restarts
+    "kline_limit": int(CONFIG.get("klineLimit", 300)),  # bars the scorer works on
+    "exit_concurrency": int(CONFIG.get("exitConcurrency", 16)),  # exit orders in flight at once
+    # spot taker fee, charged in base coin on buys: the position held (and sold on exit) is net of it
+    "spot_fee_rate": float(CONFIG.get("spotFeeRate", 0.001)),
+    "validate_concurrency": int(CONFIG.get("validateConcurrency", 16)),  # bulk /api/accounts/test
+    # when a cycle overruns scanInterval, score only part of the universe (never below the fraction)
+    "shed_scoring": bool(CONFIG.get("shedScoring", True)),
+    "min_scoring_fraction": float(CONFIG.get("minScoringFraction", 0.25)),
+    # gzip NDJSON capture of every exchange call, for offline replays (bench_replay.py)
+    "record_exchange": CONFIG.get("recordExchange"),
+    # extra market-data universes scanned by the async engine: {"binance": ["BTCUSDT", ...], "bybit": []}
+    # (an empty list means allowed_coins); any ccxt exchange id, or "mock" for the local mock exchange
+    "market_exchanges": dict(CONFIG.get("marketExchanges", {})),
+}
+
+# Retry / circuit breaker settings for exchange calls
+RESILIENCE_SETTINGS = {
+    "retry_attempts": int(CONFIG.get("retryAttempts", 3)),
+    "retry_base_delay": float(CONFIG.get("retryBaseDelay", 0.25)),
+    "retry_max_delay": float(CONFIG.get("retryMaxDelay", 4.0)),
+    "retry_deadline": float(CONFIG.get("retryDeadline", 8.0)),
+    "retry_budget_ratio": float(CONFIG.get("retryBudgetRatio", 0.2)),
+    "breaker_failure_threshold": int(CONFIG.get("breakerFailureThreshold", 5)),
+    "breaker_reset_seconds": float(CONFIG.get("breakerResetSeconds", 30)),
+}
+
+# Paper trading (dryRun, or accounts with "paper": true): virtual balances and the fill model
+PAPER_SETTINGS = {
+    "initial_balance": float(CONFIG.get("paperBalance", 1000.0)),  # USDT per new paper account
+    "slippage_bps": float(CONFIG.get("paperSlippageBps", 5.0)),
+    "slippage_jitter_bps": float(CONFIG.get("paperSlippageJitterBps", 5.0)),
+    "fee_bps": float(CONFIG.get("paperFeeBps", 10.0)),
+    "latency_ms": float(CONFIG.get("paperLatencyMs", 50.0)),
+    "latency_jitter_ms": float(CONFIG.get("paperLatencyJitterMs", 25.0)),
+}
+
+# Request quotas (Bybit: IP-level for public data, per API key for private endpoints)
+RATE_LIMIT_SETTINGS = {
+    "public_rate": float(CONFIG.get("publicRateLimitPerSec", 100)),
+    "public_burst": float(CONFIG.get("publicRateBurst", 100)),
+    "private_rate": float(CONFIG.get("privateRateLimitPerSec", 10)),
+    "private_burst": float(CONFIG.get("privateRateBurst", 10)),
 }
 
+# Shared by every BotController and main.price_loop
+RATE_LIMITER = RateLimiter(
+    public_rate=RATE_LIMIT_SETTINGS["public_rate"],
+    public_burst=RATE_LIMIT_SETTINGS["public_burst"],
+    private_rate=RATE_LIMIT_SETTINGS["private_rate"],
+    private_burst=RATE_LIMIT_SETTINGS["private_burst"],
+)
+
 # Adjusted paths to match existing project structure (app/ instead of accounts/)
 ACCOUNTS_FILE = os.path.join(BASE_DIR, "app/data/accounts.json")
 TRADES_FILE = os.path.join(BASE_DIR, "app/data/trades.json")
-
-# Ensure app directory exists
-os.makedirs(os.path.join(BASE_DIR, "app/data"), exist_ok=True)
-
-# Ensure files exist
-for f in (ACCOUNTS_FILE, TRADES_FILE):
-    if not os.path.exists(f):
-        with open(f, "w") as fh:
-            fh.write("[]")
+TRADE_ARCHIVE_DIR = os.path.join(BASE_DIR, "app/data/archive")
+CANDLE_CACHE_DIR = os.path.join(BASE_DIR, "app/data/candles")
 
 # -------------------- Utilities --------------------
 def now_ts() -> int:
@@ -258,15 +332,89 @@ class BotController:
         self.log_queue = log_queue
         self._running = False 
         self._stop = threading.Event()
-        self._file_lock = threading.Lock()
+        # re-entrant: services hold it around load/save read-modify-write cycles
+        self._file_lock = threading.RLock()
         self._threads: List[threading.Thread] = []
+        self._exit_pool: Optional[ThreadPoolExecutor] = None  # exit fan-out, created on first use
+        self._trade_batch: Optional[Dict[str, Any]] = None  # see trade_batch()
+
+        # accounts.json cached in memory; only dirty fields trigger a rewrite
+        self.account_store = AccountStore(
+            ACCOUNTS_FILE,
+            lock=self._file_lock,
+            volatile_flush_interval=TRADE_SETTINGS.get("accounts_flush_interval", 60),
+            log=self.log,
+        )
+        # closed trades beyond the live cap, gzip NDJSON per UTC day
+        self.trade_archive = TradeArchive(TRADE_ARCHIVE_DIR, lock=self._file_lock)
+        self.trades_version = 0
+        self._state_sig: Optional[tuple] = None
+        self._external_version = 0
 
         # Daily limit tracking
         self.trades_today = 0
         self.day_start_time = time.time()
         self.MAX_TRADES_DAILY = TRADE_SETTINGS.get("max_trades_per_day", 30)
 
-        # ensure account files exist
+        # base klines seen by the scan, aggregated locally into higher timeframes
+        # (and, with candle_cache, persisted so a restart only fetches the missing bars)
+        self.candles = CandleStore(
+            base_interval=TIMEFRAME,
+            timeframes=TRADE_SETTINGS["aggregate_timeframes"],
+            max_base_bars=max(1500, TRADE_SETTINGS["kline_limit"]),
+            directory=CANDLE_CACHE_DIR if TRADE_SETTINGS.get("candle_cache", True) else None,
+        )
+        # scores and entry plans, built once per candle and shared by all accounts
+        self.signal_bus = SignalBus(interval_minutes(TIMEFRAME) or 1)
+        # on-demand cProfile / stack sampling of the scan loop (/api/bot/profile)
+        self.profiler = ScanProfiler()
+        # cycle/phase timings for /api/bot/status; sheds scoring work when cycles overrun
+        self.health = ScanHealth(
+            TRADE_SETTINGS["scan_interval"],
+            shed=TRADE_SETTINGS["shed_scoring"],
+            min_fraction=TRADE_SETTINGS["min_scoring_fraction"],
+        )
+        self.started_at: Optional[float] = None
+        # paper accounts: fills simulated against the shared feed, no exchange calls with keys
+        self.paper = PaperBroker(
+            FillModel(
+                slippage_bps=PAPER_SETTINGS["slippage_bps"],
+                slippage_jitter_bps=PAPER_SETTINGS["slippage_jitter_bps"],
+                fee_bps=PAPER_SETTINGS["fee_bps"],
+                latency_ms=PAPER_SETTINGS["latency_ms"],
+                latency_jitter_ms=PAPER_SETTINGS["latency_jitter_ms"],
+            ),
+            initial_balance=PAPER_SETTINGS["initial_balance"],
+            price_source=self._feed_price,
+        )
+        self._market_client: Optional[HTTP] = None
+        # exchange responses captured for replay (recordExchange); None when not recording
+        record_path = self._capture_path()
+        self.recorder: Optional[CaptureWriter] = CaptureWriter(record_path) if record_path else None
+
+        # Instrument filters shared by all accounts (public data)
+        self.instruments = InstrumentCache(
+            refresh_seconds=TRADE_SETTINGS.get("instrument_refresh_seconds", 3600),
+            preferred_category=TRADE_SETTINGS.get("order_category"),
+        )
+
+        self.rate_limiter = RATE_LIMITER
+
+        # Retry policy + per (endpoint, account) circuit breakers
+        self.retry_policy = RetryPolicy(
+            attempts=RESILIENCE_SETTINGS["retry_attempts"],
+            base_delay=RESILIENCE_SETTINGS["retry_base_delay"],
+            max_delay=RESILIENCE_SETTINGS["retry_max_delay"],
+            deadline=RESILIENCE_SETTINGS["retry_deadline"],
+        )
+        self.retry_budget = RetryBudget(ratio=RESILIENCE_SETTINGS["retry_budget_ratio"])
+        self.breakers = BreakerRegistry(
+            failure_threshold=RESILIENCE_SETTINGS["breaker_failure_threshold"],
+            reset_timeout=RESILIENCE_SETTINGS["breaker_reset_seconds"],
+        )
+
+        # ensure data files exist (done here, not at import time)
+        os.makedirs(os.path.dirname(ACCOUNTS_FILE), exist_ok=True)
         for path, default in ((ACCOUNTS_FILE, []), (TRADES_FILE, [])):
             if not os.path.exists(path):
                 try:
@@ -318,25 +466,29 @@ class BotController:
         return limit_reached
 
     # ------------------ Account file helpers (locked) ------------------
-    def load_accounts(self) -> List[Dict[str, Any]]:
+    def load_accounts(self) -> LoadedAccounts:
         try:
-            with self._file_lock:
-                with open(ACCOUNTS_FILE, "r") as fh:
-                    return json.load(fh)
+            return self.account_store.load()
         except Exception as e:
             self.log(f"load_accounts error: {e}")
-            return []
+            return LoadedAccounts()
 
     def save_accounts(self, accounts: List[Dict[str, Any]]):
         try:
-            with self._file_lock:
-                with open(ACCOUNTS_FILE, "w") as fh:
-                    json.dump(accounts, fh, indent=2)
+            self.account_store.save(accounts)
         except Exception as e:
             self.log(f"save_accounts error: {e}")
             # Raise exception so API knows it failed (matching previous logic)
             raise RuntimeError(f"Failed to save accounts: {e}")
 
+    def commit_accounts(self, accounts: List[Dict[str, Any]]) -> bool:
+        """Stage per-field changes from a scan cycle; writes only if something is due."""
+        try:
+            return self.account_store.commit(accounts)
+        except Exception as e:
+            self.log(f"commit_accounts error: {e}")
+            return False
+
     def _read_trades(self) -> List[Dict[str, Any]]:
         try:
             with self._file_lock:
@@ -346,93 +498,251 @@ class BotController:
             self.log(f"_read_trades error: {e}")
             return []
 
+    def iter_trades(self, symbol: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+                    stop: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream trades without loading them all: the live file first, then the
+        archive segments that may match `symbol` / `since` / `until` (ISO times,
+        see TradeArchive.segments), newest first until `stop(segment meta)` says
+        the rest cannot matter. Rows are not filtered; callers apply their own
+        predicates.
+        """
+        live_ids = set()
+        try:
+            # open under the lock; after that the handle pins this version of the
+            # file, since writers replace it atomically instead of rewriting in place
+            with self._file_lock:
+                items = iter_json_array(TRADES_FILE) if os.path.exists(TRADES_FILE) else iter(())
+                first = next(items, None)
+            if first is not None:
+                for trade in itertools.chain((first,), items):
+                    if isinstance(trade, dict):
+                        live_ids.add(trade.get("id"))
+                    yield trade
+        except Exception as e:
+            self.log(f"iter_trades error: {e}")
+        try:
+            for trade in self.trade_archive.iter_trades(symbol=symbol, since=since, until=until, stop=stop):
+                # a crash between archiving and rewriting the live file can leave both copies
+                if trade.get("id") not in live_ids:
+                    yield trade
+        except Exception as e:
+            self.log(f"iter_trades archive error: {e}")
+
+    def state_version(self) -> int:
+        """
+        Monotonic version of the trade and account state. Bumped by our own writes
+        and by other processes' writes (account reloads, trades file signature).
+        """
+        with self._file_lock:
+            self.account_store.refresh()
+            sig = file_signature(TRADES_FILE)
+            if sig != self._state_sig:
+                self._state_sig = sig
+                self._external_version += 1
+            return self.trades_version + self.account_store.version + self._external_version
+
+    def find_trade(self, trade_id: str) -> Optional[Dict[str, Any]]:
+        for trade in self.iter_trades():
+            if isinstance(trade, dict) and trade.get("id") == trade_id:
+                return trade
+        return None
+
+    def _roll_trades(self, trades: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Move the oldest closed trades into the archive once the live list exceeds
+        live_trades_max, down to half the cap. Open trades always stay live.
+        """
+        cap = max(2, int(TRADE_SETTINGS.get("live_trades_max", 500)))
+        if len(trades) <= cap:
+            return trades
+        closed = [t for t in trades if t.get("open") is False]
+        closed.sort(key=lambda t: str(t.get("exit_time") or t.get("entry_time") or ""))
+        excess = len(trades) - cap // 2
+        rolled = closed[:excess]
+        if not rolled:
+            return trades
+        self.trade_archive.append(rolled)
+        rolled_ids = {id(t) for t in rolled}
+        return [t for t in trades if id(t) not in rolled_ids]
+
     def _write_trades(self, trades: List[Dict[str, Any]]):
         try:
             with self._file_lock:
-                with open(TRADES_FILE, "w") as fh:
-                    json.dump(trades, fh, indent=2)
+                atomic_write_json(TRADES_FILE, trades)
+                # lets read-side caches (analytics) detect new trade writes cheaply
+                self.trades_version += 1
         except Exception as e:
             self.log(f"_write_trades error: {e}")
 
-    def add_trade(self, trade: Dict[str, Any]):
+    def add_trade(self, trade: Union[Dict[str, Any], TradeRecord]):
         try:
-            trades = self._read_trades()
-            trades.append(safe_json(trade, max_depth=6))
-            if len(trades) > 500:
-                trades = trades[-500:]
-            self._write_trades(trades)
+            rec = trade if isinstance(trade, TradeRecord) else TradeRecord.from_dict(trade)
+            self._log_invalid_fields(f"add_trade {rec.get('id')}", rec)
+            batch = self._own_batch()
+            if batch is not None:
+                batch["ops"].append(("add", rec.to_dict(copy_nested=False)))
+                return
+            with self._file_lock:
+                trades = self._read_trades()
+                trades.append(rec.to_dict(copy_nested=False))
+                self._write_trades(self._roll_trades(trades))
         except Exception as e:
             self.log(f"add_trade error: {e}")
 
+    def _log_invalid_fields(self, where: str, rec: TradeRecord):
+        invalid = rec.invalid_fields()
+        if invalid:
+            self.log(f"{where}: kept uncoerced values {invalid!r}")
+
+    @contextmanager
+    def trade_batch(self):
+        """
+        Buffer this thread's add_trade/update_trade calls and rewrite trades.json
+        once at the end instead of once per call (a scan that opens or closes
+        hundreds of paper positions). Other threads keep writing directly.
+        """
+        if self._trade_batch is not None:
+            yield
+            return
+        batch = {"owner": threading.get_ident(), "ops": [], "known": None}
+        self._trade_batch = batch
+        try:
+            yield
+        finally:
+            self._trade_batch = None
+            if batch["ops"]:
+                self._apply_trade_ops(batch["ops"])
+
+    def flush_trade_batch(self):
+        """Write the trades buffered so far by this thread's batch (the batch stays open)."""
+        batch = self._own_batch()
+        if batch is not None and batch["ops"]:
+            ops, batch["ops"] = batch["ops"], []
+            self._apply_trade_ops(ops)
+
+    def _own_batch(self) -> Optional[Dict[str, Any]]:
+        batch = self._trade_batch
+        return batch if batch is not None and batch["owner"] == threading.get_ident() else None
+
+    def _apply_trade_ops(self, ops: List[Tuple[Any, ...]]):
+        try:
+            with self._file_lock:
+                trades = self._read_trades()
+                by_id = {t.get("id"): t for t in trades if isinstance(t, dict)}
+                for op in ops:
+                    if op[0] == "add":
+                        trades.append(op[1])
+                        by_id[op[1].get("id")] = op[1]
+                    elif op[1] in by_id:
+                        by_id[op[1]].update(op[2])
+                self._write_trades(self._roll_trades(trades))
+        except Exception as e:
+            self.log(f"trade batch write error: {e}")
+
+    def _trade_for_update(self, trade_id: str) -> Optional[Dict[str, Any]]:
+        """The live trade with this id; inside a batch the file is read once per batch."""
+        batch = self._own_batch()
+        if batch is None:
+            return next((t for t in self._read_trades() if t.get("id") == trade_id), None)
+        for op in reversed(batch["ops"]):
+            if op[0] == "add" and op[1].get("id") == trade_id:
+                return op[1]
+        if batch["known"] is None:
+            batch["known"] = {t.get("id"): t for t in self._read_trades() if isinstance(t, dict)}
+        return batch["known"].get(trade_id)
+
     def is_running(self) -> bool:
         """Check if the bot is currently running."""
         return self._running
 
     def update_trade(self, trade_id: str, updates: Dict[str, Any]) -> bool:
         try:
+            rec = TradeRecord.from_dict(updates)
+            self._log_invalid_fields(f"update_trade {trade_id}", rec)
+            batch = self._own_batch()
+            if batch is not None:
+                batch["ops"].append(("update", trade_id, rec.to_dict(copy_nested=False)))
+                return True
             changed = False
-            trades = self._read_trades()
-            for t in trades:
-                if t.get("id") == trade_id:
-                    t.update(safe_json(updates, max_depth=6))
-                    changed = True
-                    break
-            if changed:
-                self._write_trades(trades)
+            with self._file_lock:
+                trades = self._read_trades()
+                for t in trades:
+                    if t.get("id") == trade_id:
+                        t.update(rec.to_dict(copy_nested=False))
+                        changed = True
+                        break
+                if changed:
+                    self._write_trades(self._roll_trades(trades))
             return changed
         except Exception as e:
             self.log(f"update_trade error: {e}")
             return False 
-# ------------------ Client wrapper ------------------
-    def _get_client(self, account: Dict[str, Any]) -> Optional[HTTP]:
+    # ------------------ Client wrapper ------------------
+    def _account_credentials(self, account: Dict[str, Any]) -> Optional[Tuple[str, str]]:
         """
-        Return a pybit HTTP client if all required fields exist:
+        Return (api_key, api_secret) if all required fields exist:
         - id (dashboard unique account id)
         - name (account display name)
-        - exchange
+        - exchange (bybit)
         - api_Key
         - api_secret
         """
-        try:
-            # Dashboard fields
-            account_id = account.get("id")                # must exist
-            account_name = account.get("name")            # must exist
-            exchange = account.get("exchange")
-
-             # API credentials (dashboard naming)
-            key = (
-                account.get("api_key")
-                or account.get("key")
-                or account.get("apiKey")                  # dashboard
-            )
+        # Dashboard fields
+        account_id = account.get("id")                # must exist
+        account_name = account.get("name")            # must exist
+        exchange = account.get("exchange")
+
+        # API credentials (dashboard naming)
+        key = (
+            account.get("api_key")
+            or account.get("key")
+            or account.get("apiKey")                  # dashboard
+        )
+
+        secret = (
+            account.get("api_secret")
+            or account.get("secret")
+            or account.get("apiSecret")
+            or account.get("secretKey")               # dashboard
+        )
+
+        # Validate required fields (separately)
+        if not account_id:
+            self.log("Missing account id")
+            return None
 
-            secret = (
-                account.get("api_secret")
-                or account.get("secret")
-                or account.get("apiSecret")
-                or account.get("secretKey")               # dashboard
-            )
+        if not account_name:
+            self.log("Missing account name")
+            return None
 
-            # Validate required fields (separately)
-            if not account_id:
-                self.log("Missing account id")
-                return None
+        if not exchange:
+            self.log("Missing exchange field")
+            return None
 
-            if not account_name:
-                self.log("Missing account name")
-                return None
+        if not key or not secret:
+            self.log("Missing API credentials")
+            return None
 
-            if not exchange:
-                self.log("Missing exchange field")
-                return None
+        if exchange.lower() != "bybit":
+            self.log(f"Unsupported exchange: {exchange}")
+            return None
 
-            if not key or not secret:
-                self.log("Missing API credentials")
-                return None
+        return key, secret
 
-            if exchange.lower() != "bybit":
-                self.log(f"Unsupported exchange: {exchange}")
+    def _get_client(self, account: Dict[str, Any]) -> Optional[HTTP]:
+        """Return a pybit HTTP client for the account, or None if it is not usable."""
+        if self._is_paper(account):
+            self.paper.open_account(account)
+            return self._public_client()
+        try:
+            creds = self._account_credentials(account)
+            if not creds:
                 return None
+            key, secret = creds
+
+            # pybit is imported on first use so importing this module stays cheap
+            from pybit.unified_trading import HTTP
 
             # Create client
             client = HTTP(
@@ -441,59 +751,87 @@ class BotController:
                 testnet=TRADE_SETTINGS.get("test_on_testnet", False)
             )
 
-            self.log(f"Client created for {account_name} (ID: {account_id})")
+            self.log(f"Client created for {account.get('name')} (ID: {account.get('id')})")
 
-            return client
+            return self._recorded(client)
 
         except Exception as e:
             self.log(f"_get_client error: {e}")
             return None
 
-        # ------------------ API retry wrapper ------------------
-        def _retry(self, fn: Callable[..., Any], attempts: int = 3, base_delay: float = 0.5, *args, **kwargs):
-            last_exc = None
-            for i in range(attempts):
-                try:
-                    return fn(*args, **kwargs)
-                except Exception as e:
-                    last_exc = e
-                    delay = base_delay * (i + 1)
-                    time.sleep(delay)
-            raise last_exc
+    @staticmethod
+    def _is_paper(account: Dict[str, Any]) -> bool:
+        return bool(TRADE_SETTINGS.get("dry_run", False) or account.get("paper"))
 
-    # ------------------ Kline normalization ------------------
-    def _normalize_klines_payload(self, raw_klines: Any) -> Tuple[List[float], List[float], List[float], List[Dict[str, float]]]:
-        closes: List[float] = []
-        highs: List[float] = []
-        lows: List[float] = []
-        ohlc: List[Dict[str, float]] = []
-        try:
-            if isinstance(raw_klines, dict) and "result" in raw_klines:
-                payload = raw_klines["result"]
-            elif isinstance(raw_klines, dict) and "data" in raw_klines:
-                payload = raw_klines["data"]
-            else:
-                payload = raw_klines
+    def _trades_on_paper(self, account_id: Optional[str]) -> bool:
+        # paper accounts get a ledger when their client is first requested
+        return bool(TRADE_SETTINGS.get("dry_run", False) or self.paper.balance(account_id) is not None)
 
-            if isinstance(payload, list):
-                for item in payload:
-                    try:
-                        if isinstance(item, (list, tuple)) and len(item) >= 5:
-                            o = float(item[1]); h = float(item[2]); l = float(item[3]); c = float(item[4])
-                        elif isinstance(item, dict):
-                            o = float(item.get("open") or item.get("Open") or item.get("o"))
-                            h = float(item.get("high") or item.get("High") or item.get("h"))
-                            l = float(item.get("low") or item.get("Low") or item.get("l"))
-                            c = float(item.get("close") or item.get("Close") or item.get("c"))
-                        else:
-                            continue
-                        closes.append(c); highs.append(h); lows.append(l)
-                        ohlc.append({"open": o, "high": h, "low": l, "close": c})
-                    except Exception:
-                        continue
-        except Exception as e:
-            self.log(f"_normalize_klines_payload error: {e}")
-        return closes, highs, lows, ohlc
+    def _public_client(self) -> Optional[HTTP]:
+        """One keyless client for the market data of all paper accounts."""
+        if self._market_client is None:
+            try:
+                from pybit.unified_trading import HTTP
+                self._market_client = self._recorded(HTTP(testnet=TRADE_SETTINGS.get("test_on_testnet", False)))
+            except Exception as e:
+                self.log(f"_public_client error: {e}")
+                return None
+        return self._market_client
+
+    def _capture_path(self) -> Optional[str]:
+        """File this process records exchange calls to (recordExchange), or None."""
+        return TRADE_SETTINGS.get("record_exchange") or None
+
+    def _recorded(self, client: Any) -> Any:
+        return RecordingClient(client, self.recorder) if self.recorder is not None else client
+
+    def _feed_price(self, symbol: str) -> Optional[float]:
+        """Latest price of symbol seen by the scan (the last stored bar, else the signals)."""
+        rows = self.candles.klines(symbol, TIMEFRAME, 1)
+        if rows:
+            return rows[-1][4]
+        latest = self.signal_bus.latest()
+        signal = latest.get(symbol) if latest else None
+        return signal.price if signal is not None else None
+
+    def _paper_validation(self, account: Dict[str, Any]) -> Tuple[bool, Optional[float], str]:
+        balance = self.paper.open_account(account)
+        account["paper_balance"] = balance
+        return True, balance, ""
+
+    # ------------------ API retry wrapper ------------------
+    def _retry(self, fn: Callable[[], Any], endpoint: str = "generic", account_id: Optional[str] = None,
+               attempts: Optional[int] = None) -> Any:
+        """
+        Run fn under the shared retry policy and the (endpoint, account) circuit breaker.
+        Raises CircuitOpenError immediately while the breaker is open.
+        """
+        return self.retry_policy.call(
+            fn,
+            breaker=self.breakers.get(endpoint, account_id),
+            budget=self.retry_budget,
+            attempts=attempts,
+            sleep=self._stop.wait,
+        )
+
+    # ------------------ Rate limiting ------------------
+    def _throttle(self, lane: str, private_client: Optional[HTTP] = None) -> float:
+        """Wait for a token: public bucket by default, the client's API-key bucket if given."""
+        if private_client is None:
+            bucket = PUBLIC_BUCKET
+        else:
+            bucket = RateLimiter.private_key(getattr(private_client, "api_key", None))
+        return self.rate_limiter.acquire(bucket, lane=lane)
+
+    # ------------------ Kline parsing ------------------
+    def _parse_klines(self, raw_klines: Any) -> KlineColumns:
+        """Columns of a kline payload, oldest first; the time spent shows as the kline_parse phase."""
+        with self.health.phase("kline_parse"):
+            try:
+                return parse_klines(raw_klines)
+            except Exception as e:
+                self.log(f"_parse_klines error: {e}")
+                return KlineColumns()
 
     # ------------------ Price parsing ------------------
     def _parse_price(self, raw: Any) -> Optional[float]:
@@ -545,15 +883,130 @@ class BotController:
             return None
 
     # ------------------ Scoring (improved) ------------------
-    def score_symbol(self, client: HTTP, symbol: str) -> Tuple[int, Dict[str, Any]]:
-        diagnostics: Dict[str, Any] = {}
+    def score_symbol(self, client: HTTP, symbol: str, account_id: Optional[str] = None) -> Tuple[int, Dict[str, Any]]:
         try:
-            raw_klines = self._retry(lambda: self.safe_get_klines(client, symbol, interval=TIMEFRAME, limit=300))
-            self._capture_preview({}, raw_klines, label="klines")
+            raw_klines = self._fetch_scoring_klines(client, symbol, account_id)
         except Exception as e:
             return 0, {"error": f"klines_fetch_failed: {e}"}
+        return self._score_klines(raw_klines)
+
+    def score_symbols(self, client: HTTP, symbols: List[str],
+                      account_id: Optional[str] = None) -> List[Tuple[str, int, Dict[str, Any]]]:
+        """
+        Fetch klines for every symbol, then score them all in one array pass.
+        Returns [(symbol, score, diagnostics)] ranked best first; same scores as score_symbol.
+        """
+        series, failed = self._fetch_series(client, symbols, account_id)
+        return self._rank_series(series) + failed
+
+    def _fetch_series(self, client: HTTP, symbols: List[str], account_id: Optional[str] = None,
+                      until: Optional[int] = None):
+        """Scoring series per symbol; with `until`, only the bars opened at or before it."""
+        series: Dict[str, Tuple[List[float], List[float], List[float], List[float]]] = {}
+        failed: List[Tuple[str, int, Dict[str, Any]]] = []
+        for symbol in symbols:
+            try:
+                raw_klines = self._fetch_scoring_klines(client, symbol, account_id)
+            except Exception as e:
+                failed.append((symbol, 0, {"error": f"klines_fetch_failed: {e}"}))
+                continue
+            series[symbol] = self._scoring_series(raw_klines, until)
+        return series, failed
+
+    # ------------------ signals (once per candle, shared by accounts) ------------------
+    def current_signals(self, client: HTTP, account_id: Optional[str] = None) -> SignalSet:
+        """This candle's signals; the first account to ask builds them with its client."""
+        def build(candle_ts: int) -> SignalSet:
+            with self.health.phase("signals"):
+                series, failed = self._fetch_series(client, self._scoring_universe(), account_id, until=candle_ts)
+                self.health.record_failed(len(failed))
+                return self._build_signals(candle_ts, series, self._rank_series(series) + failed)
+        return self.signal_bus.get(build)
+
+    def _scoring_universe(self) -> List[str]:
+        """ALLOWED_COINS, or the part of it kept while overloaded cycles shed scoring work."""
+        latest = self.signal_bus.latest()
+        last_scores = {s.symbol: s.score for s in latest.ranked} if latest else None
+        picked, _ = self.health.pick_symbols(ALLOWED_COINS, last_scores)
+        return picked
+
+    def _build_signals(self, candle_ts: int, series: Dict[str, Any],
+                       ranked: List[Tuple[str, int, Dict[str, Any]]]) -> SignalSet:
+        min_score = SCORE_SETTINGS.get("min_entry_score", 3)
+        out: List[Signal] = []
+        for symbol, score, diag in ranked:
+            entry = reason = None
+            if score >= min_score and symbol in series:
+                cols = KlineColumns(None, *series[symbol])
+                entry, reason = self._entry_signal(diag.get("current_price"), cols.close, cols.low, cols.ohlc)
+            out.append(Signal(symbol, score, diag, entry=entry, reason=reason))
+        return SignalSet(candle_ts, out)
+
+    def _scoring_series(self, raw_klines: Any, until: Optional[int] = None
+                        ) -> Tuple[Sequence[float], Sequence[float], Sequence[float], Sequence[float]]:
+        cols = self._parse_klines(raw_klines)
+        return (cols if until is None else cols.until(until)).series()
+
+    def _rank_series(self, series: Dict[str, Any]) -> List[Tuple[str, int, Dict[str, Any]]]:
+        # numpy is only needed once the bot scans, not to import this module
+        from batch_scoring import score_universe
+        return score_universe(series, SCORE_SETTINGS, calc_fib_levels)
+
+    def _fetch_scoring_klines(self, client: HTTP, symbol: str, account_id: Optional[str] = None) -> KlineColumns:
+        full = TRADE_SETTINGS["kline_limit"]
+        limit = self._kline_fetch_limit(symbol, full)
+        raw_klines = self._retry(lambda: self.safe_get_klines(client, symbol, interval=TIMEFRAME, limit=limit),
+                                 endpoint="klines", account_id=account_id)
+        self._capture_preview({}, raw_klines, label="klines")
+        cols = self._record_candles(symbol, raw_klines)
+        if limit < full:
+            stored = self._stored_klines(symbol, full)
+            if stored is None:
+                # the gap fetch didn't line up with what is stored; take the full window
+                raw_klines = self._retry(lambda: self.safe_get_klines(client, symbol, interval=TIMEFRAME, limit=full),
+                                         endpoint="klines", account_id=account_id)
+                cols = self._record_candles(symbol, raw_klines)
+            else:
+                cols = self._parse_klines(stored)
+        return cols
+
+    def _record_candles(self, symbol: str, raw_klines: Any) -> KlineColumns:
+        """Parse a kline payload once: into the candle store, and returned for scoring."""
+        cols = self._parse_klines(raw_klines)
+        try:
+            self.candles.ingest(symbol, cols.rows())
+        except Exception as e:
+            self.log(f"candle store ingest error {symbol}: {e}")
+        return cols
+
+    def _kline_fetch_limit(self, symbol: str, limit: int) -> int:
+        """Bars to request for symbol: only the gap when the store already has a full window."""
+        try:
+            return self.candles.fetch_limit(symbol, limit, time.time() * 1000.0)
+        except Exception as e:
+            self.log(f"candle store read error {symbol}: {e}")
+            return limit
+
+    def _stored_klines(self, symbol: str, limit: int) -> Optional[List[List[float]]]:
+        """The newest `limit` base bars from the store (oldest first), or None if there is a hole."""
+        if not self.candles.contiguous(symbol, limit):
+            return None
+        return self.candles.klines(symbol, TIMEFRAME, limit)
+
+    def get_candles(self, symbol: str, interval: Any, limit: int = 200, include_partial: bool = False) -> List[List[float]]:
+        """
+        Klines for any aggregated timeframe from the local store (no exchange call),
+        as [start_ms, open, high, low, close, volume] rows, oldest first. Returns
+        fewer than `limit` rows until enough history has been seen.
+        """
+        if interval_minutes(interval) is None:
+            return []
+        return self.candles.klines(symbol, interval, limit, include_partial=include_partial)
 
-        closes, highs, lows, ohlc = self._normalize_klines_payload(raw_klines)
+    def _score_klines(self, raw_klines: Any) -> Tuple[int, Dict[str, Any]]:
+        diagnostics: Dict[str, Any] = {}
+        cols = self._parse_klines(raw_klines)
+        closes, highs, lows, ohlc = cols.close, cols.high, cols.low, cols.ohlc
         if not closes:
             return 0, {"error": "no_closes"}
 
@@ -648,117 +1101,125 @@ class BotController:
             "fib_levels": fib,
         }
         
-    # ------------------ Order placement with validation (Bybit Unified) ------------------
-def _place_market_order(
-    self,
-    client: HTTP,
-    symbol: str,
-    side: str,
-    qty: float,
-    price_hint: Optional[float] = None,
-) -> Dict[str, Any]:
-    """
-    Place a market order on Bybit Unified Trading with proper validation.
-
-    Handles:
-        - Linear, inverse, and spot markets
-        - Dry-run simulation
-        - Error normalization
-        - Automatic method selection
-        - Logging useful info
-
-    Returns:
-        Dict with either order result or {"error": msg}.
-    """
-    now = now_iso()
+    # ------------------ Instrument metadata ------------------
+    def _ensure_instruments(self, client: HTTP) -> bool:
+        """Load/refresh the cached instrument table through this client (public endpoint)."""
+        def fetch(category: str, cursor: Optional[str]) -> Any:
+            params: Dict[str, Any] = {"category": category}
+            if category != "spot":
+                params["limit"] = 1000
+            if cursor:
+                params["cursor"] = cursor
+            def call() -> Any:
+                self._throttle("market")
+                return self._try_methods(client, ["get_instruments_info"], **params)
+            return self._retry(call, endpoint="instruments")
 
-    # ---------------- Dry-run mode ----------------
-    if TRADE_SETTINGS.get("dry_run", False):
-        return {
-            "simulated": False,
-            "symbol": symbol,
-            "side": side,
-            "qty": qty,
-            "executed_price": price_hint,
-            "time": now,
-        }
+        try:
+            return self.instruments.ensure_loaded(fetch)
+        except Exception as e:
+            self.log(f"_ensure_instruments error: {e}")
+            return False
 
-    last_exc = None
+    def _instrument(self, client: HTTP, symbol: str) -> Optional[InstrumentSpec]:
+        self._ensure_instruments(client)
+        return self.instruments.get(symbol)
 
-    # ---------------- Determine order category ----------------
-    market_info = getattr(client, "get_market_info", lambda s: {"category": "linear"})(symbol)
-    category = market_info.get("category", "linear")  # fallback to linear if unknown
+    # ------------------ Order placement with validation (Bybit Unified) ------------------
+    def _place_market_order(
+        self,
+        client: HTTP,
+        symbol: str,
+        side: str,
+        qty: float,
+        price_hint: Optional[float] = None,
+        account_id: Optional[str] = None,
+        trace: Optional[LatencyTrace] = None,
+    ) -> Dict[str, Any]:
+        """
+        Place a market order on Bybit Unified Trading with proper validation.
 
-    # ---------------- Build parameters based on category ----------------
-    params_list = []
+        Handles:
+            - Spot, linear and inverse markets (category from the instrument cache)
+            - Qty rounding to the lot step and min qty / min notional checks
+            - Paper fills for dry-run / paper accounts (paper.PaperBroker)
+            - Error normalization
 
-    if category == "spot":
-        # Spot: quoteOrderQty can be used if qty in currency
-        params_list.append({
-            "symbol": symbol,
-            "side": side,
-            "type": "market",
-            "qty": qty,
-        })
-    else:
-        # Futures: linear or inverse
-        params_list.append({
-            "symbol": symbol,
-            "side": side,
-            "orderType": "Market",
-            "qty": qty,
-            "category": category,
-        })
-
-    # ---------------- Try the available PyBit methods ----------------    
-def try_pybit_methods(clients, params_list):
-    candidate_methods = [
-        "place_active_order",
-        "create_order",
-        "place_order",
-        "order"
-    ]
-
-    for client in clients:
-        for name in candidate_methods:
+        Returns:
+            Dict with either order result or {"error": msg}.
+        """
+        # ---------------- Paper trading (dry run) ----------------
+        if self._trades_on_paper(account_id):
+            return self.paper.market_order(account_id, symbol, side, qty, price_hint, trace=trace)
+
+        # ---------------- Resolve instrument filters ----------------
+        spec = self._instrument(client, symbol)
+        params, error = self._order_params(spec, symbol, side, qty, price_hint)
+        if error:
+            return error
+
+        lane = "exit" if side.lower() == "sell" else "order"
+        return self._submit_order(client, params, account_id=account_id, lane=lane, trace=trace)
+
+    @staticmethod
+    def _order_params(spec: Optional[InstrumentSpec], symbol: str, side: str, qty: float,
+                      price_hint: Optional[float]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """(params, None) for a valid order, or ({}, error_dict)."""
+        if spec is None:
+            return {}, {"error": f"unknown_instrument: {symbol}"}
+        reject = spec.check_order(qty, price_hint)
+        if reject:
+            return {}, {"error": reject, "symbol": symbol, "side": side, "qty": qty}
+        return spec.order_params(side, qty), None
+
+    @staticmethod
+    def _order_result(resp: Any, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Normalize an order response into {"result": ...} or {"error": ...}."""
+        if isinstance(resp, dict):
+            for rc in ("ret_code", "retCode", "error_code", "err_code"):
+                if rc in resp and resp.get(rc) not in (0, None, "0"):
+                    msg = resp.get("retMsg") or resp.get("ret_msg") or str(resp)
+                    return {"error": msg, "method": method, "params": params}
+            return {"result": resp, "method": method, "params": params}
+        return {"result": str(resp), "method": method, "params": params}
+
+    def _submit_order(self, client: HTTP, params: Dict[str, Any], account_id: Optional[str] = None,
+                      lane: str = "order", trace: Optional[LatencyTrace] = None) -> Dict[str, Any]:
+        last_exc: Optional[Exception] = None
+        for name in ("place_order", "place_active_order", "create_order"):
             meth = getattr(client, name, None)
             if not callable(meth):
                 continue
 
-            for params in params_list:
-                try:
-                    resp = meth(**params)
-                    print(f"{name} succeeded with params {params}: {resp}")
-                except Exception as e:
-                    print(f"{name} failed with params {params}: {e}")
+            def send(meth=meth):
+                if trace is not None:
+                    trace.mark("submit")  # after our own throttling: that wait is part of signal -> submit
+                return meth(**params)
 
-                # ---------------- Normalize response ----------------
-                if isinstance(resp, dict):
-                    for rc in ("ret_code", "retCode", "error_code", "err_code"):
-                        if rc in resp and resp.get(rc) not in (0, None, "0"):
-                            return {"error": resp.get("ret_msg", str(resp)), "method": name, "params": params}
-
-                    return {"result": resp, "method": name, "params": params}
+            try:
+                self._throttle(lane, private_client=client)
+                # market orders are not idempotent: breaker only, never retried
+                resp = self._retry(send, endpoint="order", account_id=account_id, attempts=1)
+                if trace is not None:
+                    trace.mark("ack")
+            except CircuitOpenError as e:
+                return {"error": f"order endpoint unavailable: {e}", "params": params}
+            except Exception as e:
+                last_exc = e
+                self.log(f"{name} failed with params {params}: {e}")
+                continue
 
-                else:
-                    return {"result": str(resp), "method": name, "params": params}
+            return self._order_result(resp, name, params)
 
-    # ---------------- Failed all methods ----------------
-    if last_exc:
-        return {"error": str(last_exc)}
-    return {"error": "order_failed_unknown"}
+        # ---------------- Failed all methods ----------------
+        if last_exc:
+            return {"error": str(last_exc), "params": params}
+        return {"error": "order_failed_unknown", "params": params}
 
     # ------------------ High-level attempt to open trade ------------------
     def attempt_trade_for_account(self, acct: Dict[str, Any]):
         try:
-            if not acct.get("monitoring"):
-                return
-            if acct.get("position") == "open" or acct.get("open_trade_id"):
-               return
-            
-            # Check Daily Limit
-            if self._check_daily_limit():
-                self.log(f"Daily trade limit ({self.MAX_TRADES_DAILY}) reached. Skipping trade for {acct.get('name')}.")
+            if not self._can_open(acct):
                 return
 
             client = self._get_client(acct)
@@ -767,6 +1228,9 @@ def try_pybit_methods(clients, params_list):
                 acct.setdefault("last_validation_error", "missing_client")
                 return
 
+            # warm the instrument table before scoring so orders don't pay for it
+            self._ensure_instruments(client)
+
             ok, bal, err = self.validate_account(acct)
             acct["validated"] = ok
             acct["balance"] = bal
@@ -774,228 +1238,392 @@ def try_pybit_methods(clients, params_list):
             if not ok or not bal or float(bal) <= 0.0:
                 return
 
-            # allocation percentage (support percent expressed as 100)
-            alloc_pct = float(TRADE_SETTINGS.get("trade_allocation_pct", 100))
-            if alloc_pct > 1.0:
-                alloc_pct = alloc_pct / 100.0
-            usd_alloc = float(bal) * alloc_pct
-            if usd_alloc < TRADE_SETTINGS.get("min_trade_amount", 5.0):
-                self.log(f"Computed allocation ${usd_alloc:.2f} below min; skipping")
+            usd_alloc = self._allocation(bal)
+            if usd_alloc is None:
                 return
 
-            # score all coins
-            candidates: List[Tuple[str, int, Dict[str, Any]]] = []
-            for symbol in ALLOWED_COINS:
-                try:
-                    sc, diag = self.score_symbol(client, symbol)
-                    if sc >= 3:
-                        candidates.append((symbol, sc, diag))
-                except Exception as e:
-                    self.log(f"score_symbol error {symbol}: {e}")
-                    continue
-
-            if not candidates:
-                self.log("No candidates found this cycle.")
+            # scores and entry plans are shared per candle; only sizing is per account
+            signals = self.current_signals(client, account_id=acct.get("id"))
+            best = self._pick_candidate([
+                (sig.symbol, sig.score, sig.diagnostics)
+                for sig in signals.candidates(SCORE_SETTINGS.get("min_entry_score", 3))
+            ])
+            if best is None:
                 return
+            best_symbol, best_score, best_diag = best
 
-            candidates.sort(key=lambda x: x[1], reverse=True)
-            best_symbol, best_score, best_diag = candidates[0]
-            self.log(f"Top candidate: {best_symbol} score={best_score}")
-
-            price = best_diag.get("current_price")
-            if not price or price <= 0:
-                try:
-                    tick = self.safe_get_ticker(client, best_symbol)
-                    price = self._parse_price(tick) or price
-                except Exception:
-                    pass
+            # signals are a closed candle old; orders are priced off the ticker
+            price = self._entry_price(client, best_symbol, acct.get("id"), best_diag.get("current_price"))
             if not price or price <= 0:
                 self.log(f"Invalid price for {best_symbol}; skipping")
                 return
 
-            # refresh klines to produce arrays for should_enter_trade
-            try:
-                raw_klines = self._retry(lambda: self.safe_get_klines(client, best_symbol, interval=TIMEFRAME, limit=300))
-            except Exception as e:
-                self.log(f"Failed to fetch klines for entry planning {best_symbol}: {e}")
+            entry = self._entry_from_signal(signals.get(best_symbol), usd_alloc, price)
+            if entry is None:
                 return
 
-            closes, highs, lows, ohlc = self._normalize_klines_payload(raw_klines)
-            should_enter, plan = self.should_enter_trade(closes, ohlc)
-            if not should_enter:
-                self.log(f"should_enter_trade failed for {best_symbol}: {plan.get('reason') if isinstance(plan, dict) else plan}")
+            # place order
+            trace = LatencyTrace(signals.computed_ns, signals.computed_at)
+            resp = self._place_market_order(client, best_symbol, "Buy", entry["qty"], price_hint=price, account_id=acct.get("id"),
+                                            trace=trace)
+            if isinstance(resp, dict) and resp.get("error"):
+                self.log(f"Order error for {best_symbol}: {resp.get('error')}; skipping.")
                 return
 
-            fib_levels = plan.get("fib_levels", {})
-            # compute swing_low (fib 1.0) if available else fallback
-            swing_low = None
-            if fib_levels and "1.0" in fib_levels:
-                swing_low = float(fib_levels["1.0"])
-            elif lows:
-                swing_low = min(lows[-SCORE_SETTINGS.get("fib_lookback", 50):])
-            else:
-                swing_low = price
-
-            # stop loss = 1% below swing low (ensures SL < entry)
-            sl_price = round(float(swing_low) * (1.0 - (RISK_RULES.get("stop_loss_pct", 1.0) / 100.0)), 8)
-            # take profit: pick first available fib extension in order
-            tp_price = None
-            if fib_levels:
-                for k in ("1.272_ext", "1.618_ext", "2.618_ext"):
-                    if k in fib_levels and fib_levels[k] > price:
-                        tp_price = float(fib_levels[k])
-                        break
-            if not tp_price:
-                # fallback 4% extension if fib not available
-                tp_price = round(price * 1.04, 8)
+            self._open_position(acct, best_symbol, best_score, entry, resp, price, trace=trace)
 
-            notional = usd_alloc
-            if notional < TRADE_SETTINGS.get("min_trade_amount", 5.0):
-                self.log(f"Notional ${notional:.2f} below min; skipping")
-                return
+        except Exception as e:
+            self.log(f"attempt_trade_for_account exception: {e}")
 
-            qty = round(notional / price, 6)
-            if qty <= 0:
-                self.log(f"Computed qty <= 0 for {best_symbol}; skip")
-                return
+    # ------------------ entry decision helpers (no I/O) ------------------
+    def _can_open(self, acct: Dict[str, Any]) -> bool:
+        if not acct.get("monitoring"):
+            return False
+        if acct.get("position") == "open" or acct.get("open_trade_id"):
+            return False
+        # Check Daily Limit (a real-money guard: paper trades neither count nor wait for it)
+        if not self._is_paper(acct) and self._check_daily_limit():
+            self.log(f"Daily trade limit ({self.MAX_TRADES_DAILY}) reached. Skipping trade for {acct.get('name')}.")
+            return False
+        return True
 
-            # place order
-            resp = self._place_market_order(client, best_symbol, "Buy", qty, price_hint=price)
-            if isinstance(resp, dict) and resp.get("error"):
-                self.log(f"Order error for {best_symbol}: {resp.get('error')}; skipping.")
-                return
-            simulated = bool(resp.get("simulated")) if isinstance(resp, dict) else False
+    def _allocation(self, bal: Any) -> Optional[float]:
+        # allocation percentage (support percent expressed as 100)
+        alloc_pct = float(TRADE_SETTINGS.get("trade_allocation_pct", 100))
+        if alloc_pct > 1.0:
+            alloc_pct = alloc_pct / 100.0
+        usd_alloc = float(bal) * alloc_pct
+        if usd_alloc < TRADE_SETTINGS.get("min_trade_amount", 5.0):
+            self.log(f"Computed allocation ${usd_alloc:.2f} below min; skipping")
+            return None
+        return usd_alloc
 
-            # extract entry price from response if present
-            entry_price = None
-            if isinstance(resp, dict):
-                for k in ("executed_price", "avgPrice", "price", "last_price", "lastPrice"):
-                    if k in resp and resp[k] is not None:
-                        try:
-                            entry_price = float(resp[k])
-                            break
-                        except Exception:
-                            continue
-            if entry_price is None:
-                entry_price = float(price)
+    def _pick_candidate(self, candidates: List[Tuple[str, int, Dict[str, Any]]]) -> Optional[Tuple[str, int, Dict[str, Any]]]:
+        if not candidates:
+            self.log("No candidates found this cycle.")
+            return None
+        candidates.sort(key=lambda x: x[1], reverse=True)
+        best = candidates[0]
+        self.log(f"Top candidate: {best[0]} score={best[1]}")
+        return best
+
+    def _entry_price(self, client: HTTP, symbol: str, account_id: Optional[str],
+                     fallback: Optional[float]) -> Optional[float]:
+        """Live ticker price of symbol; the signal's close if the ticker failed."""
+        try:
+            tick = self._retry(lambda: self.safe_get_ticker(client, symbol), endpoint="ticker", account_id=account_id)
+        except Exception as e:
+            self.log(f"safe_get_ticker error: {e}")
+            return fallback
+        return self._parse_price(tick) or fallback
+
+    def _entry_from_signal(self, signal: Signal, notional: float,
+                           price: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Account-specific part of an entry: size the shared plan for this notional at price."""
+        if signal.entry is None:
+            self.log(f"should_enter_trade failed for {signal.symbol}: {signal.reason}")
+            return None
+        qty = self._size_order(signal.symbol, notional, price or signal.price)
+        if qty is None:
+            return None
+        return dict(signal.entry, qty=qty)
+
+    def _entry_signal(self, price: float, closes: List[float], lows: List[float],
+                      ohlc: List[Dict[str, float]]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Entry rules and SL/TP at price (no sizing): ({sl_price, tp_price, plan}, None) or (None, reason)."""
+        should_enter, plan = self.should_enter_trade(closes, ohlc)
+        if not should_enter:
+            return None, plan.get("reason") if isinstance(plan, dict) else plan
+
+        fib_levels = plan.get("fib_levels", {})
+        # compute swing_low (fib 1.0) if available else fallback
+        swing_low = None
+        if fib_levels and "1.0" in fib_levels:
+            swing_low = float(fib_levels["1.0"])
+        elif lows:
+            swing_low = min(lows[-SCORE_SETTINGS.get("fib_lookback", 50):])
+        else:
+            swing_low = price
+
+        # stop loss = 1% below swing low (ensures SL < entry)
+        sl_price = round(float(swing_low) * (1.0 - (RISK_RULES.get("stop_loss_pct", 1.0) / 100.0)), 8)
+        # take profit: pick first available fib extension in order
+        tp_price = None
+        if fib_levels:
+            for k in ("1.272_ext", "1.618_ext", "2.618_ext"):
+                if k in fib_levels and fib_levels[k] > price:
+                    tp_price = float(fib_levels[k])
+                    break
+        if not tp_price:
+            # fallback 4% extension if fib not available
+            tp_price = round(price * 1.04, 8)
+        return {"sl_price": sl_price, "tp_price": tp_price, "plan": plan}, None
+
+    def _size_order(self, symbol: str, notional: float, price: float) -> Optional[float]:
+        if notional < TRADE_SETTINGS.get("min_trade_amount", 5.0):
+            self.log(f"Notional ${notional:.2f} below min; skipping")
+            return None
 
-            ts = now_ts()
-            tid = self._record_trade_entry(acct, best_symbol, qty, entry_price, ts, simulated, sl_price, tp_price)
+        spec = self.instruments.get(symbol)
+        if spec is not None:
+            qty = spec.round_qty(notional / price)
+            reject = spec.check_order(qty, price)
+            if reject:
+                self.log(f"Order for {symbol} would be rejected ({reject}); skipping")
+                return None
+        elif TRADE_SETTINGS.get("dry_run", False):
+            qty = round(notional / price, 6)
+        else:
+            self.log(f"No instrument metadata for {symbol}; skipping")
+            return None
+        if qty <= 0:
+            self.log(f"Computed qty <= 0 for {symbol}; skip")
+            return None
+        return qty
+
+    @staticmethod
+    def _fill_price(resp: Any, fallback: float) -> float:
+        price = BotController._reported_fill_price(resp)
+        return float(fallback) if price is None else price
+
+    @staticmethod
+    def _reported_fill_price(resp: Any) -> Optional[float]:
+        """Execution price carried by an order response, None if it has none."""
+        if isinstance(resp, dict):
+            for k in ("executed_price", "avgPrice", "price", "last_price", "lastPrice"):
+                if k in resp and resp[k] is not None:
+                    try:
+                        return float(resp[k])
+                    except Exception:
+                        continue
+        return None
 
-            # Increment daily trade count
+    def _held_qty(self, symbol: str, qty: float, resp: Any) -> float:
+        """Base quantity the buy left in the account: what the exit sells."""
+        if isinstance(resp, dict) and resp.get("held_qty") is not None:
+            return float(resp["held_qty"])  # paper fills report it
+        spec = self.instruments.get(symbol)
+        if spec is None:
+            return qty
+        return spec.held_after_buy(qty, TRADE_SETTINGS.get("spot_fee_rate", 0.0))
+
+    def _trace_fill(self, trace: Optional[LatencyTrace], resp: Any) -> Optional[Dict[str, Any]]:
+        if trace is None:
+            return None
+        trace.filled(confirmed=self._reported_fill_price(resp) is not None)
+        return trace.to_dict()
+
+    def _open_position(self, acct: Dict[str, Any], symbol: str, score: int, entry: Dict[str, Any], resp: Any, price: float,
+                       trace: Optional[LatencyTrace] = None):
+        latency = self._trace_fill(trace, resp)
+        simulated = bool(resp.get("simulated")) if isinstance(resp, dict) else False
+        qty = self._held_qty(symbol, entry["qty"], resp)
+        sl_price = entry["sl_price"]
+        tp_price = entry["tp_price"]
+
+        # extract entry price from response if present
+        entry_price = self._fill_price(resp, price)
+
+        ts = now_ts()
+        tid = self._record_trade_entry(acct, symbol, qty, entry_price, ts, simulated, sl_price, tp_price, latency=latency)
+        self._mirror_paper_balance(acct, resp)
+
+        # Increment daily trade count
+        if not simulated:
             self.trades_today += 1
             self.log(f"Trade count for today: {self.trades_today}/{self.MAX_TRADES_DAILY}")
 
-            acct["position"] = "open"
-            acct["current_symbol"] = best_symbol
-            acct["entry_price"] = entry_price
-            acct["entry_qty"] = qty
-            acct["entry_time"] = ts
-            acct["open_trade_id"] = tid
-            acct["buy_price"] = entry_price
-            acct["stop_loss_price"] = sl_price
-            acct["take_profit_price"] = tp_price
-            acct["score"] = best_score
-
-            self.log(f"Opened trade {tid} {best_symbol} qty={qty} entry={entry_price} SL={sl_price} TP={tp_price} simulated={simulated}")
+        acct["position"] = "open"
+        acct["current_symbol"] = symbol
+        acct["entry_price"] = entry_price
+        acct["entry_qty"] = qty
+        acct["entry_time"] = ts
+        acct["open_trade_id"] = tid
+        acct["buy_price"] = entry_price
+        acct["stop_loss_price"] = sl_price
+        acct["take_profit_price"] = tp_price
+        acct["score"] = score
 
-        except Exception as e:
-            self.log(f"attempt_trade_for_account exception: {e}")
+        self.log(f"Opened trade {tid} {symbol} qty={qty} entry={entry_price} SL={sl_price} TP={tp_price} simulated={simulated}")
 
     # ------------------ position monitor & exit ------------------
     def _check_open_position(self, acct: Dict[str, Any]):
+        self._check_open_positions([acct])
+
+    def _check_open_positions(self, accounts: List[Dict[str, Any]]):
+        """
+        Exit checks for every open position in one pass: one ticker per symbol,
+        then all triggered exits submitted concurrently, deepest breach first.
+        """
         try:
-            trade_id = acct.get("open_trade_id")
-            if not acct.get("position") == "open" or not trade_id:
+            watch: List[Tuple[Dict[str, Any], HTTP, str]] = []
+            for acct in accounts:
+                if not acct.get("position") == "open" or not acct.get("open_trade_id"):
+                    continue
+                client = self._get_client(acct)
+                if not client:
+                    self.log(f"No client for checking position {acct.get('name')}")
+                    continue
+                symbol = acct.get("current_symbol")
+                if symbol:
+                    watch.append((acct, client, symbol))
+            if not watch:
                 return
 
-            client = self._get_client(acct)
-            if not client:
-                self.log(f"No client for checking position {acct.get('name')}")
-                return
+            pool = self._exit_executor()
+            by_symbol: Dict[str, Tuple[Dict[str, Any], HTTP]] = {}
+            for acct, client, symbol in watch:
+                by_symbol.setdefault(symbol, (acct, client))
+            prices = dict(zip(by_symbol, pool.map(lambda sym: self._exit_price(sym, *by_symbol[sym]), by_symbol)))
 
-            symbol = acct.get("current_symbol")
-            if not symbol:
-                return
-
-            entry_price = acct.get("entry_price")
-            qty = acct.get("entry_qty")
-            entry_ts = acct.get("entry_time") or now_ts()
+            exits = []
+            for acct, client, symbol in watch:
+                price, observed, observed_wall = prices.get(symbol) or (None, None, None)
+                if price is None:
+                    continue
+                label = self._exit_label(acct, price)
+                if label:
+                    exits.append({"acct": acct, "client": client, "symbol": symbol, "price": price, "label": label,
+                                  "trace": LatencyTrace(observed, observed_wall),
+                                  "breach": self._breach_depth(acct, price, label)})
+            self._submit_exits(pool, exits)
+        except Exception as e:
+            self.log(f"_check_open_position error: {e}")
 
-            tick = None
-            try:
-                tick = self.safe_get_ticker(client, symbol)
-                self._capture_preview(acct, tick, label="ticker_check")
-            except Exception as e:
-                self.log(f"safe_get_ticker error: {e}")
-                return
+    def _exit_price(self, symbol: str, acct: Dict[str, Any], client: HTTP) -> Tuple[Optional[float], int, float]:
+        """(price, perf_counter_ns and wall time it was observed); price None if the ticker failed."""
+        try:
+            tick = self._retry(lambda: self.safe_get_ticker(client, symbol, lane="exit"),
+                               endpoint="ticker", account_id=acct.get("id"))
+            self._capture_preview(acct, tick, label="ticker_check")
+        except Exception as e:
+            self.log(f"safe_get_ticker error: {e}")
+            return None, time.perf_counter_ns(), time.time()
+        price = self._parse_price(tick)
+        if price is None:
+            self.log(f"Could not parse ticker price for {symbol}")
+        return price, time.perf_counter_ns(), time.time()
+
+    @staticmethod
+    def _breach_depth(acct: Dict[str, Any], price: float, label: str) -> float:
+        """How far past its threshold the position is, as a fraction (0 for time exits)."""
+        try:
+            if label == "stop_loss":
+                sl = float(acct.get("stop_loss_price"))
+                return (sl - price) / sl if sl else 0.0
+            if label == "fib_take_profit":
+                tp = float(acct.get("take_profit_price"))
+                return (price - tp) / tp if tp else 0.0
+        except (TypeError, ValueError):
+            pass
+        return 0.0
 
-            current_price = self._parse_price(tick)
-            if current_price is None:
-                self.log(f"Could not parse ticker price for {symbol}")
-                return
+    def _exit_executor(self) -> ThreadPoolExecutor:
+        if self._exit_pool is None:
+            self._exit_pool = ThreadPoolExecutor(max_workers=max(1, TRADE_SETTINGS.get("exit_concurrency", 16)),
+                                                 thread_name_prefix="exit")
+        return self._exit_pool
 
-            elapsed = max(0, now_ts() - int(entry_ts))
+    def _submit_exits(self, pool: ThreadPoolExecutor, exits: List[Dict[str, Any]]):
+        if not exits:
+            return
+        # queued deepest breach first, so those orders leave first when exits outnumber workers
+        exits.sort(key=lambda e: e["breach"], reverse=True)
 
-            sl_price = acct.get("stop_loss_price")
-            tp_price = acct.get("take_profit_price")
+        def send(item: Dict[str, Any]) -> Any:
+            return self._place_market_order(item["client"], item["symbol"], "Sell", item["acct"].get("entry_qty"),
+                                            price_hint=item["price"], account_id=item["acct"].get("id"),
+                                            trace=item["trace"])
 
-            label = None
-            should_close = False
+        futures = {pool.submit(send, item): item for item in exits}
+        for fut in as_completed(futures):
+            item = futures[fut]
+            try:
+                resp = fut.result()
+            except Exception as e:
+                resp = {"error": str(e)}
+            self._close_position(item["acct"], resp, item["price"], item["label"], exit_stats=self._exit_stats(item, resp))
 
-            # SL check (SL is below entry by design)
-            if sl_price is not None and current_price <= sl_price:
-                label = "stop_loss"
-                should_close = True
+    def _exit_stats(self, item: Dict[str, Any], resp: Any) -> Dict[str, Any]:
+        trace: LatencyTrace = item["trace"]
+        latency = self._trace_fill(trace, resp)
+        return {
+            "exit_breach_pct": round(item["breach"] * 100.0, 4),
+            "exit_submit_ms": trace.ms("signal", "submit"),
+            "exit_fill_ms": trace.ms("submit", "fill"),
+            "exit_latency": latency,
+        }
 
-            # TP (fib) check
-            if not should_close and tp_price is not None and current_price >= tp_price:
-                label = "fib_take_profit"
-                should_close = True
+    def _exit_label(self, acct: Dict[str, Any], current_price: float) -> Optional[str]:
+        """Exit reason for an open position at current_price, or None to keep holding."""
+        entry_ts = acct.get("entry_time") or now_ts()
+        elapsed = max(0, now_ts() - int(entry_ts))
 
-            # max hold time (30 minutes)
-            if not should_close and elapsed >= RISK_RULES.get("max_hold", 30 * 60):
-                label = "max_hold_expired"
-                should_close = True
+        sl_price = acct.get("stop_loss_price")
+        tp_price = acct.get("take_profit_price")
 
-            if should_close:
-                resp = self._place_market_order(client, symbol, "Sell", qty, price_hint=current_price)
-                simulated = bool(resp.get("simulated")) if isinstance(resp, dict) else True
+        # SL check (SL is below entry by design)
+        if sl_price is not None and current_price <= sl_price:
+            return "stop_loss"
 
-                exit_price = None
-                if isinstance(resp, dict):
-                    for k in ("executed_price", "avgPrice", "price", "last_price", "lastPrice"):
-                        if k in resp and resp[k] is not None:
-                            try:
-                                exit_price = float(resp[k]); break
-                            except Exception:
-                                continue
-                if exit_price is None:
-                    exit_price = float(current_price)
+        # TP (fib) check
+        if tp_price is not None and current_price >= tp_price:
+            return "fib_take_profit"
 
-                exit_ts = now_ts()
-                try:
-                    profit_pct = ((float(exit_price) - float(entry_price)) / float(entry_price)) * 100.0
-                except Exception:
-                    profit_pct = None
+        # max hold time (30 minutes)
+        if elapsed >= RISK_RULES.get("max_hold", 30 * 60):
+            return "max_hold_expired"
+        return None
 
-                resp_summary = safe_json(resp) if isinstance(resp, (dict, list)) else str(resp)
-                self._finalize_trade(trade_id, exit_price, exit_ts, label, resp_summary, simulated)
+    def _close_position(self, acct: Dict[str, Any], resp: Any, current_price: float, label: str,
+                        exit_stats: Optional[Dict[str, Any]] = None):
+        trade_id = acct.get("open_trade_id")
+        if isinstance(resp, dict) and resp.get("error"):
+            # nothing was sold (breaker open, qty below minimum, unknown instrument, rejected):
+            # keep the position so the next cycle tries again
+            acct["exit_failures"] = int(acct.get("exit_failures") or 0) + 1
+            acct["last_exit_error"] = str(resp.get("error"))
+            self.health.record_exit_failed()
+            self.log(f"Exit {label} of trade {trade_id} for {acct.get('name')} failed: {resp.get('error')}; "
+                     f"position kept open (attempt {acct['exit_failures']})")
+            return
+        entry_price = acct.get("entry_price")
+        entry_ts = acct.get("entry_time") or now_ts()
+        simulated = bool(resp.get("simulated")) if isinstance(resp, dict) else True
 
-                acct["position"] = "closed"
-                acct.pop("entry_price", None)
-                acct.pop("entry_qty", None)
-                acct.pop("entry_time", None)
-                acct.pop("open_trade_id", None)
-                acct["current_symbol"] = None
-                acct["buy_price"] = None
-                acct.pop("stop_loss_price", None)
-                acct.pop("take_profit_price", None)
+        exit_price = self._fill_price(resp, current_price)
 
-                self.log(f"Closed trade {trade_id} for {acct.get('name')} label={label} exit_price={exit_price} profit_pct={profit_pct} elapsed={fmt_elapsed(exit_ts - entry_ts)} simulated={simulated}")
+        exit_ts = now_ts()
+        try:
+            profit_pct = ((float(exit_price) - float(entry_price)) / float(entry_price)) * 100.0
+        except Exception:
+            profit_pct = None
 
-        except Exception as e:
-            self.log(f"_check_open_position error: {e}")
+        resp_summary = safe_json(resp) if isinstance(resp, (dict, list)) else str(resp)
+        self._finalize_trade(trade_id, exit_price, exit_ts, label, resp_summary, simulated, extra=exit_stats)
+        self._mirror_paper_balance(acct, resp)
+
+        acct["position"] = "closed"
+        acct.pop("entry_price", None)
+        acct.pop("entry_qty", None)
+        acct.pop("entry_time", None)
+        acct.pop("open_trade_id", None)
+        acct["current_symbol"] = None
+        acct["buy_price"] = None
+        acct.pop("stop_loss_price", None)
+        acct.pop("take_profit_price", None)
+        acct.pop("exit_failures", None)
+        acct.pop("last_exit_error", None)
+
+        self.log(f"Closed trade {trade_id} for {acct.get('name')} label={label} exit_price={exit_price} profit_pct={profit_pct} elapsed={fmt_elapsed(exit_ts - entry_ts)} simulated={simulated}"
+                 + (f" submit_ms={exit_stats['exit_submit_ms']} fill_ms={exit_stats['exit_fill_ms']}" if exit_stats else ""))
+
+    @staticmethod
+    def _mirror_paper_balance(acct: Dict[str, Any], resp: Any):
+        # paper cash lives on the account record so it is persisted with it
+        if isinstance(resp, dict) and resp.get("simulated") and resp.get("paper_balance") is not None:
+            acct["paper_balance"] = resp["paper_balance"]
+            acct["balance"] = resp["paper_balance"]
 
     # ------------------ helpers: capture raw responses for debugging ------------------
     def _capture_preview(self, account: Dict[str, Any], resp: Any, label: str = "resp"):
@@ -1032,18 +1660,22 @@ def try_pybit_methods(clients, params_list):
             raise last_exc
         raise RuntimeError(f"No candidate methods succeeded: {candidate_names}")
 
-    def safe_get_ticker(self, client: HTTP, symbol: str) -> Any:
+    def safe_get_ticker(self, client: HTTP, symbol: str, lane: str = "market") -> Any:
         candidates = ["ticker_price", "get_ticker", "get_symbol_ticker", "latest_information_for_symbol", "tickers", "get_tickers", "get_ticker_price"]
+        self._throttle(lane)
         try:
             return self._try_methods(client, candidates, symbol)
         except Exception:
+            self._throttle(lane)
             return self._try_methods(client, candidates, params={"symbol": symbol})
 
-    def safe_get_klines(self, client: HTTP, symbol: str, interval: str = TIMEFRAME, limit: int = 200) -> Any:
+    def safe_get_klines(self, client: HTTP, symbol: str, interval: str = TIMEFRAME, limit: int = 200, lane: str = "scoring") -> Any:
         candidates = ["query_kline", "get_kline", "get_klines", "query_candles", "get_candlesticks", "kline"]
+        self._throttle(lane)
         try:
             return self._try_methods(client, candidates, symbol, interval, limit)
         except Exception:
+            self._throttle(lane)
             return self._try_methods(client, candidates, params={"symbol": symbol, "interval": interval, "limit": limit})
 
     # ------------------ account validation (attempts multiple methods) ------------------
@@ -1107,7 +1739,17 @@ def try_pybit_methods(clients, params_list):
         except Exception:
             return None
 
+    def _balance_from_response(self, resp: Any) -> Optional[float]:
+        payloads = [resp] if not isinstance(resp, dict) else ([resp.get("result")] if resp.get("result") else []) + ([resp.get("data")] if resp.get("data") else []) + [resp]
+        for payload in payloads:
+            bal = self._extract_balance_from_payload(payload)
+            if bal is not None:
+                return bal
+        return None
+
     def validate_account(self, account: Dict[str, Any]) -> Tuple[bool, Optional[float], str]:
+        if self._is_paper(account):
+            return self._paper_validation(account)
         client = self._get_client(account)
         if not client:
             return False, None, "missing_api_credentials"
@@ -1122,17 +1764,12 @@ def try_pybit_methods(clients, params_list):
         for methods, params in candidate_attempts:
             try:
                 resp = None
-                if params:
-                    resp = self._try_methods(client, methods, **params)
-                else:
-                    resp = self._try_methods(client, methods)
+                def call() -> Any:
+                    self._throttle("account", private_client=client)
+                    return self._try_methods(client, methods, **params)
+                resp = self._retry(call, endpoint="wallet", account_id=account.get("id"), attempts=1)
                 self._capture_preview(account, resp, label="balance")
-                payloads = [resp] if not isinstance(resp, dict) else ([resp.get("result")] if resp.get("result") else []) + ([resp.get("data")] if resp.get("data") else []) + [resp]
-                for payload in payloads:
-                    bal = self._extract_balance_from_payload(payload)
-                    if bal is not None:
-                        balance = bal
-                        break
+                balance = self._balance_from_response(resp)
                 if balance is not None:
                     break
             except Exception as e:
@@ -1146,32 +1783,30 @@ def try_pybit_methods(clients, params_list):
         return False, None, last_err or "unrecognized_balance_shape"
 
     # ------------------ trade record helpers ------------------
-    def _record_trade_entry(self, acct: Dict[str, Any], symbol: str, qty: float, entry_price: float, ts: int, simulated: bool, sl_price: Optional[float], tp_price: Optional[float]) -> str:
+    def _record_trade_entry(self, acct: Dict[str, Any], symbol: str, qty: float, entry_price: float, ts: int, simulated: bool, sl_price: Optional[float], tp_price: Optional[float],
+                            latency: Optional[Dict[str, Any]] = None) -> str:
         tid = str(uuid.uuid4())
-        rec = {
-            "id": tid,
-            "account_id": acct.get("id"),
-            "account_name": acct.get("name"),
-            "symbol": symbol,
-            "side": "Buy",
-            "qty": qty,
-            "entry_price": entry_price,
-            "entry_time": datetime.utcfromtimestamp(ts).isoformat(),
-            "open": True,
-            "simulated": bool(simulated),
-            "stop_loss_price": sl_price,
-            "take_profit_price": tp_price,
-        }
+        rec = TradeRecord(
+            id=tid,
+            account_id=acct.get("id"),
+            account_name=acct.get("name"),
+            symbol=symbol,
+            side="Buy",
+            qty=qty,
+            entry_price=entry_price,
+            entry_time=datetime.utcfromtimestamp(ts).isoformat(),
+            open=True,
+            simulated=bool(simulated),
+            stop_loss_price=sl_price,
+            take_profit_price=tp_price,
+            entry_latency=latency,
+        )
         self.add_trade(rec)
         return tid
 
-    def _finalize_trade(self, trade_id: str, exit_price: float, exit_ts: int, label: str, resp_summary: Optional[str], simulated: bool):
-        trades = self._read_trades()
-        entry = None
-        for t in trades:
-            if t.get("id") == trade_id:
-                entry = t
-                break
+    def _finalize_trade(self, trade_id: str, exit_price: float, exit_ts: int, label: str, resp_summary: Optional[str], simulated: bool,
+                        extra: Optional[Dict[str, Any]] = None):
+        entry = self._trade_for_update(trade_id)
         if not entry:
             self.add_trade({
                 "id": trade_id,
@@ -1188,6 +1823,7 @@ def try_pybit_methods(clients, params_list):
                 "label": label,
                 "simulated": bool(simulated),
                 "resp_summary": resp_summary,
+                **(extra or {}),
             })
             return
         entry_price = entry.get("entry_price")
@@ -1214,44 +1850,64 @@ def try_pybit_methods(clients, params_list):
             "resp_summary": resp_summary,
             "simulated": bool(simulated),
         }
+        if extra:
+            updates.update(extra)
         self.update_trade(trade_id, updates)
 
     # ------------------ main scan loop helpers ------------------
     def _scan_once(self):
+        # trades opened/closed this cycle are written once, with the accounts commit
+        with self.trade_batch():
+            self._scan_accounts()
+
+    def _scan_accounts(self):
         accounts = self.load_accounts()
-        updated = False
-        for acct in accounts:
-            acct.setdefault("id", str(uuid.uuid4()))
-            try:
-                ok, bal, err = self.validate_account(acct)
-                acct["validated"] = ok
-                acct["balance"] = bal
-                acct["last_validation_error"] = err
-            except Exception as e:
-                acct["validated"] = False
-                acct["balance"] = None
-                acct["last_validation_error"] = str(e)
+        if self.recorder is not None:
+            self.recorder.mark_cycle(accounts)
+        ids_assigned = any(not a.get("id") for a in accounts)
+        # exits first and all at once: in a dump every open position may trigger together
+        holding = {id(a) for a in accounts if a.get("position") == "open" and a.get("open_trade_id")}
+        with self.health.phase("exits"):
+            self._check_open_positions([a for a in accounts if id(a) in holding])
+        with self.health.phase("accounts"):  # includes the signal build of a new candle
+            for acct in accounts:
+                self._scan_account(acct, check_entry=id(acct) not in holding)
+        with self.health.phase("persist"):
+            # trades before accounts: an account never points at a trade that is not on disk
+            self.flush_trade_batch()
+            if ids_assigned:
+                # new ids must be persisted as a whole so they match next cycle
+                self.save_accounts(accounts)
+            else:
+                self.commit_accounts(accounts)
 
-            acct.setdefault("position", acct.get("position", "closed"))
-            acct.setdefault("monitoring", acct.get("monitoring", False))
-            acct.setdefault("current_symbol", acct.get("current_symbol"))
-            acct.setdefault("buy_price", acct.get("buy_price"))
+    def _scan_account(self, acct: Dict[str, Any], check_entry: bool):
+        acct.setdefault("id", str(uuid.uuid4()))
+        try:
+            ok, bal, err = self.validate_account(acct)
+            acct["validated"] = ok
+            acct["balance"] = bal
+            acct["last_validation_error"] = err
+        except Exception as e:
+            acct["validated"] = False
+            acct["balance"] = None
+            acct["last_validation_error"] = str(e)
 
-            try:
-                if acct.get("position") == "open" and acct.get("open_trade_id"):
-                    self._check_open_position(acct)
-                else:
-                    try:
-                        self.attempt_trade_for_account(acct)
-                    except Exception as e:
-                        self.log(f"attempt_trade_for_account raised: {e}")
-                acct["last_balance"] = acct.get("balance", acct.get("last_balance", 0.0))
-                acct["last_validation_error"] = acct.get("last_validation_error")
-            except Exception as e:
-                self.log(f"Account scan error for {acct.get('id')}: {e}")
-            updated = True
-        if updated:
-            self.save_accounts(accounts)
+        acct.setdefault("position", acct.get("position", "closed"))
+        acct.setdefault("monitoring", acct.get("monitoring", False))
+        acct.setdefault("current_symbol", acct.get("current_symbol"))
+        acct.setdefault("buy_price", acct.get("buy_price"))
+
+        try:
+            if check_entry:
+                try:
+                    self.attempt_trade_for_account(acct)
+                except Exception as e:
+                    self.log(f"attempt_trade_for_account raised: {e}")
+            acct["last_balance"] = acct.get("balance", acct.get("last_balance", 0.0))
+            acct["last_validation_error"] = acct.get("last_validation_error")
+        except Exception as e:
+            self.log(f"Account scan error for {acct.get('id')}: {e}")
 
     # ------------------ start / stop / run loop ------------------
     def start(self):
@@ -1259,6 +1915,7 @@ def try_pybit_methods(clients, params_list):
             return
         self._running = True
         self._stop.clear()
+        self.started_at = time.time()
         t = threading.Thread(target=self._run_loop, daemon=True)
         self._threads.append(t)
         t.start()
@@ -1271,28 +1928,43 @@ def try_pybit_methods(clients, params_list):
         for t in self._threads:
             if t.is_alive():
                 t.join(timeout=1)
+        self._flush_on_stop()
         self.log("Stopped")
 
+    def _flush_on_stop(self):
+        """Write out what the stopped run loop left buffered (accounts, candles, capture)."""
+        try:
+            self.account_store.flush(force=True)
+        except Exception as e:
+            self.log(f"account flush on stop failed: {e}")
+        try:
+            self.candles.flush()
+        except Exception as e:
+            self.log(f"candle flush on stop failed: {e}")
+        if self._exit_pool is not None:
+            self._exit_pool.shutdown(wait=False)
+            self._exit_pool = None
+        if self.recorder is not None:
+            self.recorder.close()
+
     def _run_loop(self):
+        self.profiler.loop_thread = threading.get_ident()
         while not self._stop.is_set():
+            interval = int(TRADE_SETTINGS.get("scan_interval", 10))
+            self.health.begin_cycle(interval)
+            error = None
             try:
-                # Check daily limit before trading
-                if self._check_daily_limit():
-                    self.log("Skipping trade due to daily limit.")
-                else:
-                    # Execute a trade
-                    self._scan_once()
-                    self.trades_today += 1
+                # the daily limit is checked per account (_can_open): it blocks live entries only,
+                # so paper accounts and every exit keep running once it is hit
+                self.profiler.run(self._scan_once)
 
             except Exception as e:
+                error = str(e)
                 self.log(f"Run loop error: {e}")
+            duration = self.health.end_cycle(error)
 
-            # Sleep interval
-            interval = int(TRADE_SETTINGS.get("scan_interval", 10))
-            for _ in range(interval):
-                if self._stop.is_set():
-                    break
-                time.sleep(1)
+            # sleep out the rest of the interval; an overrun starts the next cycle at once
+            self._stop.wait(max(0.0, interval - duration))
 
 # ------------------ CLI debug run ------------------
 if __name__ == "__main__":
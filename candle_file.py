@@ -0,0 +1,117 @@
+"""
+Fixed-record, memory-mapped candle ring buffer (one file per symbol/interval).
+
+Layout: a 32-byte header followed by `capacity` records of six little-endian
+doubles [start_ms, open, high, low, close, volume]. The header holds the total
+number of records ever appended and the newest open time; record i lives in
+slot i % capacity. Reopening only maps the file, nothing is parsed until read.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from typing import List, Optional
+
+MAGIC = b"CNDL"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIQd")  # magic, version, record size, capacity, count, last_ts
+HEADER_SIZE = 32
+RECORD = struct.Struct("<6d")
+
+
+class CandleRingFile:
+    def __init__(self, path: str, capacity: int = 1500):
+        self.path = path
+        self.capacity = max(1, int(capacity))
+        self._fh = None
+        self._mm: Optional[mmap.mmap] = None
+        self.count = 0
+        self.last_ts: Optional[float] = None
+        self._open()
+
+    # ------------------ file handling ------------------
+    def _size(self) -> int:
+        return HEADER_SIZE + self.capacity * RECORD.size
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fresh = not os.path.exists(self.path) or os.path.getsize(self.path) != self._size()
+        if not fresh:
+            with open(self.path, "rb") as fh:
+                head = fh.read(HEADER.size)
+            magic, version, rec_size, capacity, count, last_ts = HEADER.unpack(head)
+            fresh = (magic, version, rec_size, capacity) != (MAGIC, VERSION, RECORD.size, self.capacity)
+        if fresh:
+            # new file, or one written with another layout/capacity: start over
+            with open(self.path, "wb") as fh:
+                fh.truncate(self._size())
+        self._fh = open(self.path, "r+b")
+        self._mm = mmap.mmap(self._fh.fileno(), self._size())
+        if fresh:
+            self._write_header(0, None)
+        else:
+            self.count = count
+            self.last_ts = last_ts if count else None
+
+    def _write_header(self, count: int, last_ts: Optional[float]):
+        self.count = count
+        self.last_ts = last_ts
+        HEADER.pack_into(self._mm, 0, MAGIC, VERSION, RECORD.size, self.capacity, count,
+                         float(last_ts) if last_ts is not None else 0.0)
+
+    def _offset(self, index: int) -> int:
+        return HEADER_SIZE + (index % self.capacity) * RECORD.size
+
+    # ------------------ writing ------------------
+    def append(self, row: List[float]) -> bool:
+        """
+        Store a bar. A bar with the newest open time overwrites the last record
+        (the forming candle being revised); older bars are ignored.
+        Returns True if something was written.
+        """
+        ts = float(row[0])
+        if self.last_ts is not None and ts < self.last_ts:
+            return False
+        if self.last_ts is not None and ts == self.last_ts:
+            RECORD.pack_into(self._mm, self._offset(self.count - 1), *[float(v) for v in row[:6]])
+            return True
+        RECORD.pack_into(self._mm, self._offset(self.count), *[float(v) for v in row[:6]])
+        # header last, so a reader never sees a count that covers an unwritten record
+        self._write_header(self.count + 1, ts)
+        return True
+
+    def extend(self, rows: List[List[float]]) -> int:
+        return sum(1 for row in rows if self.append(row))
+
+    def replace(self, rows: List[List[float]]):
+        """Rewrite the ring with `rows` (oldest first), e.g. after a gap was back-filled."""
+        rows = rows[-self.capacity:]
+        for i, row in enumerate(rows):
+            RECORD.pack_into(self._mm, self._offset(i), *[float(v) for v in row[:6]])
+        self._write_header(len(rows), float(rows[-1][0]) if rows else None)
+
+    # ------------------ reading ------------------
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def rows(self, limit: Optional[int] = None) -> List[List[float]]:
+        """Most recent `limit` bars (all stored if None), oldest first."""
+        n = len(self)
+        if limit is not None:
+            n = min(n, max(0, int(limit)))
+        start = self.count - n
+        return [list(RECORD.unpack_from(self._mm, self._offset(i))) for i in range(start, self.count)]
+
+    def flush(self):
+        if self._mm is not None:
+            self._mm.flush()
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm.close()
+            self._mm = None
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
@@ -0,0 +1,289 @@
+"""
+Local candle store with incremental higher-timeframe aggregation.
+
+The scan loop already downloads base-interval (1m) klines for every symbol.
+CandleStore keeps the most recent of them per symbol, keyed by open time, and
+folds each new or revised base bar into 5m / 15m / 1h buckets as it arrives.
+Strategies can then ask for any of those timeframes without another REST call.
+
+With a `directory`, base bars are also written to a memory-mapped ring file per
+symbol (candle_file.CandleRingFile) and read back on first use after a restart,
+so only the bars since shutdown have to be fetched again.
+
+Bars older than the newest one are merged by open time: a gap left by a failed
+fetch is filled in when a later, longer fetch covers it, and the higher
+timeframe buckets it touches are rebuilt.
+
+Rows use the Bybit kline layout, oldest first:
+    [start_ms, open, high, low, close, volume]
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from candle_file import CandleRingFile
+from klines import parse_klines
+
+Row = List[float]
+
+DEFAULT_TIMEFRAMES = ("5", "15", "60")
+
+
+def interval_minutes(interval: Any) -> Optional[int]:
+    """Minutes in a Bybit interval string ('1', '5', '60', 'D'...), None if unsupported."""
+    text = str(interval).strip().upper()
+    if text == "D":
+        return 1440
+    try:
+        minutes = int(text)
+    except ValueError:
+        return None
+    return minutes if minutes > 0 else None
+
+
+def rows_from_payload(raw: Any) -> List[Row]:
+    """
+    Timestamped rows from a kline payload (Bybit v5 `result.list` or a bare list of
+    [ts, o, h, l, c, v...] arrays), sorted oldest first. Rows without a usable
+    timestamp are dropped.
+    """
+    rows = parse_klines(raw).rows()
+    rows.sort(key=lambda r: r[0])  # already ordered unless the exchange mixed them up
+    return rows
+
+
+class _Aggregate:
+    """Closed bars of one higher timeframe plus the bucket still being built."""
+
+    __slots__ = ("minutes", "span_ms", "bars", "current")
+
+    def __init__(self, minutes: int, max_bars: int):
+        self.minutes = minutes
+        self.span_ms = minutes * 60_000
+        self.bars: Deque[Row] = deque(maxlen=max_bars)
+        self.current: Optional[Row] = None
+
+    def bucket(self, ts: float) -> float:
+        return ts - (ts % self.span_ms)
+
+
+class CandleStore:
+    def __init__(self, base_interval: Any = "1", timeframes: Iterable[str] = DEFAULT_TIMEFRAMES,
+                 max_base_bars: int = 1500, max_bars: int = 500, directory: Optional[str] = None):
+        self.directory = directory
+        self.base_minutes = interval_minutes(base_interval) or 1
+        self.base_ms = self.base_minutes * 60_000
+        self.max_base_bars = max(1, int(max_base_bars))
+        self.max_bars = max(1, int(max_bars))
+        # only whole multiples of the base interval can be derived from it
+        self.timeframes = tuple(
+            str(tf) for tf in timeframes
+            if (interval_minutes(tf) or 0) > self.base_minutes and (interval_minutes(tf) or 0) % self.base_minutes == 0
+        )
+        self._lock = threading.Lock()
+        self._base: Dict[str, Dict[float, Row]] = {}
+        self._order: Dict[str, Deque[float]] = {}
+        self._aggs: Dict[str, Dict[str, _Aggregate]] = {}
+        self._rings: Dict[str, CandleRingFile] = {}
+
+    # ------------------ persistence ------------------
+    def _ring_path(self, symbol: str) -> str:
+        safe = re.sub(r"[^A-Za-z0-9_-]", "_", symbol)
+        return os.path.join(self.directory, f"{safe}_{self.base_minutes}m.candles")
+
+    def _ensure_symbol(self, symbol: str):
+        """Create the per-symbol state; with persistence, warm it from the ring file once."""
+        if symbol in self._base:
+            return
+        self._base[symbol] = {}
+        self._order[symbol] = deque()
+        self._aggs[symbol] = {tf: _Aggregate(interval_minutes(tf), self.max_bars) for tf in self.timeframes}
+        if not self.directory:
+            return
+        ring = CandleRingFile(self._ring_path(symbol), capacity=self.max_base_bars)
+        self._rings[symbol] = ring
+        self._upsert(symbol, ring.rows(), persist=False)
+
+    def close(self):
+        with self._lock:
+            for ring in self._rings.values():
+                ring.close()
+            self._rings.clear()
+
+    def flush(self):
+        with self._lock:
+            for ring in self._rings.values():
+                ring.flush()
+
+    # ------------------ ingest ------------------
+    def ingest(self, symbol: str, rows: List[Row]) -> int:
+        """
+        Upsert base bars (oldest first). Returns how many were new. Revisions of
+        the newest bar (the one still forming) are folded in as well, and older
+        bars missing from the store are merged in by open time.
+        """
+        if not rows:
+            return 0
+        with self._lock:
+            self._ensure_symbol(symbol)
+            return self._upsert(symbol, rows, persist=True)
+
+    def _upsert(self, symbol: str, rows: List[Row], persist: bool) -> int:
+        added = 0
+        base = self._base[symbol]
+        order = self._order[symbol]
+        aggs = self._aggs[symbol]
+        ring = self._rings.get(symbol) if persist else None
+        last_ts = order[-1] if order else None
+        backfilled = False
+        for row in rows:
+            ts = row[0]
+            if last_ts is not None and ts < last_ts:
+                # older than the newest bar: revise it, or fill the hole it was missing from
+                if ts in base:
+                    if base[ts][1:] == list(row[1:6]):
+                        continue
+                    base[ts][1:] = row[1:6]
+                elif len(order) >= self.max_base_bars and ts < order[0]:
+                    continue  # older than the window kept
+                else:
+                    order.insert(bisect_left(order, ts), ts)
+                    base[ts] = list(row[:6])
+                    added += 1
+                backfilled = True
+                for agg in aggs.values():
+                    self._refold(symbol, agg, ts)
+                continue
+            if ts not in base:
+                order.append(ts)
+                added += 1
+            base[ts] = list(row[:6])
+            last_ts = ts
+            if ring is not None:
+                ring.append(row)
+            for agg in aggs.values():
+                self._fold(symbol, agg, ts)
+        while len(order) > self.max_base_bars:
+            base.pop(order.popleft(), None)
+        if backfilled and ring is not None:
+            # the ring only appends newer bars; write the merged window back in order
+            ring.replace([base[t] for t in order])
+        return added
+
+    def ingest_payload(self, symbol: str, raw: Any) -> int:
+        return self.ingest(symbol, rows_from_payload(raw))
+
+    def _fold(self, symbol: str, agg: _Aggregate, ts: float):
+        """Bring agg up to date after base bar ts was added or revised."""
+        start = agg.bucket(ts)
+        if agg.current is not None and start > agg.current[0]:
+            agg.bars.append(agg.current)
+            agg.current = None
+        if agg.current is None or agg.current[0] != start:
+            if agg.bars and agg.bars[-1][0] >= start:
+                return  # bucket already closed
+        # rebuild the open bucket from its base bars: at most minutes/base bars, and
+        # correct even when the last base bar was revised rather than appended
+        row = self._bucket_row(symbol, agg, start)
+        if row is not None:
+            agg.current = row
+
+    def _refold(self, symbol: str, agg: _Aggregate, ts: float):
+        """Rebuild the bucket holding base bar ts after it was back-filled or revised."""
+        start = agg.bucket(ts)
+        if (start >= agg.current[0]) if agg.current is not None else (not agg.bars or start > agg.bars[-1][0]):
+            self._fold(symbol, agg, ts)  # still the open bucket
+            return
+        row = self._bucket_row(symbol, agg, start)
+        bars = agg.bars
+        i = bisect_left([b[0] for b in bars], start)
+        if i < len(bars) and bars[i][0] == start:
+            bars[i] = row
+        elif len(bars) < bars.maxlen:
+            bars.insert(i, row)
+        elif i > 0:
+            bars.popleft()
+            bars.insert(i - 1, row)
+
+    def _bucket_row(self, symbol: str, agg: _Aggregate, start: float) -> Optional[Row]:
+        """The bucket opening at start, built from the base bars it holds (None if none)."""
+        base = self._base[symbol]
+        step = self.base_ms
+        o = h = l = c = None
+        vol = 0.0
+        t = start
+        while t < start + agg.span_ms:
+            bar = base.get(t)
+            if bar is not None:
+                if o is None:
+                    o, h, l = bar[1], bar[2], bar[3]
+                else:
+                    h = max(h, bar[2])
+                    l = min(l, bar[3])
+                c = bar[4]
+                vol += bar[5]
+            t += step
+        return None if o is None else [start, o, h, l, c, vol]
+
+    # ------------------ read ------------------
+    def klines(self, symbol: str, interval: Any, limit: int = 200, include_partial: bool = False) -> List[Row]:
+        """Up to `limit` most recent bars of interval, oldest first (copies)."""
+        minutes = interval_minutes(interval)
+        with self._lock:
+            self._ensure_symbol(symbol)
+            if minutes == self.base_minutes:
+                order = self._order.get(symbol) or ()
+                base = self._base.get(symbol, {})
+                rows = [list(base[t]) for t in list(order)[-limit:]]
+                return rows
+            agg = self._aggs.get(symbol, {}).get(str(interval))
+            if agg is None:
+                return []
+            rows = [list(r) for r in agg.bars]
+            if include_partial and agg.current is not None:
+                rows.append(list(agg.current))
+            return rows[-limit:]
+
+    def has(self, symbol: str, interval: Any, bars: int) -> bool:
+        return len(self.klines(symbol, interval, bars)) >= bars
+
+    def last_timestamp(self, symbol: str) -> Optional[float]:
+        with self._lock:
+            self._ensure_symbol(symbol)
+            order = self._order.get(symbol)
+            return order[-1] if order else None
+
+    def fetch_limit(self, symbol: str, limit: int, now_ms: float) -> int:
+        """
+        How many of the newest base bars to download so the store holds `limit`
+        contiguous bars: just the gap since the last stored bar (plus that bar,
+        which may have still been forming) when the history is already there.
+        """
+        last = self.last_timestamp(symbol)
+        if last is None or not self.contiguous(symbol, limit):
+            return limit
+        gap = int((now_ms - last) // self.base_ms)
+        if gap < 0 or gap + 1 >= limit:
+            return limit
+        return max(2, gap + 1)
+
+    def contiguous(self, symbol: str, bars: int) -> bool:
+        """True if the newest `bars` base bars exist with no missing interval."""
+        rows = self.klines(symbol, f"{self.base_minutes}", bars)
+        if len(rows) < bars:
+            return False
+        return all(rows[i + 1][0] - rows[i][0] == self.base_ms for i in range(len(rows) - 1))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "symbols": len(self._base),
+                "persisted": len(self._rings),
+                "base_bars": sum(len(o) for o in self._order.values()),
+                "timeframes": list(self.timeframes),
+            }
@@ -0,0 +1,314 @@
+"""
+Exchange adapters for async market data and orders across exchanges.
+
+ExchangeAdapter is the small surface the bot needs from an exchange: OHLCV,
+tickers, balances and market orders, all awaitable and all in the bot's own
+shapes (symbols like "BTCUSDT", kline rows [start_ms, open, high, low, close,
+volume] oldest first). Two implementations:
+
+- CcxtExchange wraps ccxt.async_support, so any exchange ccxt knows (binance,
+  bybit, okx, ...) can be scanned. ccxt is imported on first use.
+- MockExchange is a local, deterministic in-memory exchange (synthetic
+  candles, recorded orders, optional latency and failures) for dry runs,
+  benchmarks and tests without network access.
+
+fetch_ohlcv_all() fetches several universes on several exchanges concurrently.
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+from abc import ABC, abstractmethod
+import random
+import time
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from candles import interval_minutes
+
+Row = List[float]
+
+# quote assets tried when turning "BTCUSDT" into "BTC/USDT" without market metadata
+QUOTE_ASSETS = ("USDT", "USDC", "BUSD", "FDUSD", "BTC", "ETH")
+
+
+def ccxt_timeframe(interval: Any) -> str:
+    """Bybit-style interval ('1', '60', 'D') -> ccxt timeframe ('1m', '1h', '1d')."""
+    minutes = interval_minutes(interval)
+    if minutes is None:
+        raise ValueError(f"unsupported interval: {interval!r}")
+    if minutes % 1440 == 0:
+        return f"{minutes // 1440}d"
+    if minutes % 60 == 0:
+        return f"{minutes // 60}h"
+    return f"{minutes}m"
+
+
+def split_symbol(symbol: str) -> Optional[Tuple[str, str]]:
+    if "/" in symbol:
+        base, quote = symbol.split("/", 1)
+        return base, quote.split(":", 1)[0]
+    for quote in QUOTE_ASSETS:
+        if symbol.endswith(quote) and len(symbol) > len(quote):
+            return symbol[:-len(quote)], quote
+    return None
+
+
+class ExchangeAdapter(ABC):
+    """Async exchange access in the bot's symbol and kline formats."""
+
+    exchange_id = "base"
+
+    async def load_markets(self) -> Dict[str, Any]:
+        return {}
+
+    @abstractmethod
+    async def fetch_ohlcv(self, symbol: str, interval: Any = "1", limit: int = 200) -> List[Row]:
+        """Kline rows [start_ms, open, high, low, close, volume], oldest first."""
+
+    @abstractmethod
+    async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        """{"symbol", "last", "bid", "ask", "timestamp"}; missing values are None."""
+
+    @abstractmethod
+    async def fetch_balance(self, assets: Iterable[str] = ("USDT", "USDC")) -> Optional[float]:
+        """Total of the given (stable) assets, None if the exchange reported none of them."""
+
+    @abstractmethod
+    async def create_market_order(self, symbol: str, side: str, qty: float) -> Dict[str, Any]:
+        """{"id", "symbol", "side", "qty", "price", "status"} or {"error": ...}."""
+
+    async def close(self):
+        return None
+
+    async def fetch_ohlcv_many(self, symbols: Iterable[str], interval: Any = "1", limit: int = 200,
+                               concurrency: int = 20) -> Dict[str, Any]:
+        """{symbol: rows or the exception that fetch raised}, fetched concurrently."""
+        sem = asyncio.Semaphore(max(1, int(concurrency)))
+
+        async def one(symbol: str):
+            async with sem:
+                return await self.fetch_ohlcv(symbol, interval, limit)
+
+        symbols = list(symbols)
+        results = await asyncio.gather(*(one(s) for s in symbols), return_exceptions=True)
+        return dict(zip(symbols, results))
+
+
+async def fetch_ohlcv_all(universes: Dict[str, Tuple[ExchangeAdapter, List[str]]], interval: Any = "1",
+                          limit: int = 200, concurrency: int = 20) -> Dict[str, Dict[str, Any]]:
+    """
+    {name: (adapter, symbols)} -> {name: {symbol: rows or exception}}. Every
+    exchange is fetched at the same time, each with its own concurrency cap.
+    """
+    names = list(universes)
+    results = await asyncio.gather(
+        *(universes[n][0].fetch_ohlcv_many(universes[n][1], interval, limit, concurrency) for n in names),
+        return_exceptions=True,
+    )
+    out: Dict[str, Dict[str, Any]] = {}
+    for name, result in zip(names, results):
+        out[name] = result if isinstance(result, dict) else {s: result for s in universes[name][1]}
+    return out
+
+
+# -------------------- ccxt --------------------
+class CcxtExchange(ExchangeAdapter):
+    def __init__(self, exchange_id: str, api_key: Optional[str] = None, api_secret: Optional[str] = None,
+                 testnet: bool = False, market_type: str = "spot", options: Optional[Dict[str, Any]] = None):
+        self.exchange_id = exchange_id
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.testnet = testnet
+        self.market_type = market_type
+        self.options = dict(options or {})
+        self._client: Any = None
+        self._markets_lock: Optional[asyncio.Lock] = None
+        self._by_id: Dict[str, str] = {}
+
+    def client(self) -> Any:
+        if self._client is None:
+            # ccxt is large; only exchanges that are actually configured pay for the import
+            import ccxt.async_support as ccxt_async
+
+            cls = getattr(ccxt_async, self.exchange_id, None)
+            if cls is None:
+                raise ValueError(f"ccxt does not support exchange {self.exchange_id!r}")
+            config: Dict[str, Any] = {
+                "enableRateLimit": True,
+                "options": dict({"defaultType": self.market_type}, **self.options),
+            }
+            if self.api_key and self.api_secret:
+                config["apiKey"] = self.api_key
+                config["secret"] = self.api_secret
+            self._client = cls(config)
+            if self.testnet:
+                self._client.set_sandbox_mode(True)
+        return self._client
+
+    async def load_markets(self) -> Dict[str, Any]:
+        if self._markets_lock is None:
+            self._markets_lock = asyncio.Lock()
+        async with self._markets_lock:
+            if not self._by_id:
+                markets = await self.client().load_markets()
+                self._by_id = {
+                    m["id"]: m["symbol"] for m in markets.values()
+                    if m.get("type", self.market_type) == self.market_type and m.get("id")
+                }
+        return self.client().markets
+
+    async def market_symbol(self, symbol: str) -> str:
+        """Bot symbol ("BTCUSDT") -> ccxt unified symbol ("BTC/USDT")."""
+        if "/" in symbol:
+            return symbol
+        await self.load_markets()
+        unified = self._by_id.get(symbol)
+        if unified:
+            return unified
+        parts = split_symbol(symbol)
+        if parts is None:
+            raise ValueError(f"cannot map {symbol!r} to a {self.exchange_id} market")
+        return f"{parts[0]}/{parts[1]}"
+
+    async def fetch_ohlcv(self, symbol: str, interval: Any = "1", limit: int = 200) -> List[Row]:
+        rows = await self.client().fetch_ohlcv(await self.market_symbol(symbol), timeframe=ccxt_timeframe(interval),
+                                               limit=limit)
+        return [[float(r[0]), float(r[1]), float(r[2]), float(r[3]), float(r[4]), float(r[5] or 0.0)]
+                for r in rows if r and r[4] is not None]
+
+    async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        t = await self.client().fetch_ticker(await self.market_symbol(symbol))
+        return {"symbol": symbol, "last": t.get("last"), "bid": t.get("bid"), "ask": t.get("ask"),
+                "timestamp": t.get("timestamp")}
+
+    async def fetch_balance(self, assets: Iterable[str] = ("USDT", "USDC")) -> Optional[float]:
+        balance = await self.client().fetch_balance()
+        totals = balance.get("total") or {}
+        found = [float(totals[a]) for a in assets if totals.get(a) is not None]
+        return sum(found) if found else None
+
+    async def create_market_order(self, symbol: str, side: str, qty: float) -> Dict[str, Any]:
+        market = await self.market_symbol(symbol)
+        client = self.client()
+        try:
+            amount = float(client.amount_to_precision(market, qty))
+            order = await client.create_order(market, "market", side.lower(), amount)
+        except Exception as e:
+            return {"error": str(e), "symbol": symbol, "side": side, "qty": qty}
+        return {
+            "id": order.get("id"),
+            "symbol": symbol,
+            "side": side,
+            "qty": order.get("filled") or amount,
+            "price": order.get("average") or order.get("price"),
+            "status": order.get("status"),
+        }
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+# -------------------- local mock --------------------
+class MockExchange(ExchangeAdapter):
+    """
+    Deterministic in-memory exchange. Candles are a pure function of the
+    symbol, the seed and the bar index (two sine waves plus hashed noise), so
+    any window of them always agrees, ending at the current candle; tickers
+    use the last close, orders fill immediately at it. latency (seconds) and fail_rate inject delay and
+    errors; max_in_flight records the highest concurrency seen.
+    """
+
+    def __init__(self, exchange_id: str = "mock", symbols: Optional[Iterable[str]] = None, seed: int = 0,
+                 balance: float = 1000.0, latency: float = 0.0, fail_rate: float = 0.0,
+                 clock: Callable[[], float] = time.time, api_key: Optional[str] = None,
+                 api_secret: Optional[str] = None, testnet: bool = False):
+        # credentials and testnet are accepted (and ignored) so it can stand in for CcxtExchange
+        self.exchange_id = exchange_id
+        self.symbols = set(symbols) if symbols is not None else None
+        self.seed = seed
+        self.balances: Dict[str, float] = {"USDT": float(balance)}
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.clock = clock
+        self.orders: List[Dict[str, Any]] = []
+        self.calls: Dict[str, int] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._rng = random.Random(seed)  # failure injection only
+
+    async def _enter(self, method: str, symbol: Optional[str] = None):
+        self.calls[method] = self.calls.get(method, 0) + 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        if symbol is not None and self.symbols is not None and symbol not in self.symbols:
+            raise ValueError(f"{self.exchange_id} does not list {symbol}")
+        if self.fail_rate and self._rng.random() < self.fail_rate:
+            raise ConnectionError(f"{self.exchange_id} mock failure ({method})")
+
+    def _unit(self, key: str) -> float:
+        """Deterministic pseudo-random value in [0, 1) for key."""
+        return zlib.crc32(f"{self.exchange_id}:{self.seed}:{key}".encode()) / 4294967296.0
+
+    def _close(self, symbol: str, index: int) -> float:
+        # a pure function of the bar index, so overlapping windows always agree
+        base = 1.0 + self._unit(symbol) * 100.0
+        phase, phase2 = self._unit(symbol + ":p") * 6.28, self._unit(symbol + ":q") * 6.28
+        noise = (self._unit(f"{symbol}:{index}") - 0.5) * 0.006
+        return base * (1.0 + 0.03 * math.sin(index / 37.0 + phase) + 0.01 * math.sin(index / 7.3 + phase2) + noise)
+
+    def _series(self, symbol: str, interval: Any, limit: int) -> List[Row]:
+        span = (interval_minutes(interval) or 1) * 60_000
+        now_ms = int(self.clock() * 1000)
+        last = (now_ms - now_ms % span) // span
+        rows: List[Row] = []
+        prev = self._close(symbol, last - limit)
+        for i in range(last - limit + 1, last + 1):
+            c = self._close(symbol, i)
+            h = max(prev, c) * (1.0 + self._unit(f"{symbol}:{i}:h") * 0.004)
+            l = min(prev, c) * (1.0 - self._unit(f"{symbol}:{i}:l") * 0.004)
+            rows.append([float(i * span), prev, h, l, c, 500.0 + self._unit(f"{symbol}:{i}:v") * 1000.0])
+            prev = c
+        return rows
+
+    async def fetch_ohlcv(self, symbol: str, interval: Any = "1", limit: int = 200) -> List[Row]:
+        await self._enter("fetch_ohlcv", symbol)
+        return self._series(symbol, interval, limit)
+
+    async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        await self._enter("fetch_ticker", symbol)
+        last = self._series(symbol, "1", 1)[-1][4]
+        return {"symbol": symbol, "last": last, "bid": last, "ask": last, "timestamp": int(self.clock() * 1000)}
+
+    async def fetch_balance(self, assets: Iterable[str] = ("USDT", "USDC")) -> Optional[float]:
+        await self._enter("fetch_balance")
+        found = [self.balances[a] for a in assets if a in self.balances]
+        return sum(found) if found else None
+
+    async def create_market_order(self, symbol: str, side: str, qty: float) -> Dict[str, Any]:
+        try:
+            await self._enter("create_market_order", symbol)
+        except Exception as e:
+            return {"error": str(e), "symbol": symbol, "side": side, "qty": qty}
+        price = self._series(symbol, "1", 1)[-1][4]
+        order = {"id": f"{self.exchange_id}-{len(self.orders) + 1}", "symbol": symbol, "side": side,
+                 "qty": float(qty), "price": price, "status": "closed"}
+        self.orders.append(order)
+        quote = split_symbol(symbol)[1] if split_symbol(symbol) else "USDT"
+        sign = -1.0 if side.lower() == "buy" else 1.0
+        self.balances[quote] = self.balances.get(quote, 0.0) + sign * price * float(qty)
+        return order
+
+
+def create_exchange(exchange_id: str, **kwargs: Any) -> ExchangeAdapter:
+    """"mock" (or "mock:<name>") gives a MockExchange, anything else a CcxtExchange."""
+    if exchange_id == "mock" or exchange_id.startswith("mock:"):
+        return MockExchange(exchange_id=exchange_id, **kwargs)
+    return CcxtExchange(exchange_id, **kwargs)
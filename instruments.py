@@ -0,0 +1,243 @@
+"""
+Cached Bybit instrument metadata (category, qty step, tick size, min order value).
+
+The table is loaded once from the public instruments-info endpoint and refreshed
+periodically, so order parameters can be rounded to the exchange filters before
+the order is sent instead of being rejected and retried.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from decimal import Decimal, ROUND_DOWN, InvalidOperation
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Categories probed when loading, in order of preference for a long-only bot
+DEFAULT_CATEGORIES = ("spot", "linear")
+
+
+def _dec(value: Any, default: str = "0") -> Decimal:
+    try:
+        if value in (None, ""):
+            return Decimal(default)
+        return Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        return Decimal(default)
+
+
+def _floor_to_step(value: Decimal, step: Decimal) -> Decimal:
+    if step <= 0:
+        return value
+    return (value / step).to_integral_value(rounding=ROUND_DOWN) * step
+
+
+def _fmt(value: Decimal, step: Decimal) -> str:
+    """Format value with exactly as many decimals as the step allows."""
+    exponent = step.as_tuple().exponent if step > 0 else 0
+    if isinstance(exponent, int) and exponent < 0:
+        value = value.quantize(Decimal(1).scaleb(exponent), rounding=ROUND_DOWN)
+    text = format(value, "f")
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return text or "0"
+
+
+class InstrumentSpec:
+    """Trading filters for one symbol in one category."""
+
+    __slots__ = ("symbol", "category", "qty_step", "tick_size", "min_qty", "max_qty", "min_order_value", "status")
+
+    def __init__(self, symbol: str, category: str, qty_step: Decimal, tick_size: Decimal,
+                 min_qty: Decimal, max_qty: Decimal, min_order_value: Decimal, status: str = "Trading"):
+        self.symbol = symbol
+        self.category = category
+        self.qty_step = qty_step
+        self.tick_size = tick_size
+        self.min_qty = min_qty
+        self.max_qty = max_qty
+        self.min_order_value = min_order_value
+        self.status = status
+
+    @classmethod
+    def from_bybit(cls, category: str, item: Dict[str, Any]) -> "InstrumentSpec":
+        lot = item.get("lotSizeFilter") or {}
+        price_filter = item.get("priceFilter") or {}
+        # spot exposes basePrecision/minOrderAmt, derivatives qtyStep/minNotionalValue
+        qty_step = _dec(lot.get("qtyStep") or lot.get("basePrecision"))
+        min_value = _dec(lot.get("minNotionalValue") or lot.get("minOrderAmt"))
+        return cls(
+            symbol=str(item.get("symbol")),
+            category=category,
+            qty_step=qty_step,
+            tick_size=_dec(price_filter.get("tickSize")),
+            min_qty=_dec(lot.get("minOrderQty")),
+            max_qty=_dec(lot.get("maxMktOrderQty") or lot.get("maxOrderQty")),
+            min_order_value=min_value,
+            status=str(item.get("status") or "Trading"),
+        )
+
+    # ------------------ rounding helpers ------------------
+    def round_qty(self, qty: float) -> float:
+        return float(_floor_to_step(_dec(qty), self.qty_step))
+
+    def round_price(self, price: float) -> float:
+        return float(_floor_to_step(_dec(price), self.tick_size))
+
+    def held_after_buy(self, qty: float, fee_rate: float) -> float:
+        """
+        Base quantity left after a market buy of qty. Spot takes the buy fee in
+        base coin, so the position is qty less the fee, rounded down to the
+        lot step (basePrecision) so the exit sell never exceeds the balance.
+        """
+        if self.category != "spot" or fee_rate <= 0:
+            return qty
+        return float(_floor_to_step(_dec(qty) * (1 - _dec(fee_rate)), self.qty_step))
+
+    def format_qty(self, qty: float) -> str:
+        return _fmt(_floor_to_step(_dec(qty), self.qty_step), self.qty_step)
+
+    def check_order(self, qty: float, price: Optional[float]) -> Optional[str]:
+        """Return a rejection reason if the order would fail the exchange filters."""
+        if self.status and self.status != "Trading":
+            return f"instrument_not_trading: {self.status}"
+        q = _floor_to_step(_dec(qty), self.qty_step)
+        if q <= 0 or (self.min_qty > 0 and q < self.min_qty):
+            return f"qty_below_min: {q} < {self.min_qty}"
+        if self.max_qty > 0 and q > self.max_qty:
+            return f"qty_above_max: {q} > {self.max_qty}"
+        if price and self.min_order_value > 0 and q * _dec(price) < self.min_order_value:
+            return f"notional_below_min: {q * _dec(price)} < {self.min_order_value}"
+        return None
+
+    def order_params(self, side: str, qty: float) -> Dict[str, Any]:
+        """Bybit v5 place_order parameters for a market order of qty base units."""
+        params: Dict[str, Any] = {
+            "category": self.category,
+            "symbol": self.symbol,
+            "side": side,
+            "orderType": "Market",
+            "qty": self.format_qty(qty),
+        }
+        if self.category == "spot":
+            # spot market buys are quoted in quote coin unless told otherwise
+            params["marketUnit"] = "baseCoin"
+        return params
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "category": self.category,
+            "qty_step": str(self.qty_step),
+            "tick_size": str(self.tick_size),
+            "min_qty": str(self.min_qty),
+            "max_qty": str(self.max_qty),
+            "min_order_value": str(self.min_order_value),
+            "status": self.status,
+        }
+
+
+class InstrumentCache:
+    """
+    Thread-safe symbol -> InstrumentSpec table.
+
+    `fetch(category, cursor)` must return the raw instruments-info payload for one
+    page; the controller supplies it so the cache stays client-agnostic.
+    """
+
+    def __init__(self, refresh_seconds: int = 3600, categories: Tuple[str, ...] = DEFAULT_CATEGORIES,
+                 preferred_category: Optional[str] = None):
+        self.refresh_seconds = max(60, int(refresh_seconds))
+        self.categories = tuple(categories)
+        self.preferred_category = preferred_category
+        self._lock = threading.Lock()
+        self._specs: Dict[str, Dict[str, InstrumentSpec]] = {}
+        self._loaded_at = 0.0
+        self._last_error: Optional[str] = None
+
+    def is_stale(self) -> bool:
+        return (time.time() - self._loaded_at) > self.refresh_seconds
+
+    def ensure_loaded(self, fetch: Callable[[str, Optional[str]], Any]) -> bool:
+        """Load or refresh the table if stale. Keeps the old table when refresh fails."""
+        if not self.is_stale():
+            return True
+        with self._lock:
+            if not self.is_stale():
+                return True
+            try:
+                table: Dict[str, Dict[str, InstrumentSpec]] = {}
+                for category in self.categories:
+                    cursor: Optional[str] = None
+                    for _ in range(20):  # pagination guard
+                        cursor = self._ingest(table, category, fetch(category, cursor))
+                        if not cursor:
+                            break
+            except Exception as e:
+                return self._load_failed(e)
+            return self._install(table)
+
+    async def ensure_loaded_async(self, fetch: Callable[[str, Optional[str]], Awaitable[Any]]) -> bool:
+        """ensure_loaded() for a coroutine fetch; concurrent callers may both refresh, which is harmless."""
+        if not self.is_stale():
+            return True
+        try:
+            table: Dict[str, Dict[str, InstrumentSpec]] = {}
+            for category in self.categories:
+                cursor: Optional[str] = None
+                for _ in range(20):
+                    cursor = self._ingest(table, category, await fetch(category, cursor))
+                    if not cursor:
+                        break
+        except Exception as e:
+            with self._lock:
+                return self._load_failed(e)
+        with self._lock:
+            return self._install(table)
+
+    def _load_failed(self, e: Exception) -> bool:
+        self._last_error = str(e)
+        # back off so a dead endpoint is not hammered every order
+        self._loaded_at = time.time() - self.refresh_seconds + 60
+        return bool(self._specs)
+
+    def _install(self, table: Dict[str, Dict[str, InstrumentSpec]]) -> bool:
+        if not table:
+            return self._load_failed(RuntimeError("empty instruments response"))
+        self._specs = table
+        self._loaded_at = time.time()
+        self._last_error = None
+        return True
+
+    @staticmethod
+    def _ingest(table: Dict[str, Dict[str, InstrumentSpec]], category: str, resp: Any) -> Optional[str]:
+        """Add one instruments-info page to table; returns the next page cursor."""
+        result = resp.get("result", resp) if isinstance(resp, dict) else {}
+        if not isinstance(result, dict):
+            return None
+        items: List[Dict[str, Any]] = result.get("list") or []
+        for item in items:
+            if not isinstance(item, dict) or not item.get("symbol"):
+                continue
+            spec = InstrumentSpec.from_bybit(category, item)
+            table.setdefault(spec.symbol, {})[category] = spec
+        return result.get("nextPageCursor") or None
+
+    def get(self, symbol: str, category: Optional[str] = None) -> Optional[InstrumentSpec]:
+        by_cat = self._specs.get(symbol)
+        if not by_cat:
+            return None
+        wanted = category or self.preferred_category
+        if wanted:
+            return by_cat.get(wanted)
+        for cat in self.categories:
+            if cat in by_cat:
+                return by_cat[cat]
+        return next(iter(by_cat.values()), None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "symbols": len(self._specs),
+            "loaded_at": self._loaded_at,
+            "stale": self.is_stale(),
+            "last_error": self._last_error,
+        }
@@ -0,0 +1,192 @@
+"""
+Columnar kline parsing.
+
+parse_klines() turns a kline payload into KlineColumns: one array('d') per
+field (ts, open, high, low, close, volume), oldest bar first. The payload's
+shape is worked out once per payload, not per bar:
+
+    envelope  - Bybit v5 {"result": {"list": [...]}}, {"data": [...]}, or a bare list
+    rows      - [ts, o, h, l, c, v, ...] arrays (Bybit strings, ccxt/CandleStore floats)
+                or dicts, with the key spelling (open / Open / o) read off the first one
+    order     - Bybit returns newest first; rows are reversed when the first
+                timestamp is later than the last
+
+Array rows are transposed with zip(*rows) and each column converted by one
+array('d', list(map(float, ...))) call. Only when that fails (a null or garbled
+field somewhere) does the parser fall back to converting row by row, dropping
+the rows that don't parse, like the old per-item loop did.
+
+Signals are built from closed bars only: until(ts) cuts off the bar still
+forming. The scorer reads the columns directly; `ohlc` is a lazy sequence view that
+builds the {"open", "high", "low", "close"} dicts the candle rules use only for
+the bars actually looked at.
+"""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from collections.abc import Sequence
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+_DICT_KEYS = {
+    "ts": ("start", "startTime", "timestamp", "ts", "t"),
+    "open": ("open", "Open", "o"),
+    "high": ("high", "High", "h"),
+    "low": ("low", "Low", "l"),
+    "close": ("close", "Close", "c"),
+    "volume": ("volume", "Volume", "v"),
+}
+
+
+class OhlcView(Sequence):
+    """Read-only list of {"open", "high", "low", "close"} dicts over KlineColumns."""
+
+    __slots__ = ("_cols", "_start", "_stop")
+
+    def __init__(self, cols: "KlineColumns", start: int = 0, stop: Optional[int] = None):
+        self._cols = cols
+        self._start = start
+        self._stop = len(cols.close) if stop is None else stop
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return OhlcView(self._cols, self._start + start, self._start + max(start, stop))
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("ohlc index out of range")
+        i = self._start + index
+        c = self._cols
+        return {"open": c.open[i], "high": c.high[i], "low": c.low[i], "close": c.close[i]}
+
+    def __iter__(self) -> Iterator[Dict[str, float]]:
+        for i in range(len(self)):
+            yield self[i]
+
+
+class KlineColumns:
+    __slots__ = ("ts", "open", "high", "low", "close", "volume")
+
+    def __init__(self, ts: Optional[array] = None, open: Optional[array] = None, high: Optional[array] = None,
+                 low: Optional[array] = None, close: Optional[array] = None, volume: Optional[array] = None):
+        self.ts = ts  # None when the rows carried no timestamp
+        self.open = open if open is not None else array("d")
+        self.high = high if high is not None else array("d")
+        self.low = low if low is not None else array("d")
+        self.close = close if close is not None else array("d")
+        self.volume = volume if volume is not None else array("d", bytes(8 * len(self.close)))
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    @property
+    def ohlc(self) -> OhlcView:
+        return OhlcView(self)
+
+    def series(self):
+        """(opens, highs, lows, closes), the per-symbol input of batch_scoring."""
+        return self.open, self.high, self.low, self.close
+
+    def rows(self) -> List[List[float]]:
+        """[ts, o, h, l, c, v] rows oldest first (CandleStore layout); [] without timestamps."""
+        if self.ts is None:
+            return []
+        return [list(r) for r in zip(self.ts, self.open, self.high, self.low, self.close, self.volume)]
+
+    def until(self, ts: float) -> "KlineColumns":
+        """The bars that opened at or before ts (all of them when there are no timestamps)."""
+        if self.ts is None or not self.ts or self.ts[-1] <= ts:
+            return self
+        n = bisect_right(self.ts, ts)
+        return KlineColumns(*(getattr(self, name)[:n] for name in self.__slots__))
+
+    def _reverse(self):
+        for name in self.__slots__:
+            col = getattr(self, name)
+            if col is not None:
+                col.reverse()
+
+
+def _unwrap(raw: Any) -> Any:
+    payload = raw
+    for _ in range(3):
+        if not isinstance(payload, dict):
+            break
+        payload = payload.get("result", payload.get("list", payload.get("data")))
+    return payload
+
+
+def _float_or_zero(value: Any) -> float:
+    return 0.0 if value in (None, "") else float(value)
+
+
+def _from_arrays(items: List[Any]) -> KlineColumns:
+    columns = list(zip(*items))  # items are all at least 5 wide
+    try:
+        # array() fills faster from a list than from an iterator
+        ts, o, h, l, c = (array("d", list(map(float, col))) for col in columns[:5])
+        v = array("d", list(map(_float_or_zero, columns[5]))) if len(columns) > 5 else None
+        return KlineColumns(ts, o, h, l, c, v)
+    except (TypeError, ValueError):
+        pass
+    # a bad value somewhere: row by row, skipping the rows that don't parse
+    cols = KlineColumns(array("d"))
+    for r in items:
+        try:
+            ts, o, h, l, c = float(r[0]), float(r[1]), float(r[2]), float(r[3]), float(r[4])
+            v = _float_or_zero(r[5]) if len(r) > 5 else 0.0
+        except (TypeError, ValueError):
+            continue
+        cols.ts.append(ts); cols.open.append(o); cols.high.append(h)
+        cols.low.append(l); cols.close.append(c); cols.volume.append(v)
+    return cols
+
+
+def _from_dicts(items: List[Dict[str, Any]]) -> KlineColumns:
+    first = items[0]
+    keys = {field: next((k for k in names if first.get(k) not in (None, "")), None)
+            for field, names in _DICT_KEYS.items()}
+    if None in (keys["open"], keys["high"], keys["low"], keys["close"]):
+        return KlineColumns()
+    ts_key, vol_key = keys["ts"], keys["volume"]
+    cols = KlineColumns(array("d") if ts_key else None)
+    for d in items:
+        try:
+            o, h = float(d[keys["open"]]), float(d[keys["high"]])
+            l, c = float(d[keys["low"]]), float(d[keys["close"]])
+            ts = float(d[ts_key]) if ts_key else None
+            v = _float_or_zero(d.get(vol_key)) if vol_key else 0.0
+        except (KeyError, TypeError, ValueError):
+            continue
+        if ts is not None:
+            cols.ts.append(ts)
+        cols.open.append(o); cols.high.append(h); cols.low.append(l)
+        cols.close.append(c); cols.volume.append(v)
+    return cols
+
+
+def parse_klines(raw: Any) -> KlineColumns:
+    """KlineColumns from a kline payload (any shape above), oldest bar first."""
+    if isinstance(raw, KlineColumns):
+        return raw
+    payload = _unwrap(raw)
+    if not isinstance(payload, list) or not payload:
+        return KlineColumns()
+    first = payload[0]
+    if isinstance(first, (list, tuple)):
+        items = [r for r in payload if isinstance(r, (list, tuple)) and len(r) >= 5]
+        cols = _from_arrays(items) if items else KlineColumns()
+    elif isinstance(first, dict):
+        cols = _from_dicts([r for r in payload if isinstance(r, dict)])
+    else:
+        return KlineColumns()
+    if cols.ts is not None and len(cols.ts) > 1 and cols.ts[0] > cols.ts[-1]:
+        cols._reverse()
+    return cols
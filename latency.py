@@ -0,0 +1,145 @@
+"""
+Decision-to-fill latency tracing.
+
+A LatencyTrace carries time.perf_counter_ns() stamps (monotonic, sub-microsecond)
+for the four points of an order's life:
+
+    signal  - the price/score the decision was based on was observed
+    submit  - the order request left for the exchange (after our own throttling)
+    ack     - the exchange answered the request
+    fill    - the fill was known; for a market order whose response carries no
+              execution price this is the ack (fill_confirmed = False)
+
+to_dict() stores the raw stamps plus the derived stage durations in ms on the
+trade record (entry_latency / exit_latency). The stamps are only comparable
+within one process, which is why the durations are stored too, and why the
+histograms are rebuilt from the trade records rather than kept in memory:
+trades written by shard workers count as well.
+"""
+from __future__ import annotations
+
+import bisect
+import time
+from typing import Any, Dict, Iterable, Optional
+
+STAGES = ("signal", "submit", "ack", "fill")
+
+# (name, from, to) for the durations derived from the stamps
+DURATIONS = (
+    ("signal_to_submit_ms", "signal", "submit"),
+    ("submit_to_ack_ms", "submit", "ack"),
+    ("ack_to_fill_ms", "ack", "fill"),
+    ("decision_to_fill_ms", "signal", "fill"),
+)
+
+# histogram bucket upper bounds in ms; the last bucket is open-ended
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+
+
+class LatencyTrace:
+    __slots__ = ("signal_ns", "submit_ns", "ack_ns", "fill_ns", "fill_confirmed", "signal_wall")
+
+    def __init__(self, signal_ns: Optional[int] = None, signal_wall: Optional[float] = None):
+        self.signal_ns = signal_ns if signal_ns is not None else time.perf_counter_ns()
+        # wall clock of the signal, finer than the trade's whole-second ISO times
+        self.signal_wall = signal_wall if signal_wall is not None else time.time()
+        self.submit_ns: Optional[int] = None
+        self.ack_ns: Optional[int] = None
+        self.fill_ns: Optional[int] = None
+        self.fill_confirmed = False
+
+    def mark(self, stage: str):
+        setattr(self, f"{stage}_ns", time.perf_counter_ns())
+
+    def filled(self, confirmed: bool):
+        """Record the fill; unconfirmed fills are taken to happen at the ack."""
+        self.fill_confirmed = bool(confirmed)
+        if confirmed or self.ack_ns is None:
+            self.mark("fill")
+            if self.ack_ns is not None and self.fill_ns < self.ack_ns:
+                self.fill_ns = self.ack_ns  # simulated acks (paper trading) can lie ahead of now
+        else:
+            self.fill_ns = self.ack_ns
+
+    def ms(self, start: str, end: str) -> Optional[float]:
+        a, b = getattr(self, f"{start}_ns"), getattr(self, f"{end}_ns")
+        if a is None or b is None:
+            return None
+        return round((b - a) / 1e6, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {f"{s}_ns": getattr(self, f"{s}_ns") for s in STAGES}
+        out["fill_confirmed"] = self.fill_confirmed
+        out["signal_wall"] = self.signal_wall
+        for name, start, end in DURATIONS:
+            out[name] = self.ms(start, end)
+        return out
+
+
+class LatencyHistogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms: float):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile, capped at the observed max."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                bound = BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max
+                return round(min(float(bound), self.max), 3)
+        return round(self.max, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3) if self.count else None,
+            "max_ms": round(self.max, 3) if self.count else None,
+            "p50_ms": self.quantile(0.5),
+            "p90_ms": self.quantile(0.9),
+            "p99_ms": self.quantile(0.99),
+            "buckets": [
+                {"le_ms": BUCKETS_MS[i] if i < len(BUCKETS_MS) else None, "count": n}
+                for i, n in enumerate(self.counts) if n
+            ],
+        }
+
+
+def latency_histograms(trades: Iterable[Dict[str, Any]], by: str = "symbol") -> Dict[str, Any]:
+    """
+    {group: {"entry"|"exit": {duration: histogram}}} over the traced trades,
+    grouped by "symbol", "account" or "all".
+    """
+    field = {"symbol": "symbol", "account": "account_id"}.get(by)
+    groups: Dict[str, Dict[str, Dict[str, LatencyHistogram]]] = {}
+    for trade in trades:
+        if not isinstance(trade, dict):
+            continue
+        key = str(trade.get(field) or "unknown") if field else "all"
+        for side in ("entry", "exit"):
+            trace = trade.get(f"{side}_latency")
+            if not isinstance(trace, dict):
+                continue
+            hists = groups.setdefault(key, {}).setdefault(side, {})
+            for name, _, _ in DURATIONS:
+                value = trace.get(name)
+                if isinstance(value, (int, float)) and value >= 0:
+                    hists.setdefault(name, LatencyHistogram()).add(float(value))
+    return {
+        key: {side: {name: h.to_dict() for name, h in hists.items()} for side, hists in sides.items()}
+        for key, sides in groups.items()
+    }
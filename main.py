@@ -10,8 +10,8 @@ from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
 
 # Bot controller & State
-from bot_fib_scoring import ALLOWED_COINS
-from app_state import bc  # Import global bot controller
+from bot_fib_scoring import ALLOWED_COINS, RATE_LIMITER
+import app_state  # global bot controller, created on first use
 
 # Routers
 from routes.config_routes import router as config_router
@@ -19,6 +19,7 @@ from routes.accounts_routes import router as accounts_router
 from routes.bot_routes import router as bot_router
 from routes.dashboard_routes import router as dashboard_router
 from routes.history_routes import router as history_router
+from routes.analytics_routes import router as analytics_router
 from services.accounts_service import get_accounts
 from services.config_service import get_config
 
@@ -116,16 +117,18 @@ async def websocket_endpoint(websocket: WebSocket):
 # Price Fetch Loop
 # -----------------------
 async def price_loop():
-    import requests
+    import httpx
 
+    http = httpx.AsyncClient(timeout=10)
     while True:
         try:
             for sym in ALLOWED_COINS:
                 try:
-                    r = requests.get(
+                    # shares the IP-level quota with the bot's market-data calls
+                    await RATE_LIMITER.acquire_async(lane="market")
+                    r = await http.get(
                         "https://api.bybit.com/v5/market/tickers",
                         params={"category": "spot", "symbol": sym},
-                        timeout=10
                     )
                     j = r.json()
 
@@ -158,15 +161,36 @@ app.include_router(accounts_router, prefix="/api/accounts", tags=["Accounts"])
 app.include_router(bot_router, prefix="/api/bot", tags=["Bot"])
 app.include_router(dashboard_router, prefix="/api/dashboard", tags=["Dashboard"])
 app.include_router(history_router, prefix="/api/history", tags=["History"])
+app.include_router(analytics_router, prefix="/api/analytics", tags=["Analytics"])
 
 # -----------------------
 # App Startup Event
 # -----------------------
 @app.on_event("startup")
 async def startup_event():
+    # the async engine schedules its scan loop on this (uvicorn's) loop
+    app_state.set_event_loop(asyncio.get_running_loop())
     asyncio.create_task(price_loop())
     print("✅ MGX Trading Bot Backend started successfully!")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    bc = app_state.current_bc()
+    if bc is None:
+        return
+    runner = app_state.engine()
+    if runner is not bc and runner.is_running():
+        # the shard supervisor stops its workers, applies their last events and flushes the files
+        await asyncio.to_thread(runner.stop)
+    if hasattr(bc, "astop"):
+        await bc.astop()
+    elif bc.is_running():
+        bc.stop()
+    elif bc.recorder is not None:
+        bc.recorder.close()
+    if hasattr(bc, "aclose"):
+        await bc.aclose()
+
 # -----------------------
 # Test write endpoint
 # -----------------------
@@ -0,0 +1,178 @@
+"""
+Paper trading: virtual balances and simulated market fills.
+
+Accounts trade on paper when dryRun is on, or per account with "paper": true.
+They need no API keys: market data comes from one shared public client, the
+same per-candle signals and per-symbol tickers the live accounts use, and
+orders are filled here against that price instead of being sent anywhere.
+
+FillModel turns the reference price into an execution price: adverse slippage
+of slippage_bps plus a uniform random part up to slippage_jitter_bps, and a
+taker fee of fee_bps. The fee is charged in the asset received (base coin on a
+buy, quote on a sell), like spot exchanges do. Exchange latency is modelled on
+the order's latency trace (ack = submit + latency) rather than slept, so one
+scan can fill hundreds of paper accounts without waiting on a timer.
+
+PaperBroker keeps each account's ledger (quote cash, base positions, fees
+paid). The cash balance is mirrored on the account record as paper_balance, so
+it is persisted with the accounts and survives restarts; positions are rebuilt
+from the open trade fields when an account is first seen.
+"""
+from __future__ import annotations
+
+import itertools
+import random
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from latency import LatencyTrace
+
+
+class FillModel:
+    __slots__ = ("slippage_bps", "slippage_jitter_bps", "fee_bps", "latency_ms", "latency_jitter_ms", "_rng")
+
+    def __init__(self, slippage_bps: float = 5.0, slippage_jitter_bps: float = 5.0, fee_bps: float = 10.0,
+                 latency_ms: float = 50.0, latency_jitter_ms: float = 25.0, seed: Optional[int] = None):
+        self.slippage_bps = max(0.0, float(slippage_bps))
+        self.slippage_jitter_bps = max(0.0, float(slippage_jitter_bps))
+        self.fee_bps = max(0.0, float(fee_bps))
+        self.latency_ms = max(0.0, float(latency_ms))
+        self.latency_jitter_ms = max(0.0, float(latency_jitter_ms))
+        self._rng = random.Random(seed)
+
+    def price(self, side: str, reference: float) -> float:
+        """Execution price for a market order against `reference` (always adverse)."""
+        bps = self.slippage_bps + self._rng.uniform(0.0, self.slippage_jitter_bps)
+        sign = 1.0 if side.lower() == "buy" else -1.0
+        return reference * (1.0 + sign * bps / 10_000.0)
+
+    def fee(self, amount: float) -> float:
+        return amount * self.fee_bps / 10_000.0
+
+    def latency_ns(self) -> int:
+        return int((self.latency_ms + self._rng.uniform(0.0, self.latency_jitter_ms)) * 1e6)
+
+
+class _Ledger:
+    __slots__ = ("cash", "positions", "fees", "orders")
+
+    def __init__(self, cash: float):
+        self.cash = cash
+        self.positions: Dict[str, float] = {}
+        self.fees = 0.0
+        self.orders = 0
+
+
+class PaperBroker:
+    def __init__(self, fill_model: FillModel, initial_balance: float = 1000.0,
+                 price_source: Optional[Callable[[str], Optional[float]]] = None):
+        self.fill_model = fill_model
+        self.initial_balance = float(initial_balance)
+        # fallback reference price (shared feed) for orders placed without a price hint
+        self.price_source = price_source
+        self._lock = threading.Lock()
+        self._ledgers: Dict[str, _Ledger] = {}
+        self._order_ids = itertools.count(1)
+        self.rejected = 0
+
+    # ------------------ accounts ------------------
+    def open_account(self, account: Dict[str, Any]) -> float:
+        """Make sure the account has a ledger (seeded from the record once); returns its cash."""
+        account_id = str(account.get("id"))
+        with self._lock:
+            ledger = self._ledgers.get(account_id)
+            if ledger is None:
+                cash = account.get("paper_balance")
+                ledger = _Ledger(float(cash) if cash is not None else self.initial_balance)
+                if account.get("position") == "open" and account.get("current_symbol") and account.get("entry_qty"):
+                    ledger.positions[account["current_symbol"]] = float(account["entry_qty"])
+                self._ledgers[account_id] = ledger
+            return ledger.cash
+
+    def balance(self, account_id: Any) -> Optional[float]:
+        ledger = self._ledgers.get(str(account_id))
+        return None if ledger is None else ledger.cash
+
+    def reset(self, account_id: Any):
+        with self._lock:
+            self._ledgers.pop(str(account_id), None)
+
+    # ------------------ orders ------------------
+    def market_order(self, account_id: Any, symbol: str, side: str, qty: float,
+                     price_hint: Optional[float] = None, trace: Optional[LatencyTrace] = None) -> Dict[str, Any]:
+        """
+        Fill a market order on the account's ledger. Buys are cut to what the cash
+        covers after slippage, sells to the position held. Returns an order
+        response with simulated=True and the executed price, or {"error": ...}.
+        """
+        reference = price_hint
+        if (reference is None or reference <= 0) and self.price_source is not None:
+            reference = self.price_source(symbol)
+        if trace is not None:
+            trace.mark("submit")
+        if reference is None or reference <= 0:
+            self.rejected += 1
+            return {"error": f"paper: no price for {symbol}"}
+
+        model = self.fill_model
+        price = model.price(side, float(reference))
+        buy = side.lower() == "buy"
+        with self._lock:
+            ledger = self._ledgers.setdefault(str(account_id), _Ledger(self.initial_balance))
+            if buy:
+                filled = min(float(qty), ledger.cash / price)
+            else:
+                filled = min(float(qty), ledger.positions.get(symbol, 0.0))
+            if filled <= 0:
+                self.rejected += 1
+                reason = "insufficient paper balance" if buy else f"no paper position in {symbol}"
+                return {"error": f"paper: {reason}"}
+            notional = filled * price
+            if buy:
+                fee = model.fee(filled)  # in base
+                ledger.cash -= notional
+                ledger.positions[symbol] = ledger.positions.get(symbol, 0.0) + filled - fee
+                fee_quote = fee * price
+            else:
+                fee_quote = model.fee(notional)
+                ledger.cash += notional - fee_quote
+                held = ledger.positions.get(symbol, 0.0) - filled
+                if held > 1e-12:
+                    ledger.positions[symbol] = held
+                else:
+                    ledger.positions.pop(symbol, None)
+            ledger.fees += fee_quote
+            ledger.orders += 1
+            cash = ledger.cash
+            order_id = f"paper-{next(self._order_ids)}"
+        if trace is not None and trace.submit_ns is not None:
+            trace.ack_ns = trace.submit_ns + model.latency_ns()
+        return {
+            "simulated": True,
+            "orderId": order_id,
+            "symbol": symbol,
+            "side": side,
+            "qty": qty,
+            "executed_qty": round(filled, 12),
+            # base coin actually added to the position (the buy fee is taken in base)
+            "held_qty": round(filled - fee if buy else filled, 12),
+            "reference_price": reference,
+            "executed_price": price,
+            "fee": round(fee_quote, 8),
+            "paper_balance": cash,
+            "time": datetime.utcnow().isoformat(),
+        }
+
+    # ------------------ report ------------------
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            ledgers = list(self._ledgers.values())
+        return {
+            "accounts": len(ledgers),
+            "orders": sum(l.orders for l in ledgers),
+            "rejected": self.rejected,
+            "fees": round(sum(l.fees for l in ledgers), 6),
+            "cash": round(sum(l.cash for l in ledgers), 6),
+            "open_positions": sum(len(l.positions) for l in ledgers),
+        }
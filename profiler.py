@@ -0,0 +1,196 @@
+"""
+On-demand profiling of the scan loop.
+
+Two modes, one session at a time:
+
+    profile - cProfile around the next N scan cycles (BotController._scan_once, or
+              one cycle of the async loop). Each cycle gets its own Profile that is
+              merged into the session's pstats once the cycle has finished, so
+              results are only ever read from profiles that are no longer running.
+    sample  - the scan thread's stack read every few ms from the calling thread
+              via sys._current_frames(), folded into collapsed-stack lines
+              ("root;caller;leaf count") for flamegraph.pl / speedscope.
+
+While no session is armed the loop pays one attribute check per cycle, and
+cProfile/pstats are not even imported. In the async engine the scan shares the
+event loop with the HTTP handlers, so a profiled cycle includes whatever else
+ran on the loop during it.
+"""
+from __future__ import annotations
+
+import io
+import os
+import sys
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class ProfilerBusy(RuntimeError):
+    """Another profiling session is already running."""
+
+
+class ProfilerUnavailable(RuntimeError):
+    """Nothing to profile (loop not running, or scans run in other processes)."""
+
+
+class _Session:
+    __slots__ = ("remaining", "scans", "scan_seconds", "stats", "done", "cancelled")
+
+    def __init__(self, scans: int):
+        self.remaining = scans
+        self.scans = 0
+        self.scan_seconds: List[float] = []
+        self.stats = None  # pstats.Stats over the finished cycles
+        self.done = threading.Event()
+        self.cancelled = False
+
+
+def _frame_label(code) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class ScanProfiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._busy = threading.Lock()  # held for the whole of a profile/sample session
+        self._session: Optional[_Session] = None
+        self.loop_thread: Optional[int] = None  # ident of the thread running the scans
+
+    # ------------------ hooks used by the run loops ------------------
+    def _begin(self):
+        session = self._session
+        if session is None:
+            return None, None
+        import cProfile
+
+        with self._lock:
+            if session.cancelled or session.remaining <= 0:
+                return None, None
+        return session, cProfile.Profile()
+
+    def _end(self, session: _Session, profile, elapsed: float):
+        import pstats
+
+        with self._lock:
+            if session.stats is None:
+                session.stats = pstats.Stats(profile, stream=io.StringIO())
+            else:
+                session.stats.add(profile)
+            session.scans += 1
+            session.scan_seconds.append(round(elapsed, 3))
+            session.remaining -= 1
+            if session.remaining <= 0:
+                session.done.set()
+
+    def run(self, scan: Callable[[], Any]) -> Any:
+        """Run one scan cycle, under cProfile if a session wants it."""
+        if self._session is None:
+            return scan()
+        session, profile = self._begin()
+        if session is None:
+            return scan()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            return scan()
+        finally:
+            profile.disable()
+            self._end(session, profile, time.perf_counter() - started)
+
+    async def run_async(self, scan: Callable[[], Awaitable[Any]]) -> Any:
+        if self._session is None:
+            return await scan()
+        session, profile = self._begin()
+        if session is None:
+            return await scan()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            return await scan()
+        finally:
+            profile.disable()
+            self._end(session, profile, time.perf_counter() - started)
+
+    # ------------------ sessions ------------------
+    def profile_scans(self, scans: int, timeout: float) -> Dict[str, Any]:
+        """
+        Profile the next `scans` cycles, waiting up to `timeout` seconds. Returns
+        {"scans", "requested", "scan_seconds", "stats"}; on timeout the cycles that
+        finished are returned (stats is None if none did).
+        """
+        if not self._busy.acquire(blocking=False):
+            raise ProfilerBusy("a profiling session is already running")
+        try:
+            session = _Session(max(1, int(scans)))
+            self._session = session
+            try:
+                session.done.wait(timeout)
+            finally:
+                with self._lock:
+                    session.cancelled = True
+                    self._session = None
+            return {
+                "scans": session.scans,
+                "requested": int(scans),
+                "scan_seconds": list(session.scan_seconds),
+                "stats": session.stats,
+            }
+        finally:
+            self._busy.release()
+
+    def sample(self, seconds: float, interval: float) -> Dict[str, Any]:
+        """
+        Sample the scan thread's stack every `interval` seconds for `seconds`.
+        Returns {"samples", "seconds", "stacks": {collapsed_stack: count}}.
+        """
+        ident = self.loop_thread
+        if ident is None or ident not in sys._current_frames():
+            raise ProfilerUnavailable("the scan loop is not running")
+        if not self._busy.acquire(blocking=False):
+            raise ProfilerBusy("a profiling session is already running")
+        try:
+            stacks: Dict[str, int] = {}
+            samples = 0
+            started = time.perf_counter()
+            deadline = started + seconds
+            while time.perf_counter() < deadline:
+                frame = sys._current_frames().get(ident)
+                if frame is None:
+                    break  # the loop thread exited
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                del frame
+                key = ";".join(reversed(labels))
+                stacks[key] = stacks.get(key, 0) + 1
+                samples += 1
+                time.sleep(interval)
+            return {
+                "samples": samples,
+                "seconds": round(time.perf_counter() - started, 3),
+                "stacks": stacks,
+            }
+        finally:
+            self._busy.release()
+
+
+def pstats_text(stats, sort: str = "cumulative", limit: int = 50) -> str:
+    """The pstats report (top `limit` functions by `sort`) as text."""
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+
+def pstats_dump(stats) -> bytes:
+    """The raw stats in the format pstats.Stats(path) / snakeviz load."""
+    import marshal
+
+    return marshal.dumps(stats.stats)
+
+
+def collapsed_text(stacks: Dict[str, int]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
@@ -0,0 +1,187 @@
+"""
+Shared token-bucket rate limiter for exchange calls.
+
+One "public" bucket models the IP-level quota for market data; each API key
+gets its own private bucket for wallet and order endpoints. Waiters are served
+by lane priority, so exits and orders are not starved by scoring traffic.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Lower value = served first
+LANE_PRIORITY = {
+    "exit": 0,
+    "order": 1,
+    "account": 2,
+    "market": 3,
+    "scoring": 4,
+}
+
+PUBLIC_BUCKET = "public"
+
+
+class RateLimitTimeout(RuntimeError):
+    """Raised when a caller could not get a token within its timeout."""
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = max(0.001, float(rate))
+        self.capacity = max(1.0, float(capacity))
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def wait_time(self, cost: float = 1.0) -> float:
+        """Seconds until `cost` tokens are available (0 if available now)."""
+        self._refill(self.clock())
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def take(self, cost: float = 1.0):
+        self.tokens -= cost
+
+
+class _LaneStats:
+    __slots__ = ("count", "total_wait", "max_wait", "waited")
+
+    def __init__(self):
+        self.count = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.waited = 0
+
+    def record(self, wait: float):
+        self.count += 1
+        self.total_wait += wait
+        if wait > 0.001:
+            self.waited += 1
+        if wait > self.max_wait:
+            self.max_wait = wait
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "waited": self.waited,
+            "avg_wait_ms": round(self.total_wait / self.count * 1000.0, 3) if self.count else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000.0, 3),
+            "total_wait_s": round(self.total_wait, 3),
+        }
+
+
+class RateLimiter:
+    def __init__(self, public_rate: float = 100.0, public_burst: float = 100.0,
+                 private_rate: float = 10.0, private_burst: float = 10.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.private_rate = private_rate
+        self.private_burst = private_burst
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._buckets: Dict[str, TokenBucket] = {PUBLIC_BUCKET: TokenBucket(public_rate, public_burst, clock)}
+        self._waiters: Dict[str, List[Tuple[int, int]]] = {}
+        self._seq = itertools.count()
+        self._lane_stats: Dict[str, _LaneStats] = {}
+        self._bucket_stats: Dict[str, _LaneStats] = {}
+
+    # ------------------ bucket helpers ------------------
+    @staticmethod
+    def private_key(api_key: Optional[str]) -> str:
+        return f"key:{api_key or 'anonymous'}"
+
+    def _bucket(self, name: str) -> TokenBucket:
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            bucket = TokenBucket(self.private_rate, self.private_burst, self.clock)
+            self._buckets[name] = bucket
+        return bucket
+
+    def _record(self, bucket: str, lane: str, wait: float):
+        self._lane_stats.setdefault(lane, _LaneStats()).record(wait)
+        self._bucket_stats.setdefault(bucket if bucket == PUBLIC_BUCKET else "private", _LaneStats()).record(wait)
+
+    def _try_take(self, bucket_name: str, entry: Tuple[int, int], cost: float) -> float:
+        """Take tokens if entry is at the head of its queue. Returns wait hint (0 = taken)."""
+        heap = self._waiters[bucket_name]
+        if heap[0] != entry:
+            return -1.0
+        bucket = self._bucket(bucket_name)
+        wait = bucket.wait_time(cost)
+        if wait <= 0:
+            bucket.take(cost)
+            heapq.heappop(heap)
+            self._cond.notify_all()
+        return wait
+
+    def _drop(self, bucket_name: str, entry: Tuple[int, int]):
+        heap = self._waiters.get(bucket_name, [])
+        if entry in heap:
+            heap.remove(entry)
+            heapq.heapify(heap)
+            self._cond.notify_all()
+
+    # ------------------ public API ------------------
+    def acquire(self, bucket: str = PUBLIC_BUCKET, lane: str = "scoring", cost: float = 1.0,
+                timeout: Optional[float] = None) -> float:
+        """Block until a token is available. Returns the time spent waiting."""
+        started = self.clock()
+        entry = (LANE_PRIORITY.get(lane, len(LANE_PRIORITY)), next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiters.setdefault(bucket, []), entry)
+            while True:
+                wait = self._try_take(bucket, entry, cost)
+                if wait == 0:
+                    break
+                if timeout is not None:
+                    remaining = timeout - (self.clock() - started)
+                    if remaining <= 0:
+                        self._drop(bucket, entry)
+                        raise RateLimitTimeout(f"rate limit wait exceeded {timeout}s on {bucket}")
+                    wait = remaining if wait < 0 else min(wait, remaining)
+                # not at head: sleep until the head leaves; at head: until refill
+                self._cond.wait(None if wait < 0 else wait)
+            waited = self.clock() - started
+            self._record(bucket, lane, waited)
+        return waited
+
+    async def acquire_async(self, bucket: str = PUBLIC_BUCKET, lane: str = "market", cost: float = 1.0) -> float:
+        """Event-loop friendly acquire: polls with asyncio.sleep instead of blocking."""
+        import asyncio  # only async callers pay for the import
+
+        started = self.clock()
+        entry = (LANE_PRIORITY.get(lane, len(LANE_PRIORITY)), next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiters.setdefault(bucket, []), entry)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_take(bucket, entry, cost)
+                    if wait == 0:
+                        waited = self.clock() - started
+                        self._record(bucket, lane, waited)
+                        return waited
+                await asyncio.sleep(0.01 if wait < 0 else min(wait, 0.25))
+        except BaseException:
+            with self._cond:
+                self._drop(bucket, entry)
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "lanes": {k: v.to_dict() for k, v in self._lane_stats.items()},
+                "buckets": {k: v.to_dict() for k, v in self._bucket_stats.items()},
+                "queued": {k: len(v) for k, v in self._waiters.items() if v},
+                "private_keys": len(self._buckets) - 1,
+            }
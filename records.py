@@ -0,0 +1,250 @@
+"""
+Slotted record types for trades and accounts.
+
+Each record knows its schema: known fields are coerced to their type on the way
+in and stored in slots; anything else is kept in `extra` so no data is lost. A
+known field whose value cannot be coerced ("n/a" for a price) is kept raw in
+`extra` too and reported by `invalid_fields()`; only None and "" become None.
+`to_dict()` produces the same JSON shape the data files have always had (only
+fields that were set, plus extras). Only fields holding raw exchange payloads
+need a deep copy, so records are copied without a recursive walk.
+"""
+from __future__ import annotations
+
+import copy
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+_UNSET = object()
+
+
+# -------------------- coercers --------------------
+def _str(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _float(value: Any) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    return float(value)
+
+
+def _int(value: Any) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    return int(float(value))
+
+
+def _bool(value: Any) -> Optional[bool]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+def _payload(value: Any) -> Any:
+    """Nested JSON payload (exchange preview etc.): the only fields that need a deep copy."""
+    return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+
+# -------------------- base --------------------
+class Record:
+    __slots__ = ("extra",)
+
+    # field name -> coercer; subclasses list the same names in __slots__
+    SCHEMA: Dict[str, Callable[[Any], Any]] = {}
+    # fields holding nested payloads; the only ones to_dict() deep-copies
+    NESTED: Tuple[str, ...] = ()
+
+    def __init__(self, **fields: Any):
+        for name in self.SCHEMA:
+            object.__setattr__(self, name, _UNSET)
+        self.extra: Dict[str, Any] = {}
+        self.update(fields)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        rec = cls.__new__(cls)
+        for name in cls.SCHEMA:
+            object.__setattr__(rec, name, _UNSET)
+        rec.extra = {}
+        rec.update(data)
+        return rec
+
+    def update(self, data: Dict[str, Any]):
+        schema = self.SCHEMA
+        for key, value in data.items():
+            coerce = schema.get(key)
+            if coerce is None:
+                self.extra[key] = _payload(value)
+                continue
+            try:
+                coerced = coerce(value)
+            except (TypeError, ValueError):
+                # keep the raw value rather than dropping it; see invalid_fields()
+                object.__setattr__(self, key, _UNSET)
+                self.extra[key] = _payload(value)
+                continue
+            object.__setattr__(self, key, coerced)
+            if self.extra:
+                self.extra.pop(key, None)
+
+    @classmethod
+    def coerce(cls, name: str, value: Any) -> Any:
+        """value as it would be stored for field `name` (raw if it cannot be coerced)."""
+        fn = cls.SCHEMA.get(name)
+        if fn is None:
+            return value
+        try:
+            return fn(value)
+        except (TypeError, ValueError):
+            return value
+
+    def invalid_fields(self) -> Dict[str, Any]:
+        """Schema fields whose value could not be coerced, kept raw in `extra`."""
+        return {k: v for k, v in self.extra.items() if k in self.SCHEMA}
+
+    def get(self, name: str, default: Any = None) -> Any:
+        if name in self.SCHEMA:
+            value = getattr(self, name)
+            return default if value is _UNSET else value
+        return self.extra.get(name, default)
+
+    def has(self, name: str) -> bool:
+        if name in self.SCHEMA:
+            return getattr(self, name) is not _UNSET
+        return name in self.extra
+
+    def unset(self, name: str):
+        if name in self.SCHEMA:
+            object.__setattr__(self, name, _UNSET)
+        else:
+            self.extra.pop(name, None)
+
+    def keys(self) -> Iterable[str]:
+        for name in self.SCHEMA:
+            if getattr(self, name) is not _UNSET:
+                yield name
+        yield from self.extra
+
+    def to_dict(self, copy_nested: bool = True) -> Dict[str, Any]:
+        """
+        Plain dict in the stored JSON shape. Nested payloads are copied so callers
+        may mutate the result; pass copy_nested=False when only serializing it.
+        """
+        out: Dict[str, Any] = {}
+        for name in self.SCHEMA:
+            value = getattr(self, name)
+            if value is not _UNSET:
+                out[name] = value
+        if copy_nested:
+            for name in self.NESTED:
+                if name in out:
+                    out[name] = _payload(out[name])
+            if self.extra:
+                out.update(copy.deepcopy(self.extra))
+        else:
+            out.update(self.extra)
+        return out
+
+    def copy(self):
+        return type(self).from_dict(self.to_dict())
+
+    def __reduce__(self):
+        # pickle (shard event queue) as the plain dict; _UNSET is not picklable by identity
+        return (type(self).from_dict, (self.to_dict(copy_nested=False),))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+# -------------------- trades --------------------
+class TradeRecord(Record):
+    __slots__ = (
+        "id", "account_id", "account_name", "symbol", "side", "qty",
+        "entry_price", "entry_time", "exit_price", "exit_time",
+        "open", "simulated", "stop_loss_price", "take_profit_price",
+        "elapsed", "elapsed_seconds", "profit_pct", "label", "resp_summary",
+        "exit_breach_pct", "exit_submit_ms", "exit_fill_ms", "entry_latency", "exit_latency",
+    )
+
+    SCHEMA = {
+        "id": _str,
+        "account_id": _str,
+        "account_name": _str,
+        "symbol": _str,
+        "side": _str,
+        "qty": _float,
+        "entry_price": _float,
+        "entry_time": _str,
+        "exit_price": _float,
+        "exit_time": _str,
+        "open": _bool,
+        "simulated": _bool,
+        "stop_loss_price": _float,
+        "take_profit_price": _float,
+        "elapsed": _str,
+        "elapsed_seconds": _int,
+        "profit_pct": _float,
+        "label": _str,
+        "resp_summary": _payload,  # made JSON-safe by the caller (exchange payload)
+        # exit fan-out: how far past SL/TP the trigger price was, trigger -> send, send -> response
+        "exit_breach_pct": _float,
+        "exit_submit_ms": _float,
+        "exit_fill_ms": _float,
+        # latency.LatencyTrace.to_dict(): monotonic stamps + stage durations
+        "entry_latency": _payload,
+        "exit_latency": _payload,
+    }
+    NESTED = ("resp_summary", "entry_latency", "exit_latency")
+
+    # Fields exposed by the history API (routes.history_routes.TradeOut)
+    API_FIELDS = (
+        "id", "symbol", "side", "qty", "price", "status", "profit", "created_at",
+        "entry_time", "exit_time", "entry_price", "exit_price", "open",
+    )
+
+    def to_api(self) -> Dict[str, Any]:
+        return {name: self.get(name) for name in self.API_FIELDS}
+
+
+# -------------------- accounts --------------------
+class AccountRecord(Record):
+    __slots__ = (
+        "id", "name", "exchange", "api_key", "api_secret", "monitoring", "position",
+        "balance", "last_balance", "validated", "last_validation_error", "last_raw_preview",
+        "current_symbol", "entry_price", "entry_qty", "entry_time", "buy_price",
+        "open_trade_id", "stop_loss_price", "take_profit_price", "score",
+        "paper", "paper_balance", "exit_failures", "last_exit_error",
+    )
+
+    SCHEMA = {
+        "id": _str,
+        "name": _str,
+        "exchange": _str,
+        "api_key": _str,
+        "api_secret": _str,
+        "monitoring": _bool,
+        "position": _str,
+        "balance": _float,
+        "last_balance": _float,
+        "validated": _bool,
+        "last_validation_error": _str,
+        "last_raw_preview": _payload,
+        "current_symbol": _str,
+        "entry_price": _float,
+        "entry_qty": _float,
+        "entry_time": _int,
+        "buy_price": _float,
+        "open_trade_id": _str,
+        "stop_loss_price": _float,
+        "take_profit_price": _float,
+        "score": _int,
+        # paper trading (paper.PaperBroker): no keys needed, cash kept here between restarts
+        "paper": _bool,
+        "paper_balance": _float,
+        # sell orders rejected for the open position; it stays open and is retried next cycle
+        "exit_failures": _int,
+        "last_exit_error": _str,
+    }
+    NESTED = ("last_raw_preview",)
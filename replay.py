@@ -0,0 +1,296 @@
+"""
+Record and replay of exchange client traffic.
+
+RecordingClient wraps an exchange client (pybit HTTP or the async engine's
+AsyncBybitClient) and appends every method call to a CaptureWriter: the method,
+its arguments, how long it took and the response, or the exception it raised.
+The capture is gzip NDJSON, one line per call, with a marker line at the start
+of each scan cycle holding the cycle's wall time and a copy of the accounts
+(credentials removed). Lines are buffered and appended as a complete gzip
+member per cycle, so the file can be read while the bot keeps recording. Each
+process records to its own file: shard workers append ".<shard>" to the path.
+
+ReplayClient feeds a capture back. Calls are matched within the current cycle
+by method and arguments: the first time a call is made it gets the first
+recorded response, the next time the next one, and once they run out the last
+one again. A call whose exact arguments were not recorded falls back to the
+same method for the same symbol, then to earlier cycles. Each answer waits for
+the recorded duration divided by `speed` (0 = no waiting), so a build can be
+run against the same market data at real speed or as fast as it goes.
+bench_replay.py drives whole cycles from a capture.
+"""
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+CAPTURE_VERSION = 1
+# order fields that differ on every call and must not take part in matching
+VOLATILE_ARGS = frozenset({"orderLinkId", "timestamp", "recv_window"})
+_SECRET_FIELDS = ("api_key", "api_secret", "apiKey", "apiSecret", "secretKey", "key", "secret")
+
+
+class ReplayMiss(LookupError):
+    """The capture holds no response for a call."""
+
+
+class ReplayError(RuntimeError):
+    """A call that raised while recording raises this (or TypeError) on replay."""
+
+
+def _jsonable(value: Any) -> Any:
+    return json.loads(json.dumps(value, default=str))
+
+
+def _call_key(method: str, args: Iterable[Any], kwargs: Dict[str, Any]) -> str:
+    kw = {k: v for k, v in kwargs.items() if k not in VOLATILE_ARGS}
+    return json.dumps([method, list(args), kw], sort_keys=True, default=str)
+
+
+def _symbol_key(method: str, args: Iterable[Any], kwargs: Dict[str, Any]) -> str:
+    symbol = kwargs.get("symbol")
+    if symbol is None and isinstance(kwargs.get("params"), dict):
+        symbol = kwargs["params"].get("symbol")
+    if symbol is None:
+        args = list(args)
+        symbol = args[0] if args and isinstance(args[0], str) else None
+    return f"{method}|{symbol}"
+
+
+def sanitize_account(account: Dict[str, Any]) -> Dict[str, Any]:
+    out = {k: v for k, v in account.items() if k not in _SECRET_FIELDS and k != "last_raw_preview"}
+    if not account.get("paper"):
+        # replays run the live code path against the recorded responses
+        out["api_key"] = out["api_secret"] = "replay"
+    return out
+
+
+# -------------------- recording --------------------
+class CaptureWriter:
+    """
+    Buffers capture lines and appends them to `path` as one complete gzip member
+    per flush (at every cycle marker, every `flush_lines` lines, and on close).
+    The file is valid gzip after every flush, so a capture of a bot that is
+    still running, or was killed, loads up to its last flushed cycle.
+    """
+
+    def __init__(self, path: str, flush_lines: int = 5000):
+        self.path = path
+        self.flush_lines = max(1, int(flush_lines))
+        self._lock = threading.Lock()
+        self._pending: List[str] = []
+        self._cycle_start = time.perf_counter()
+        self.cycles = 0
+        self.calls = 0
+        self._write({"v": CAPTURE_VERSION, "started": time.time()})
+
+    def _write(self, record: Dict[str, Any]):
+        self._pending.append(json.dumps(record, separators=(",", ":"), default=str) + "\n")
+        if len(self._pending) >= self.flush_lines:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        data = gzip.compress("".join(self._pending).encode("utf-8"))
+        with open(self.path, "ab") as fh:
+            fh.write(data)
+        self._pending = []
+
+    def mark_cycle(self, accounts: List[Dict[str, Any]]):
+        with self._lock:
+            self._flush_locked()  # the previous cycle is complete on disk
+            self._cycle_start = time.perf_counter()
+            self._write({"c": self.cycles, "w": time.time(), "accounts": [sanitize_account(a) for a in accounts]})
+            self.cycles += 1
+
+    def record(self, method: str, args: Tuple[Any, ...], kwargs: Dict[str, Any], started: float,
+               duration: float, response: Any = None, error: Optional[BaseException] = None):
+        rec: Dict[str, Any] = {
+            "m": method,
+            "a": _jsonable(list(args)),
+            "k": _jsonable(kwargs),
+            "t": round(started - self._cycle_start, 6),
+            "d": round(duration, 6),
+        }
+        if error is not None:
+            rec["x"] = type(error).__name__
+            rec["e"] = str(error)
+        else:
+            rec["r"] = response
+        with self._lock:
+            self._write(rec)
+            self.calls += 1
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        # nothing stays open between flushes; recording may resume after a restart
+        self.flush()
+
+
+class RecordingClient:
+    """Proxy that records each method call of `inner` to `writer`."""
+
+    def __init__(self, inner: Any, writer: CaptureWriter):
+        self._inner = inner
+        self._writer = writer
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._inner, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+        writer = self._writer
+
+        if asyncio.iscoroutinefunction(attr):
+            async def recorded_async(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    resp = await attr(*args, **kwargs)
+                except Exception as e:
+                    writer.record(name, args, kwargs, started, time.perf_counter() - started, error=e)
+                    raise
+                writer.record(name, args, kwargs, started, time.perf_counter() - started, response=resp)
+                return resp
+            return recorded_async
+
+        def recorded(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                resp = attr(*args, **kwargs)
+            except Exception as e:
+                writer.record(name, args, kwargs, started, time.perf_counter() - started, error=e)
+                raise
+            writer.record(name, args, kwargs, started, time.perf_counter() - started, response=resp)
+            return resp
+        return recorded
+
+
+# -------------------- replay --------------------
+class _Cycle:
+    __slots__ = ("index", "wall", "accounts", "exact", "loose", "served")
+
+    def __init__(self, index: int, wall: Optional[float], accounts: List[Dict[str, Any]]):
+        self.index = index
+        self.wall = wall
+        self.accounts = accounts
+        self.exact: Dict[str, List[Dict[str, Any]]] = {}
+        self.loose: Dict[str, List[Dict[str, Any]]] = {}
+        self.served: Dict[str, int] = {}
+
+
+class Capture:
+    """A capture file loaded for replay: its cycles and their recorded calls."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.cycles: List[_Cycle] = []
+        self.methods = set()
+        current = _Cycle(0, None, [])  # calls made before the first cycle marker
+        self.truncated = False
+        for rec in self._records(path):
+            if "c" in rec:
+                if current.exact or current.accounts or self.cycles:
+                    self.cycles.append(current)
+                current = _Cycle(len(self.cycles), rec.get("w"), rec.get("accounts") or [])
+            elif "m" in rec:
+                self.methods.add(rec["m"])
+                current.exact.setdefault(_call_key(rec["m"], rec["a"], rec["k"]), []).append(rec)
+                current.loose.setdefault(_symbol_key(rec["m"], rec["a"], rec["k"]), []).append(rec)
+        self.cycles.append(current)
+
+    def _records(self, path: str) -> Iterator[Dict[str, Any]]:
+        """Records in file order; a torn tail (writer killed mid-flush) ends the capture."""
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            while True:
+                try:
+                    line = fh.readline()
+                except (EOFError, OSError, zlib.error):
+                    self.truncated = True
+                    return
+                if not line:
+                    return
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # the last line of a torn member
+                    self.truncated = True
+                    return
+
+
+class ReplayClient:
+    """
+    Stand-in for an exchange client answering from a Capture. Exposes only the
+    methods present in the capture, so method probing behaves as it did live.
+    """
+
+    def __init__(self, capture: Capture, speed: float = 0.0, asynchronous: bool = False):
+        self.capture = capture
+        self.speed = float(speed)
+        self.asynchronous = asynchronous
+        self.api_key = "replay"
+        self._lock = threading.Lock()
+        self._cycle = capture.cycles[0]
+        self.calls = 0
+        self.misses = 0
+
+    def start_cycle(self, index: int) -> _Cycle:
+        with self._lock:
+            self._cycle = self.capture.cycles[index]
+            self._cycle.served.clear()
+            return self._cycle
+
+    def _lookup(self, method: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        exact = _call_key(method, _jsonable(list(args)), _jsonable(kwargs))
+        loose = _symbol_key(method, args, kwargs)
+        with self._lock:
+            self.calls += 1
+            cycles = self.capture.cycles[:self._cycle.index + 1]
+            for cycle in reversed(cycles):
+                for key, table in ((exact, cycle.exact), (loose, cycle.loose)):
+                    recs = table.get(key)
+                    if recs:
+                        if cycle is self._cycle:
+                            n = cycle.served.get(key, 0)
+                            cycle.served[key] = n + 1
+                            return recs[min(n, len(recs) - 1)]
+                        return recs[-1]
+            self.misses += 1
+        raise ReplayMiss(f"no recorded response for {method} {list(args)} {kwargs}")
+
+    @staticmethod
+    def _result(rec: Dict[str, Any]) -> Any:
+        if "x" in rec:
+            if rec["x"] == "TypeError":
+                raise TypeError(rec.get("e"))
+            raise ReplayError(f"{rec['x']}: {rec.get('e')}")
+        return rec.get("r")
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_") or name not in self.capture.methods:
+            raise AttributeError(name)
+
+        if self.asynchronous:
+            async def replayed_async(*args, **kwargs):
+                rec = self._lookup(name, args, kwargs)
+                if self.speed > 0:
+                    await asyncio.sleep(rec.get("d", 0.0) / self.speed)
+                return self._result(rec)
+            return replayed_async
+
+        def replayed(*args, **kwargs):
+            rec = self._lookup(name, args, kwargs)
+            if self.speed > 0:
+                time.sleep(rec.get("d", 0.0) / self.speed)
+            return self._result(rec)
+        return replayed
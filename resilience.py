@@ -0,0 +1,221 @@
+"""
+Retry and circuit-breaker primitives for exchange calls.
+
+- RetryPolicy: jittered exponential backoff bounded by attempts and a deadline
+- RetryBudget: caps retries to a fraction of successful traffic
+- CircuitBreaker: fails fast while an endpoint keeps failing
+- BreakerRegistry: one breaker per (endpoint, account)
+"""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an endpoint whose breaker is open."""
+
+
+# -------------------- Circuit breaker --------------------
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        """True if a call may go through. Half-open lets a single probe in."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._maybe_half_open()
+            retry_in = 0.0
+            if self._state == self.OPEN:
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+            return {"state": self._state, "failures": self._failures, "retry_in": round(retry_in, 2)}
+
+
+class BreakerRegistry:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    def get(self, endpoint: str, account_id: Optional[str] = None) -> CircuitBreaker:
+        key = (endpoint, account_id or "-")
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self._breakers[key] = breaker
+            return breaker
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            items = list(self._breakers.items())
+        return {f"{ep}:{acct}": b.snapshot() for (ep, acct), b in items}
+
+
+# -------------------- Retry budget --------------------
+class RetryBudget:
+    """
+    Token budget for retries: every first attempt deposits `ratio` tokens and
+    every retry withdraws one, so retries stay a bounded share of traffic.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_tokens: float = 10.0, max_tokens: float = 50.0):
+        self.ratio = float(ratio)
+        self.max_tokens = float(max_tokens)
+        self._tokens = float(min_tokens)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
+
+
+# -------------------- Retry policy --------------------
+class RetryPolicy:
+    def __init__(self, attempts: int = 3, base_delay: float = 0.25, max_delay: float = 4.0, deadline: float = 8.0):
+        self.attempts = max(1, int(attempts))
+        self.base_delay = float(base_delay)
+        self.max_delay = float(max_delay)
+        self.deadline = float(deadline)
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential delay for the given (0-based) failed attempt."""
+        cap = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(0.0, cap)
+
+    def call(
+        self,
+        fn: Callable[[], Any],
+        breaker: Optional[CircuitBreaker] = None,
+        budget: Optional[RetryBudget] = None,
+        attempts: Optional[int] = None,
+        sleep: Callable[[float], Any] = time.sleep,
+    ) -> Any:
+        attempts = self.attempts if attempts is None else max(1, int(attempts))
+        started = time.monotonic()
+        if budget is not None:
+            budget.deposit()
+        last_exc: Optional[Exception] = None
+        for i in range(attempts):
+            if breaker is not None and not breaker.allow():
+                if last_exc is not None:
+                    raise last_exc
+                raise CircuitOpenError("circuit open")
+            try:
+                result = fn()
+            except Exception as e:
+                last_exc = e
+                if breaker is not None:
+                    breaker.record_failure()
+                if i + 1 >= attempts:
+                    raise
+                delay = self.backoff(i)
+                if time.monotonic() - started + delay > self.deadline:
+                    raise
+                if budget is not None and not budget.try_withdraw():
+                    raise
+                sleep(delay)
+                continue
+            if breaker is not None:
+                breaker.record_success()
+            return result
+        raise last_exc or RuntimeError("retry loop exhausted")
+
+    async def call_async(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        breaker: Optional[CircuitBreaker] = None,
+        budget: Optional[RetryBudget] = None,
+        attempts: Optional[int] = None,
+    ) -> Any:
+        """Same semantics as call(), for coroutine factories; backoff uses asyncio.sleep."""
+        import asyncio  # only async callers pay for the import
+
+        attempts = self.attempts if attempts is None else max(1, int(attempts))
+        started = time.monotonic()
+        if budget is not None:
+            budget.deposit()
+        last_exc: Optional[Exception] = None
+        for i in range(attempts):
+            if breaker is not None and not breaker.allow():
+                if last_exc is not None:
+                    raise last_exc
+                raise CircuitOpenError("circuit open")
+            try:
+                result = await fn()
+            except Exception as e:
+                last_exc = e
+                if breaker is not None:
+                    breaker.record_failure()
+                if i + 1 >= attempts:
+                    raise
+                delay = self.backoff(i)
+                if time.monotonic() - started + delay > self.deadline:
+                    raise
+                if budget is not None and not budget.try_withdraw():
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            if breaker is not None:
+                breaker.record_success()
+            return result
+        raise last_exc or RuntimeError("retry loop exhausted")
@@ -0,0 +1,71 @@
+"""
+Version-keyed JSON response cache with ETag / 304 support for the read APIs.
+
+Entries are keyed on (path, query string, extra) and tagged with the state
+version (BotController.state_version) they were built at. A request whose
+If-None-Match matches the current tag gets an empty 304 without building or
+serializing anything; otherwise the cached body is reused until the version
+moves.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Optional, Tuple
+
+if TYPE_CHECKING:
+    # fastapi is imported in respond(), so importing app_state (and the
+    # services) does not pull in the web stack
+    from fastapi import Request, Response
+
+# ETags must not survive a restart: versions start from zero again
+_BOOT_ID = uuid.uuid4().hex[:8]
+
+
+class ResponseCache:
+    def __init__(self, version: Callable[[], int], max_entries: int = 256):
+        self.version = version
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[int, bytes]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def _etag(key: Tuple[str, str, str], version: int) -> str:
+        digest = hashlib.blake2s(repr(key).encode("utf-8"), digest_size=6).hexdigest()
+        return f'W/"{_BOOT_ID}-{version}-{digest}"'
+
+    def respond(self, request: Request, build: Callable[[], Any], extra: Optional[str] = None) -> Response:
+        """Serve build()'s JSON for this request, from cache or as a 304 when possible."""
+        from fastapi import Response
+        from fastapi.encoders import jsonable_encoder
+
+        key = (request.url.path, str(request.url.query), extra or "")
+        version = self.version()
+        etag = self._etag(key, version)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return Response(entry[1], media_type="application/json", headers=headers)
+        self.misses += 1
+        body = json.dumps(jsonable_encoder(build()), separators=(",", ":")).encode("utf-8")
+        with self._lock:
+            self._entries[key] = (version, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return Response(body, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "not_modified": self.not_modified}
@@ -1,6 +1,14 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from services.accounts_service import get_accounts, add_account, delete_account, test_account
+import json
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+from app_state import response_cache
+from services.accounts_service import (
+    get_accounts, add_account, add_paper_accounts, delete_account, remove_paper_accounts, test_account,
+    test_accounts,
+)
 
 # Create router
 router = APIRouter()
@@ -14,15 +22,24 @@ class AccountModel(BaseModel):
     apiKey: str
     secretKey: str
 
+class PaperAccountsModel(BaseModel):
+    count: int = Field(1, ge=1, le=1000)
+    balance: Optional[float] = Field(None, gt=0)  # default: paperBalance from config
+    prefix: str = "paper"
+
+class BulkTestModel(BaseModel):
+    ids: Optional[List[str]] = None  # default: every account
+    concurrency: Optional[int] = Field(None, ge=1, le=64)  # default: validateConcurrency from config
+
 # -----------------------
 # Routes
 # -----------------------
 
 @router.get("/")
-def list_accounts():
+def list_accounts(request: Request):
     """Get all saved trading accounts."""
     try:
-        return get_accounts()
+        return response_cache.respond(request, get_accounts)
     except Exception as e:
         print(f"❌ Error listing accounts: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -39,6 +56,25 @@ def create_account(data: AccountModel):
         # Return success=False so frontend can show the error message
         return {"success": False, "message": str(e)}
 
+@router.post("/paper")
+def create_paper_accounts(data: PaperAccountsModel):
+    """Create paper (simulated) accounts for soak tests."""
+    result = add_paper_accounts(data.count, data.balance, data.prefix)
+    return {"success": True, "message": f"{result['count']} paper accounts added", **result}
+
+@router.delete("/paper")
+def delete_paper_accounts():
+    """Delete all paper accounts."""
+    result = remove_paper_accounts()
+    return {"success": True, "message": f"{result['count']} paper accounts deleted", "count": result["count"]}
+
+@router.post("/test")
+def test_connections(data: Optional[BulkTestModel] = None):
+    """Test many accounts concurrently; streams one NDJSON line per account, then a summary."""
+    data = data or BulkTestModel()
+    lines = (json.dumps(result, default=str) + "\n" for result in test_accounts(data.ids, data.concurrency))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
 @router.delete("/{account_id}")
 def remove_account(account_id: str):
     """Delete an account by ID."""
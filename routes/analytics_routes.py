@@ -0,0 +1,53 @@
+from typing import Optional
+
+from fastapi import APIRouter, Query
+
+# services.analytics_service pulls in pandas; it is imported by the handlers
+# on first use so app startup does not pay for it.
+
+router = APIRouter()
+
+
+@router.get("/")
+def analytics():
+    """
+    Performance report over the whole trade history: summary, per-account and
+    per-symbol stats, holding-time distribution and exit label breakdown.
+    """
+    from services.analytics_service import get_report
+    return get_report()
+
+
+@router.get("/accounts")
+def analytics_accounts():
+    from services.analytics_service import get_report
+    return get_report()["by_account"]
+
+
+@router.get("/symbols")
+def analytics_symbols():
+    from services.analytics_service import get_report
+    return get_report()["by_symbol"]
+
+
+@router.get("/equity")
+def analytics_equity(
+    account_id: Optional[str] = Query(None),
+    symbol: Optional[str] = Query(None, description="e.g. BTCUSDT"),
+    points: int = Query(500, ge=2, le=5000),
+):
+    """
+    Equity curve and max drawdown over closed trades, optionally for one account or symbol.
+    """
+    from services.analytics_service import equity_curve
+    return equity_curve(account_id=account_id, symbol=symbol, points=points)
+
+
+@router.get("/latency")
+def analytics_latency(by: str = Query("symbol", pattern="^(symbol|account|all)$")):
+    """
+    Histograms of signal -> submit -> ack -> fill latency for entries and exits,
+    per symbol, per account or overall.
+    """
+    from services.latency_service import get_latency
+    return get_latency(by)
@@ -1,12 +1,75 @@
-from fastapi import APIRouter
-from services.bot_service import get_status, start_bot, stop_bot
+import hmac
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+
+from profiler import ProfilerBusy, ProfilerUnavailable
+from services.bot_service import get_markets, get_signals, get_status, start_bot, stop_bot
 
 router = APIRouter()
 
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Admin-only endpoints need X-Admin-Token to match ADMIN_TOKEN; unset disables them."""
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=403, detail="admin endpoints are disabled (ADMIN_TOKEN is not set)")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), expected.encode()):
+        raise HTTPException(status_code=401, detail="invalid admin token")
+
+
 @router.get("/status")
 def bot_status():
     return get_status()
 
+@router.get("/signals")
+def signals(min_score: int = Query(0, ge=0)):
+    return get_signals(min_score)
+
+@router.get("/markets")
+def markets(top: int = Query(20, ge=1, le=1000)):
+    return get_markets(top)
+
+@router.post("/profile", dependencies=[Depends(require_admin)])
+def profile(
+    mode: str = Query("profile", pattern="^(profile|sample)$"),
+    scans: int = Query(1, ge=1, le=20, description="profile: scan cycles to profile"),
+    timeout: float = Query(120.0, gt=0, le=600, description="profile: max seconds to wait for them"),
+    sort: str = Query("cumulative", pattern="^(cumulative|tottime|ncalls|name|filename)$"),
+    limit: int = Query(50, ge=1, le=1000),
+    format: str = Query("text", pattern="^(text|pstats)$"),
+    seconds: float = Query(10.0, gt=0, le=300, description="sample: sampling window"),
+    interval_ms: float = Query(5.0, ge=1, le=1000, description="sample: time between samples"),
+):
+    """
+    profile: cProfile the next `scans` scan cycles and return the pstats report
+    (format=pstats returns the raw stats for pstats/snakeviz).
+    sample: sample the scan thread's stack for `seconds` and return collapsed
+    stacks for flamegraph.pl / speedscope.
+    """
+    from services.profile_service import profile_scans, sample_stacks
+
+    try:
+        if mode == "sample":
+            meta, body = sample_stacks(seconds, interval_ms)
+            headers = {"X-Profile-Samples": str(meta["samples"]), "X-Profile-Seconds": str(meta["seconds"])}
+            return PlainTextResponse(body, headers=headers)
+        meta, body = profile_scans(scans, timeout, sort, limit, raw=format == "pstats")
+    except (ProfilerBusy, ProfilerUnavailable) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if body is None:
+        raise HTTPException(status_code=504, detail=f"no scan cycle finished within {timeout:g}s")
+    headers = {
+        "X-Profile-Scans": f"{meta['scans']}/{meta['requested']}",
+        "X-Profile-Scan-Seconds": ",".join(str(s) for s in meta["scan_seconds"]),
+    }
+    if format == "pstats":
+        headers["Content-Disposition"] = 'attachment; filename="scan.prof"'
+        return Response(body, media_type="application/octet-stream", headers=headers)
+    return PlainTextResponse(body, headers=headers)
+
 @router.post("/start")
 def start():
     return start_bot()
@@ -1,12 +1,15 @@
 # routes/dashboard_router.py
 
-from fastapi import APIRouter
+from datetime import datetime
+
+from fastapi import APIRouter, Request
+from app_state import response_cache
 from services.dashboard_service import get_dashboard_data
 
 router = APIRouter()
 
 @router.get("/")
-def dashboard():
+def dashboard(request: Request):
     """
     Returns live dashboard statistics for the frontend.
     Example:
@@ -17,4 +20,5 @@ def dashboard():
         "dailyChange": 3.1
     }
     """
-    return get_dashboard_data()
+    # today's PnL also changes at the UTC day boundary, without any write
+    return response_cache.respond(request, get_dashboard_data, extra=datetime.utcnow().strftime("%Y-%m-%d"))
@@ -1,11 +1,17 @@
 # routes/history_routes.py
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Query, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from pydantic import BaseModel
+from app_state import response_cache
+from records import TradeRecord
 from services.history_service import (
     get_trades,
+    get_trades_page,
     get_trade_by_id,
     append_trade,
+    export_csv,
+    export_ndjson,
 )
 
 router = APIRouter(tags=["History"])
@@ -36,6 +42,7 @@ class PaginatedTrades(BaseModel):
 
 @router.get("/", response_model=PaginatedTrades)
 def list_trades(
+    request: Request,
     limit: int = Query(50, ge=1, le=1000),
     offset: int = Query(0, ge=0),
     symbol: Optional[str] = Query(None, description="Filter by trading pair, e.g. BTCUSDT"),
@@ -44,19 +51,71 @@ def list_trades(
     """
     List trade history (paginated).
     """
-    trades, total = get_trades(limit=limit, offset=offset, symbol=symbol, status=status)
-    return {"total": total, "limit": limit, "offset": offset, "trades": trades}
+    def build():
+        trades, total = get_trades(limit=limit, offset=offset, symbol=symbol, status=status)
+        # shape rows via the record schema instead of validating each one with pydantic
+        rows = [TradeRecord.from_dict(t).to_api() for t in trades]
+        return {"total": total, "limit": limit, "offset": offset, "trades": rows}
+
+    return response_cache.respond(request, build)
+
+
+@router.get("/page")
+def list_trades_page(
+    request: Request,
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    symbol: Optional[str] = Query(None, description="Filter by trading pair, e.g. BTCUSDT"),
+    status: Optional[str] = Query(None, description="Filter by trade status"),
+):
+    """
+    Cursor-paginated trade history, newest first by (entry_time, id).
+    Rows are returned as stored, without per-row model validation.
+    """
+    def build():
+        try:
+            trades, next_cursor = get_trades_page(limit=limit, cursor=cursor, symbol=symbol, status=status)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"limit": limit, "next_cursor": next_cursor, "trades": trades}
+
+    return response_cache.respond(request, build)
+
+
+@router.get("/export")
+def export_trades(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    symbol: Optional[str] = Query(None, description="Filter by trading pair, e.g. BTCUSDT"),
+    status: Optional[str] = Query(None, description="Filter by trade status"),
+):
+    """
+    Stream the full trade history as NDJSON or CSV.
+    """
+    if format == "csv":
+        return StreamingResponse(
+            export_csv(symbol=symbol, status=status),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="trades.csv"'},
+        )
+    return StreamingResponse(
+        export_ndjson(symbol=symbol, status=status),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="trades.ndjson"'},
+    )
 
 
 @router.get("/{trade_id}", response_model=TradeOut)
-def get_trade(trade_id: str):
+def get_trade(trade_id: str, request: Request):
     """
     Return a single trade by id.
     """
-    t = get_trade_by_id(trade_id)
-    if not t:
-        raise HTTPException(status_code=404, detail="Trade not found")
-    return t
+    def build():
+        t = get_trade_by_id(trade_id)
+        if not t:
+            raise HTTPException(status_code=404, detail="Trade not found")
+        return TradeRecord.from_dict(t).to_api()
+
+    return response_cache.respond(request, build)
 
 
 @router.post("/", response_model=TradeOut)
@@ -66,4 +125,4 @@ def create_trade(payload: dict):
     The payload should contain at least 'id' or will be auto-generated by the service.
     """
     t = append_trade(payload)
-    return t
+    return TradeRecord.from_dict(t).to_api()
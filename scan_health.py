@@ -0,0 +1,180 @@
+"""
+Scan-cycle health and overload shedding.
+
+ScanHealth times every cycle of the run loop and its phases (exits, signals,
+accounts, persist), keeps the cycle rate over the last minute and how far the
+loop runs behind its scanInterval schedule, and counts the symbols whose klines
+could not be fetched or that were skipped, and the exits whose sell failed (the
+position stays open and is retried next cycle).
+
+When a scoring cycle overruns the interval, the share of the symbol universe
+that gets scored is cut in proportion to the overrun (never below
+min_fraction), so the loop catches up instead of drifting further behind.
+Cycles that reuse the candle's signals score nothing, so their overruns leave
+the share alone: cutting it would not make them any shorter. The symbols kept are half
+the best scorers of the previous build and half a rotation through the rest, so
+every symbol is still scored every few builds. Scoring cycles that finish well
+inside the interval grow the share back step by step.
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+SHRINK_MARGIN = 0.9  # aim a little below the interval after an overrun
+GROW_BELOW = 0.5  # a scoring cycle under this share of the interval may grow the budget
+GROW_FACTOR = 1.25
+
+
+class ScanHealth:
+    def __init__(self, interval_s: float, shed: bool = True, min_fraction: float = 0.25,
+                 clock: Callable[[], float] = time.monotonic):
+        self.interval_s = max(0.001, float(interval_s))
+        self.shed = bool(shed)
+        self.min_fraction = min(1.0, max(0.01, float(min_fraction)))
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.fraction = 1.0  # share of the universe scored per build
+        self._cursor = 0  # rotation through the symbols outside the top scorers
+        self._ends: Deque[float] = deque()  # cycle end times within the last minute
+        self._next_due: Optional[float] = None
+        self._started: Optional[float] = None
+        self._lag = 0.0
+        self._phases: Dict[str, float] = {}
+        self._failed = 0
+        self._skipped = 0
+        self._exits_failed = 0
+        self._scored = False
+        self.cycles = 0
+        self.overruns = 0
+        self.errors = 0
+        self.symbols_failed = 0
+        self.symbols_skipped = 0
+        self.exits_failed = 0
+        self.last: Dict[str, Any] = {}
+
+    # ------------------ cycle bookkeeping ------------------
+    def begin_cycle(self, interval_s: Optional[float] = None):
+        now = self.clock()
+        with self._lock:
+            if interval_s is not None:
+                self.interval_s = max(0.001, float(interval_s))  # scanInterval can change at runtime
+            self._started = now
+            self._lag = max(0.0, now - self._next_due) if self._next_due is not None else 0.0
+            self._phases = {}
+            self._failed = self._skipped = self._exits_failed = 0
+            self._scored = False
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Add the time spent in the block to phase `name` of the current cycle."""
+        started = self.clock()
+        try:
+            yield
+        finally:
+            elapsed = self.clock() - started
+            with self._lock:
+                self._phases[name] = self._phases.get(name, 0.0) + elapsed
+
+    def end_cycle(self, error: Optional[str] = None) -> float:
+        """Close the cycle, adapt the scoring share, and return the cycle duration."""
+        now = self.clock()
+        with self._lock:
+            started = self._started if self._started is not None else now
+            duration = now - started
+            self.cycles += 1
+            self.errors += bool(error)
+            self._ends.append(now)
+            while self._ends and now - self._ends[0] > 60.0:
+                self._ends.popleft()
+            # due one interval after this start; an overrun makes the next cycle late by its excess
+            self._next_due = started + self.interval_s
+            overrun = duration > self.interval_s
+            self.overruns += overrun
+            self._adapt(duration, overrun)
+            self.last = {
+                "duration_s": round(duration, 3),
+                "phases_s": {name: round(sec, 3) for name, sec in self._phases.items()},
+                "lag_s": round(self._lag, 3),
+                "overrun": overrun,
+                "symbols_failed": self._failed,
+                "symbols_skipped": self._skipped,
+                "exits_failed": self._exits_failed,
+                "error": error,
+            }
+            self._started = None
+            return duration
+
+    def _adapt(self, duration: float, overrun: bool):
+        if not self.shed:
+            self.fraction = 1.0
+        elif not self._scored:
+            return  # shrinking and growing are both judged on cycles that scored
+        elif overrun:
+            self.fraction = max(self.min_fraction, self.fraction * self.interval_s / duration * SHRINK_MARGIN)
+        elif duration < self.interval_s * GROW_BELOW:
+            self.fraction = min(1.0, self.fraction * GROW_FACTOR)
+
+    def record_failed(self, count: int):
+        with self._lock:
+            self._failed += count
+            self.symbols_failed += count
+
+    def record_exit_failed(self):
+        with self._lock:
+            self._exits_failed += 1
+            self.exits_failed += 1
+
+    # ------------------ shedding ------------------
+    def pick_symbols(self, symbols: Sequence[str],
+                     last_scores: Optional[Mapping[str, int]] = None) -> Tuple[List[str], List[str]]:
+        """
+        The symbols to score this build and the ones shed, both in universe order.
+        Everything is scored unless an overrun has lowered the share.
+        """
+        with self._lock:
+            self._scored = True
+            budget = len(symbols) if self.fraction >= 1.0 else max(1, math.ceil(len(symbols) * self.fraction))
+            if budget >= len(symbols):
+                return list(symbols), []
+            scores = last_scores or {}
+            top = sorted(symbols, key=lambda s: -scores.get(s, -1))[:budget // 2] if scores else []
+            keep = set(top)
+            rest = [s for s in symbols if s not in keep]
+            for i in range(budget - len(keep)):
+                keep.add(rest[(self._cursor + i) % len(rest)])
+            self._cursor = (self._cursor + budget - len(top)) % max(1, len(rest))
+            picked = [s for s in symbols if s in keep]
+            skipped = [s for s in symbols if s not in keep]
+            self._skipped += len(skipped)
+            self.symbols_skipped += len(skipped)
+            return picked, skipped
+
+    def shedding(self) -> bool:
+        return self.fraction < 1.0
+
+    # ------------------ report ------------------
+    def snapshot(self) -> Dict[str, Any]:
+        now = self.clock()
+        with self._lock:
+            recent = [t for t in self._ends if now - t <= 60.0]
+            lag = self._lag if self._started is not None else self.last.get("lag_s", 0.0)
+            return {
+                "interval_s": self.interval_s,
+                "cycles": self.cycles,
+                "cycles_per_minute": len(recent),
+                "in_cycle_s": round(now - self._started, 3) if self._started is not None else None,
+                "lag_s": round(lag, 3),
+                "overruns": self.overruns,
+                "errors": self.errors,
+                "last_cycle": dict(self.last) or None,
+                "symbols_failed": self.symbols_failed,
+                "symbols_skipped": self.symbols_skipped,
+                "exits_failed": self.exits_failed,
+                "scoring_fraction": round(self.fraction, 3),
+                "shedding": self.fraction < 1.0,
+            }
@@ -1,15 +1,15 @@
 import os
 import json
+import time
 import uuid
-from typing import List, Dict
-from app_state import bc
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional
+from app_state import get_bc
+from bot_fib_scoring import TRADE_SETTINGS
 
 # Path to the accounts file your service THINKS is used
 ACCOUNTS_FILE_PATH = "app/data/accounts.json"
 
-# Ensure accounts directory exists on startup
-os.makedirs(os.path.dirname(ACCOUNTS_FILE_PATH), exist_ok=True)
-
 def debug_print(*args):
     print("\n🔍 DEBUG:", *args)
 
@@ -23,12 +23,14 @@ def read_raw_file():
 
 def get_accounts() -> List[Dict]:
     """Retrieve all saved accounts using BotController."""
+    bc = get_bc()
     acc = bc.load_accounts()
     debug_print("GET ACCOUNTS → bc.load_accounts() returned:", acc)
     return acc
 
 
 def add_account(data: dict) -> Dict:
+    bc = get_bc()
     debug_print("ADDING ACCOUNT → incoming data:", data)
 
     # Normalize keys
@@ -52,6 +54,7 @@ def add_account(data: dict) -> Dict:
     data.setdefault("position", "closed")
 
     # Ensure file exists
+    os.makedirs(os.path.dirname(ACCOUNTS_FILE_PATH), exist_ok=True)
     if not os.path.exists(ACCOUNTS_FILE_PATH):
         debug_print("accounts.json does NOT exist — creating it now.")
         with open(ACCOUNTS_FILE_PATH, "w") as f:
@@ -90,6 +93,7 @@ def add_account(data: dict) -> Dict:
 
 
 def delete_account(account_id: str) -> Dict:
+    bc = get_bc()
     with bc._file_lock:
         accounts = bc.load_accounts()
         debug_print("DELETE ACCOUNT → Before:", accounts)
@@ -106,7 +110,52 @@ def delete_account(account_id: str) -> Dict:
     return {"status": "not_found", "id": account_id}
 
 
+def add_paper_accounts(count: int, balance: Optional[float] = None, prefix: str = "paper") -> Dict:
+    """
+    Create `count` paper accounts: no API keys, virtual balance, fills simulated
+    by the bot's PaperBroker. Meant for soak-testing strategy changes under load.
+    """
+    bc = get_bc()
+    with bc._file_lock:
+        accounts = bc.load_accounts()
+        taken = {a.get("name") for a in accounts}
+        created = []
+        n = 0
+        while len(created) < count:
+            n += 1
+            name = f"{prefix}-{n}"
+            if name in taken:
+                continue
+            acct = {
+                "id": str(uuid.uuid4()),
+                "name": name,
+                "exchange": "paper",
+                "paper": True,
+                "monitoring": True,
+                "position": "closed",
+            }
+            if balance is not None:
+                acct["paper_balance"] = float(balance)
+            created.append(acct)
+        bc.save_accounts(accounts + created)
+    return {"status": "added", "count": len(created), "ids": [a["id"] for a in created]}
+
+
+def remove_paper_accounts() -> Dict:
+    """Delete every paper account and drop its virtual ledger."""
+    bc = get_bc()
+    with bc._file_lock:
+        accounts = bc.load_accounts()
+        removed = [a.get("id") for a in accounts if a.get("paper")]
+        if removed:
+            bc.save_accounts([a for a in accounts if not a.get("paper")])
+    for account_id in removed:
+        bc.paper.reset(account_id)
+    return {"status": "deleted", "count": len(removed)}
+
+
 def test_account(account_id: str) -> Dict:
+    bc = get_bc()
     accounts = bc.load_accounts()
     debug_print("TEST ACCOUNT → All accounts:", accounts)
 
@@ -134,3 +183,76 @@ def test_account(account_id: str) -> Dict:
 
     else:
         return {"id": account_id, "connection": "failed", "reason": err}
+
+
+def test_accounts(account_ids: Optional[List[str]] = None, concurrency: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Validate many accounts at once (all of them when account_ids is None).
+    Yields one result per account as it finishes, in the shape of test_account,
+    then a summary {"done": True, ...}. Wallet calls go through the bot's
+    per-key rate limiter; `concurrency` caps how many are in flight. The
+    outcomes are written to accounts.json in one save at the end, also when
+    the client stops reading early.
+    """
+    bc = get_bc()
+    started = time.perf_counter()
+    accounts = bc.load_accounts()
+    if account_ids is None:
+        selected = [a for a in accounts if a.get("id")]
+        missing: List[str] = []
+    else:
+        by_id = {a.get("id"): a for a in accounts}
+        wanted = list(dict.fromkeys(account_ids))
+        selected = [by_id[i] for i in wanted if i in by_id]
+        missing = [i for i in wanted if i not in by_id]
+
+    for account_id in missing:
+        yield {"id": account_id, "connection": "failed", "reason": "Account not found"}
+
+    workers = max(1, min(int(concurrency or TRADE_SETTINGS.get("validate_concurrency", 16)), len(selected) or 1))
+    outcomes: Dict[str, Dict] = {}
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="validate")
+    try:
+        futures = {pool.submit(bc.validate_account, acct): acct for acct in selected}
+        for fut in as_completed(futures):
+            acct = futures[fut]
+            try:
+                ok, balance, err = fut.result()
+            except Exception as e:
+                ok, balance, err = False, None, str(e)
+            outcomes[acct["id"]] = {"validated": ok, "balance": balance, "last_validation_error": err or None}
+            if ok:
+                yield {"id": acct["id"], "connection": "success", "balance": balance}
+            else:
+                yield {"id": acct["id"], "connection": "failed", "reason": err}
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        saved = _save_validation(bc, outcomes)
+
+    ok_count = sum(1 for o in outcomes.values() if o["validated"])
+    yield {
+        "done": True,
+        "tested": len(outcomes),
+        "success": ok_count,
+        "failed": len(outcomes) - ok_count,
+        "not_found": len(missing),
+        "saved": saved,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def _save_validation(bc, outcomes: Dict[str, Dict]) -> bool:
+    """Apply validation outcomes to the current accounts and save them once."""
+    if not outcomes:
+        return False
+    with bc._file_lock:
+        accounts = bc.load_accounts()
+        touched = False
+        for a in accounts:
+            outcome = outcomes.get(a.get("id"))
+            if outcome is not None:
+                a.update(outcome)
+                touched = True
+        if touched:
+            bc.save_accounts(accounts)
+    return touched
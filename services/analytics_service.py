@@ -0,0 +1,204 @@
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app_state import get_bc
+from bot_fib_scoring import TRADES_FILE
+from storage import file_signature
+
+# Columns pulled out of each trade record; everything else is ignored
+COLUMNS = [
+    "id", "account_id", "account_name", "symbol", "open", "qty", "entry_price", "exit_price",
+    "entry_time", "exit_time", "profit_pct", "elapsed_seconds", "label", "simulated",
+]
+
+# Holding-time buckets for the elapsed distribution (upper bounds in seconds)
+ELAPSED_BINS = [0, 60, 300, 900, 3600, 4 * 3600, 86400, np.inf]
+ELAPSED_LABELS = ["<1m", "1-5m", "5-15m", "15m-1h", "1-4h", "4h-1d", ">1d"]
+
+_lock = threading.Lock()
+_cache: Dict[str, Any] = {"key": None, "frame": None, "report": None}
+
+
+def _cache_key():
+    # our own writes bump trades_version; the signature catches writers in other processes
+    bc = get_bc()
+    return (bc.trades_version, file_signature(TRADES_FILE), bc.trade_archive.stats()["trades"])
+
+
+def _build_frame() -> pd.DataFrame:
+    """Columnar view of the trade store (live + archive), one pass, no per-row objects kept."""
+    bc = get_bc()
+    cols: Dict[str, List[Any]] = {c: [] for c in COLUMNS}
+    for trade in bc.iter_trades():
+        if not isinstance(trade, dict):
+            continue
+        for c in COLUMNS:
+            cols[c].append(trade.get(c))
+    df = pd.DataFrame(cols)
+    for c in ("qty", "entry_price", "exit_price", "profit_pct", "elapsed_seconds"):
+        df[c] = pd.to_numeric(df[c], errors="coerce")
+    for c in ("entry_time", "exit_time"):
+        df[c] = pd.to_datetime(df[c], errors="coerce")
+    df["open"] = df["open"].eq(True)
+    df["account_id"] = df["account_id"].fillna("unknown").astype(str)
+    df["symbol"] = df["symbol"].fillna("unknown").astype(str)
+    df["label"] = df["label"].fillna("unknown").astype(str)
+    df["pnl"] = (df["exit_price"] - df["entry_price"]) * df["qty"]
+    return df
+
+
+def get_frame() -> pd.DataFrame:
+    """Cached trade frame; rebuilt only after a trade write."""
+    key = _cache_key()
+    with _lock:
+        if _cache["key"] != key or _cache["frame"] is None:
+            _cache["frame"] = _build_frame()
+            _cache["report"] = None
+            _cache["key"] = key
+        return _cache["frame"]
+
+
+def _closed(df: pd.DataFrame) -> pd.DataFrame:
+    closed = df[~df["open"] & df["profit_pct"].notna()]
+    return closed.sort_values("exit_time", kind="mergesort")
+
+
+def _f(value: Any, digits: int = 4) -> Optional[float]:
+    """JSON-safe float (NaN/inf -> None)."""
+    if value is None:
+        return None
+    value = float(value)
+    return round(value, digits) if np.isfinite(value) else None
+
+
+def _drawdown(returns_pct: np.ndarray) -> float:
+    """Max drawdown (%, negative) of the compounded equity built from per-trade returns."""
+    if returns_pct.size == 0:
+        return 0.0
+    equity = np.cumprod(1.0 + returns_pct / 100.0)
+    peaks = np.maximum.accumulate(np.concatenate(([1.0], equity)))[1:]
+    return float(((equity / peaks) - 1.0).min() * 100.0)
+
+
+def _group_stats(closed: pd.DataFrame, by: str) -> List[Dict[str, Any]]:
+    if closed.empty:
+        return []
+    grouped = closed.groupby(by, sort=False)
+    agg = grouped.agg(
+        trades=("profit_pct", "size"),
+        wins=("profit_pct", lambda s: int((s > 0).sum())),
+        avg_profit_pct=("profit_pct", "mean"),
+        total_pnl=("pnl", "sum"),
+        median_elapsed=("elapsed_seconds", "median"),
+    )
+    drawdowns = grouped["profit_pct"].apply(lambda s: _drawdown(s.to_numpy(dtype=float)))
+    out = []
+    for key, row in agg.iterrows():
+        out.append({
+            by: key,
+            "trades": int(row["trades"]),
+            "wins": int(row["wins"]),
+            "win_rate": _f(row["wins"] / row["trades"] * 100.0, 2),
+            "avg_profit_pct": _f(row["avg_profit_pct"]),
+            "total_pnl": _f(row["total_pnl"]),
+            "median_elapsed_seconds": _f(row["median_elapsed"], 1),
+            "max_drawdown_pct": _f(drawdowns.get(key), 4),
+        })
+    out.sort(key=lambda r: r["trades"], reverse=True)
+    return out
+
+
+def _elapsed_distribution(closed: pd.DataFrame) -> Dict[str, Any]:
+    elapsed = closed["elapsed_seconds"].dropna()
+    if elapsed.empty:
+        return {"percentiles": {}, "buckets": {}}
+    q = elapsed.quantile([0.1, 0.25, 0.5, 0.75, 0.9])
+    buckets = pd.cut(elapsed, bins=ELAPSED_BINS, labels=ELAPSED_LABELS, right=False).value_counts(sort=False)
+    return {
+        "percentiles": {f"p{int(k * 100)}": _f(v, 1) for k, v in q.items()},
+        "max": _f(elapsed.max(), 1),
+        "mean": _f(elapsed.mean(), 1),
+        "buckets": {str(k): int(v) for k, v in buckets.items()},
+    }
+
+
+def _labels(closed: pd.DataFrame) -> List[Dict[str, Any]]:
+    if closed.empty:
+        return []
+    agg = closed.groupby("label", sort=False)["profit_pct"].agg(["size", "mean"])
+    total = float(len(closed))
+    return [
+        {"label": label, "trades": int(row["size"]), "share_pct": _f(row["size"] / total * 100.0, 2),
+         "avg_profit_pct": _f(row["mean"])}
+        for label, row in agg.sort_values("size", ascending=False).iterrows()
+    ]
+
+
+def equity_curve(account_id: Optional[str] = None, symbol: Optional[str] = None, points: int = 500) -> Dict[str, Any]:
+    """
+    Compounded equity (start = 1.0, equal allocation per trade) and cumulative
+    quote PnL over closed trades in exit order, downsampled to `points`.
+    """
+    closed = _closed(get_frame())
+    if account_id:
+        closed = closed[closed["account_id"] == account_id]
+    if symbol:
+        closed = closed[closed["symbol"] == symbol]
+    returns = closed["profit_pct"].to_numpy(dtype=float)
+    equity = np.cumprod(1.0 + returns / 100.0) if returns.size else np.array([])
+    pnl = np.nancumsum(closed["pnl"].to_numpy(dtype=float)) if returns.size else np.array([])
+    times = closed["exit_time"]
+    idx = np.arange(returns.size)
+    if returns.size > points > 1:
+        # keep the last point so the curve ends at the current equity
+        idx = np.unique(np.linspace(0, returns.size - 1, points).round().astype(int))
+    curve = [
+        {
+            "time": times.iloc[i].isoformat() if not pd.isna(times.iloc[i]) else None,
+            "equity": _f(equity[i], 6),
+            "cum_pnl": _f(pnl[i]),
+        }
+        for i in idx
+    ]
+    return {
+        "account_id": account_id,
+        "symbol": symbol,
+        "trades": int(returns.size),
+        "final_equity": _f(equity[-1], 6) if returns.size else 1.0,
+        "max_drawdown_pct": _f(_drawdown(returns)),
+        "points": curve,
+    }
+
+
+def get_report() -> Dict[str, Any]:
+    """Full analytics report, cached until the next trade write."""
+    df = get_frame()
+    with _lock:
+        if _cache["report"] is not None and _cache["frame"] is df:
+            return _cache["report"]
+    closed = _closed(df)
+    returns = closed["profit_pct"].to_numpy(dtype=float)
+    wins = int((returns > 0).sum())
+    report = {
+        "summary": {
+            "trades": int(len(df)),
+            "open": int(df["open"].sum()),
+            "closed": int(len(closed)),
+            "wins": wins,
+            "win_rate": _f(wins / len(closed) * 100.0, 2) if len(closed) else None,
+            "avg_profit_pct": _f(returns.mean()) if returns.size else None,
+            "total_pnl": _f(np.nansum(closed["pnl"].to_numpy(dtype=float))),
+            "max_drawdown_pct": _f(_drawdown(returns)),
+        },
+        "by_account": _group_stats(closed, "account_id"),
+        "by_symbol": _group_stats(closed, "symbol"),
+        "elapsed": _elapsed_distribution(closed),
+        "labels": _labels(closed),
+    }
+    with _lock:
+        if _cache["frame"] is df:
+            _cache["report"] = report
+    return report
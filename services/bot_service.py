@@ -1,38 +1,89 @@
-from app_state import bc
+import time
+from datetime import timedelta
+
+from app_state import engine, get_bc, get_supervisor
 
 def get_status():
     """
-    Returns the current status of the bot controller.
+    Returns the current status of the bot controller: open positions, uptime and
+    scan-cycle health (durations, phases, rate, lag, shed/failed symbols).
     """
-    running = bc.is_running()
-    
-    # Get active strategy/symbol info from config or state
-    trades = bc._read_trades()
-    active_symbols = list(set(t.get("symbol") for t in trades if t.get("open")))
-    
+    bc = get_bc()
+    supervisor = get_supervisor()
+    runner = engine()
+    running = runner.is_running()
+
+    # open positions live on the accounts, which are held in memory; no trade file read
+    active_symbols = sorted({
+        a["current_symbol"] for a in bc.load_accounts()
+        if a.get("position") == "open" and a.get("current_symbol")
+    })
+    started_at = getattr(runner, "started_at", None)
+    uptime = time.time() - started_at if running and started_at else None
+
     return {
         "running": running,
         "active_symbols": active_symbols,
         "strategy": "Fibonacci Scoring",
-        "uptime": "Running" if running else "Stopped"
+        "started_at": started_at if running else None,
+        "uptime_seconds": round(uptime, 1) if uptime is not None else None,
+        "uptime": str(timedelta(seconds=int(uptime))) if uptime is not None else "Stopped",
+        # with shard workers the cycles run there; see sharding.shards[].scan
+        "scan": bc.health.snapshot() if supervisor is None else None,
+        "rate_limits": bc.rate_limiter.stats(),
+        "signals": bc.signal_bus.stats(),
+        "paper": bc.paper.stats(),
+        "sharding": supervisor.status() if supervisor else None,
+    }
+
+def get_signals(min_score: int = 0):
+    """
+    Latest per-candle signals (score, price, entry plan) shared by all accounts.
+    """
+    latest = get_bc().signal_bus.latest()
+    if latest is None:
+        return {"candle_ts": None, "signals": []}
+    return {
+        "candle_ts": latest.candle_ts,
+        "computed_at": latest.computed_at,
+        "signals": [s.to_dict() for s in latest.candidates(min_score)],
+    }
+
+def get_markets(top: int = 20):
+    """
+    Latest per-exchange rankings from the async engine's multi-exchange scan.
+    """
+    rankings = getattr(get_bc(), "market_rankings", {})
+    return {
+        name: {
+            "scanned_at": entry["scanned_at"],
+            "symbols": len(entry["ranked"]),
+            "ranked": [
+                {"symbol": symbol, "score": score, "price": diag.get("current_price"), "error": diag.get("error")}
+                for symbol, score, diag in entry["ranked"][:top]
+            ],
+        }
+        for name, entry in rankings.items()
     }
 
 def start_bot():
     """
     Signals the bot to start trading.
     """
-    if bc.is_running():
+    if engine().is_running():
          return {"status": "info", "message": "Bot is already running"}
     
-    bc.start()
+    engine().start()
+    if not engine().is_running():
+        return {"status": "error", "message": "Bot is still stopping; try again shortly"}
     return {"status": "success", "message": "Bot started successfully"}
 
 def stop_bot():
     """
     Signals the bot to stop trading.
     """
-    if not bc.is_running():
+    if not engine().is_running():
         return {"status": "info", "message": "Bot is already stopped"}
         
-    bc.stop()
+    engine().stop()
     return {"status": "success", "message": "Bot stopped successfully"}
@@ -1,10 +1,11 @@
-from app_state import bc
+from app_state import get_bc
 from datetime import datetime
 
 def get_dashboard_data():
     """
     Retrieves current dashboard statistics by aggregating data from BotController.
     """
+    bc = get_bc()
     
     # 1. Calculate Total Balance (Sum of all validated accounts)
     accounts = bc.load_accounts()
@@ -20,11 +21,11 @@ def get_dashboard_data():
     open_trades = [t for t in trades if t.get("open") is True]
     active_trades_count = len(open_trades)
     
-    # 3. Calculate Today's Profit
+    # 3. Calculate Today's Profit (trades closed today may already be archived)
     today_str = datetime.utcnow().strftime("%Y-%m-%d")
     today_pnl = 0.0
     
-    for t in trades:
+    for t in bc.iter_trades(since=today_str):
         if t.get("open") is False:
             exit_time = t.get("exit_time") # ISO format string
             if exit_time and exit_time.startswith(today_str):
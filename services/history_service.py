@@ -1,45 +1,155 @@
+import base64
+import csv
+import heapq
+import io
+import json
 import time
 import uuid
-from typing import List, Tuple, Optional
-from app_state import bc
+from typing import Iterator, List, Tuple, Optional
+from app_state import get_bc
+
+# Columns of the CSV export; NDJSON rows carry every stored field
+EXPORT_FIELDS = [
+    "id", "account_id", "symbol", "side", "qty", "entry_price", "exit_price",
+    "entry_time", "exit_time", "open", "profit_pct", "elapsed_seconds", "label", "simulated",
+]
+
+# Rows per chunk handed to the streaming response
+EXPORT_BATCH = 500
 
 def get_trades(limit: int = 50, offset: int = 0, symbol: Optional[str] = None, status: Optional[str] = None) -> Tuple[List[dict], int]:
     """
-    Retrieve paginated trade history from the shared trades file.
+    Retrieve paginated trade history (live trades and the archive).
     """
-    all_trades = bc._read_trades()
+    total = 0
 
-    # Filtering
-    if symbol:
-        all_trades = [t for t in all_trades if t.get("symbol") == symbol]
-    if status:
-        if status.lower() == "open":
-            all_trades = [t for t in all_trades if t.get("open") is True]
-        elif status.lower() == "closed":
-            all_trades = [t for t in all_trades if t.get("open") is False]
+    def counted() -> Iterator[dict]:
+        nonlocal total
+        for trade in _export_rows(symbol, status):
+            total += 1
+            yield trade
 
-    # Sort by entry_time descending (newest first)
-    all_trades.sort(key=lambda x: x.get("entry_time") or "", reverse=True)
+    # newest first; only offset + limit rows are held at once
+    top = heapq.nlargest(offset + limit, counted(), key=_sort_key)
+    paginated_trades = top[offset:]
 
-    total = len(all_trades)
-    paginated_trades = all_trades[offset : offset + limit]
-    
     return paginated_trades, total
 
+
+def _matches(trade: dict, symbol: Optional[str], status: Optional[str]) -> bool:
+    if symbol and trade.get("symbol") != symbol:
+        return False
+    if status:
+        if status.lower() == "open" and trade.get("open") is not True:
+            return False
+        if status.lower() == "closed" and trade.get("open") is not False:
+            return False
+    return True
+
+
+def _sort_key(trade: dict) -> Tuple[str, str]:
+    return (str(trade.get("entry_time") or ""), str(trade.get("id") or ""))
+
+
+def encode_cursor(key: Tuple[str, str]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Raises ValueError on a malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        entry_time, trade_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return (str(entry_time), str(trade_id))
+    except Exception as e:
+        raise ValueError(f"invalid cursor: {e}")
+
+
+def get_trades_page(limit: int = 50, cursor: Optional[str] = None, symbol: Optional[str] = None,
+                    status: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+    """
+    Keyset page of trades, newest first by (entry_time, id).
+
+    Streams the trade store and keeps only the best `limit + 1` rows, so memory is
+    bounded by the page size. Archive segments holding only trades entered after
+    the cursor are not opened, and reading stops at the first segment that closed
+    before the page's oldest row (segments come newest first, and a trade is
+    entered before it closes). Returns the page and the cursor of the next page
+    (None on the last page).
+    """
+    bc = get_bc()
+    after = decode_cursor(cursor) if cursor else None
+    best: List[Tuple[Tuple[str, str], int, dict]] = []  # min-heap of the limit + 1 newest rows
+
+    def older_than_page(meta: dict) -> bool:
+        end = meta.get("end")
+        return len(best) > limit and bool(end) and end < best[0][0][0]
+
+    rows = bc.iter_trades(symbol=symbol, until=after[0] if after else None, stop=older_than_page)
+    for seq, t in enumerate(rows):
+        if not isinstance(t, dict) or not _matches(t, symbol, status):
+            continue
+        key = _sort_key(t)
+        if after is not None and key >= after:
+            continue
+        # -seq: on equal keys the row seen first wins, as with heapq.nlargest
+        if len(best) <= limit:
+            heapq.heappush(best, (key, -seq, t))
+        elif (key, -seq) > best[0][:2]:
+            heapq.heapreplace(best, (key, -seq, t))
+    page = [t for _, _, t in sorted(best, key=lambda item: item[:2], reverse=True)]
+    next_cursor = encode_cursor(_sort_key(page[limit - 1])) if len(page) > limit else None
+    return page[:limit], next_cursor
+
+
+def _export_rows(symbol: Optional[str], status: Optional[str]) -> Iterator[dict]:
+    bc = get_bc()
+    for trade in bc.iter_trades(symbol=symbol):
+        if isinstance(trade, dict) and _matches(trade, symbol, status):
+            yield trade
+
+
+def export_ndjson(symbol: Optional[str] = None, status: Optional[str] = None) -> Iterator[str]:
+    """Yield the trade store as NDJSON chunks, in storage order."""
+    batch: List[str] = []
+    for trade in _export_rows(symbol, status):
+        batch.append(json.dumps(trade, default=str))
+        if len(batch) >= EXPORT_BATCH:
+            yield "\n".join(batch) + "\n"
+            batch = []
+    if batch:
+        yield "\n".join(batch) + "\n"
+
+
+def export_csv(symbol: Optional[str] = None, status: Optional[str] = None) -> Iterator[str]:
+    """Yield the trade store as CSV chunks (EXPORT_FIELDS columns), in storage order."""
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    count = 0
+    for trade in _export_rows(symbol, status):
+        writer.writerow(trade)
+        count += 1
+        if count % EXPORT_BATCH == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
 def get_trade_by_id(trade_id: str) -> Optional[dict]:
     """
     Retrieve a single trade by its ID.
     """
-    all_trades = bc._read_trades()
-    for trade in all_trades:
-        if trade.get("id") == trade_id:
-            return trade
-    return None
+    bc = get_bc()
+    return bc.find_trade(trade_id)
 
 def append_trade(trade_data: dict) -> dict:
     """
     Add a new trade record (mostly for testing/manual entry).
     """
+    bc = get_bc()
     # Generate ID if missing
     if "id" not in trade_data:
         trade_data["id"] = str(uuid.uuid4())
@@ -0,0 +1,39 @@
+import threading
+from typing import Any, Dict
+
+from app_state import get_bc
+from bot_fib_scoring import TRADES_FILE
+from latency import BUCKETS_MS, latency_histograms
+from storage import file_signature
+
+_lock = threading.Lock()
+_cache: Dict[str, Any] = {"key": None, "reports": {}}
+
+
+def _cache_key():
+    # same invalidation as the analytics frame: our writes, other writers, archive rolls
+    bc = get_bc()
+    return (bc.trades_version, file_signature(TRADES_FILE), bc.trade_archive.stats()["trades"])
+
+
+def get_latency(by: str = "symbol") -> Dict[str, Any]:
+    """
+    Decision-to-fill latency histograms over every traced trade (live + archive),
+    grouped by symbol, account or all; rebuilt only after a trade write.
+    """
+    key = _cache_key()
+    with _lock:
+        if _cache["key"] != key:
+            _cache["key"] = key
+            _cache["reports"] = {}
+        report = _cache["reports"].get(by)
+    if report is None:
+        report = {
+            "by": by,
+            "buckets_ms": list(BUCKETS_MS),
+            "groups": latency_histograms(get_bc().iter_trades(), by=by),
+        }
+        with _lock:
+            if _cache["key"] == key:
+                _cache["reports"][by] = report
+    return report
@@ -0,0 +1,30 @@
+from app_state import engine, get_bc, get_supervisor
+from profiler import ProfilerUnavailable, collapsed_text, pstats_dump, pstats_text
+
+
+def _profiler():
+    if get_supervisor() is not None:
+        raise ProfilerUnavailable("scans run in shard worker processes; profile a worker instead")
+    if not engine().is_running():
+        raise ProfilerUnavailable("the bot is not running")
+    return get_bc().profiler
+
+
+def profile_scans(scans: int, timeout: float, sort: str = "cumulative", limit: int = 50, raw: bool = False):
+    """
+    cProfile the next `scans` scan cycles. Returns (meta, body): the pstats report
+    as text, or with raw=True the marshalled stats for pstats/snakeviz. body is
+    None when no cycle finished within `timeout`.
+    """
+    result = _profiler().profile_scans(scans, timeout)
+    stats = result.pop("stats")
+    if stats is None:
+        return result, None
+    return result, pstats_dump(stats) if raw else pstats_text(stats, sort, limit)
+
+
+def sample_stacks(seconds: float, interval_ms: float):
+    """Sample the scan thread's stacks. Returns (meta, collapsed-stack text)."""
+    result = _profiler().sample(seconds, interval_ms / 1000.0)
+    stacks = result.pop("stacks")
+    return result, collapsed_text(stacks)
@@ -0,0 +1,358 @@
+"""
+Multi-process account sharding.
+
+ShardSupervisor runs in the web process. It starts `workers` processes, each
+owning the accounts whose id hashes to its shard, publishes one shared market
+snapshot (klines + tickers) per scan interval, and applies the trades, account
+updates and health reports that workers send back. Crashed workers are restarted.
+The snapshot is refreshed on its own thread, so a slow exchange never holds up
+draining worker events or restarting dead workers.
+"""
+from __future__ import annotations
+
+import math
+import multiprocessing as mp
+import queue
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Dict, List, Optional
+
+from bot_fib_scoring import (
+    ALLOWED_COINS,
+    RATE_LIMIT_SETTINGS,
+    TIMEFRAME,
+    TRADE_SETTINGS,
+    BotController,
+)
+from candles import CandleStore
+from rate_limiter import RateLimiter
+
+
+def shard_for(account_id: Any, shard_count: int) -> int:
+    """Stable owner shard for an account (crc32, unlike hash(), is not salted per process)."""
+    if shard_count <= 1:
+        return 0
+    return zlib.crc32(str(account_id).encode("utf-8")) % shard_count
+
+
+# -------------------- Worker side --------------------
+class ShardWorkerController(BotController):
+    """
+    BotController restricted to one shard. Persistence is forwarded to the
+    supervisor instead of touching the shared files, and market data is read
+    from the shared snapshot when it is fresh.
+    """
+
+    def __init__(self, shard_index: int, shard_count: int, market: Any, events: Any):
+        self.shard_index = shard_index  # set first: _capture_path() reads it during super().__init__
+        self.shard_count = shard_count
+        super().__init__()
+        self.market = market
+        self.events = events
+        # daily limit and public quota are split across workers
+        self.MAX_TRADES_DAILY = max(1, math.ceil(self.MAX_TRADES_DAILY / shard_count))
+        self.rate_limiter = RateLimiter(
+            public_rate=RATE_LIMIT_SETTINGS["public_rate"] / (shard_count + 1),
+            public_burst=max(1.0, RATE_LIMIT_SETTINGS["public_burst"] / (shard_count + 1)),
+            private_rate=RATE_LIMIT_SETTINGS["private_rate"],
+            private_burst=RATE_LIMIT_SETTINGS["private_burst"],
+        )
+        # workers share the symbol list, so only the supervisor's controller
+        # persists candles; several processes must not write the same ring files
+        self.candles = CandleStore(
+            base_interval=TIMEFRAME,
+            timeframes=TRADE_SETTINGS["aggregate_timeframes"],
+            max_base_bars=max(1500, TRADE_SETTINGS["kline_limit"]),
+        )
+
+    def _capture_path(self) -> Optional[str]:
+        # one capture per process: gzip members from several writers must not interleave
+        path = super()._capture_path()
+        return f"{path}.{self.shard_index}" if path else None
+
+    def owns(self, account: Dict[str, Any]) -> bool:
+        acct_id = account.get("id")
+        return bool(acct_id) and shard_for(acct_id, self.shard_count) == self.shard_index
+
+    def load_accounts(self) -> List[Dict[str, Any]]:
+        return super().load_accounts().subset(self.owns)
+
+    def save_accounts(self, accounts: List[Dict[str, Any]]):
+        self.commit_accounts(accounts)
+
+    def commit_accounts(self, accounts: List[Dict[str, Any]]) -> bool:
+        # ship only the changed fields; the supervisor owns the file
+        changes = self.account_store.diff(accounts)
+        if not changes:
+            return False
+        self.account_store.apply(changes)
+        self.events.put({"type": "account_changes", "shard": self.shard_index, "changes": changes})
+        return True
+
+    def add_trade(self, trade: Dict[str, Any]):
+        self.events.put({"type": "add_trade", "shard": self.shard_index, "trade": trade})
+
+    def update_trade(self, trade_id: str, updates: Dict[str, Any]) -> bool:
+        self.events.put({"type": "update_trade", "shard": self.shard_index, "id": trade_id, "updates": updates})
+        return True
+
+    def _fresh(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            entry = self.market.get(key)
+        except Exception:
+            return None
+        max_age = 2 * max(1, int(TRADE_SETTINGS.get("scan_interval", 10)))
+        if not entry or time.time() - entry.get("ts", 0) > max_age:
+            return None
+        return entry
+
+    def safe_get_klines(self, client, symbol: str, interval: str = TIMEFRAME, limit: int = 200, lane: str = "scoring") -> Any:
+        if interval == TIMEFRAME and limit <= TRADE_SETTINGS["kline_limit"]:
+            entry = self._fresh(f"klines:{symbol}")
+            if entry is not None:
+                return entry["data"]
+        return super().safe_get_klines(client, symbol, interval=interval, limit=limit, lane=lane)
+
+    def safe_get_ticker(self, client, symbol: str, lane: str = "market") -> Any:
+        entry = self._fresh(f"ticker:{symbol}")
+        if entry is not None:
+            return {"result": {"list": [entry["data"]]}}
+        return super().safe_get_ticker(client, symbol, lane=lane)
+
+
+def _worker_main(shard_index: int, shard_count: int, market: Any, events: Any, stop_event: Any):
+    worker = ShardWorkerController(shard_index, shard_count, market, events)
+    worker.log(f"Shard worker {shard_index}/{shard_count} started")
+    interval = max(1, int(TRADE_SETTINGS.get("scan_interval", 10)))
+    while not stop_event.is_set():
+        worker.health.begin_cycle(interval)
+        error = None
+        try:
+            worker._scan_once()
+        except Exception as e:
+            error = str(e)
+            worker.log(f"Shard {shard_index} scan error: {e}")
+        duration = worker.health.end_cycle(error)
+        try:
+            events.put({
+                "type": "health",
+                "shard": shard_index,
+                "ts": time.time(),
+                "cycle_seconds": round(duration, 3),
+                "accounts": len(worker.load_accounts()),
+                "trades_today": worker.trades_today,
+                "error": error,
+                "scan": worker.health.snapshot(),
+            })
+        except Exception:
+            pass
+        stop_event.wait(max(0.0, interval - duration))
+    if worker.recorder is not None:
+        worker.recorder.close()
+
+
+# -------------------- Supervisor side --------------------
+class ShardSupervisor:
+    """Same start/stop/is_running surface as BotController, for bot_service."""
+
+    def __init__(self, controller: BotController, workers: int):
+        self.controller = controller
+        self.workers = max(1, int(workers))
+        self._ctx = mp.get_context("spawn")
+        self._manager = None
+        self._market = None
+        self._events = None
+        self._stop_event = None
+        self._procs: Dict[int, Any] = {}
+        self._restarts: Dict[int, int] = {}
+        self._next_restart_at: Dict[int, float] = {}
+        self._health: Dict[int, Dict[str, Any]] = {}
+        self._monitor: Optional[threading.Thread] = None
+        self._market_thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._running = False
+        self.started_at: Optional[float] = None
+        self._public_client = None
+        self._last_market_refresh = 0.0
+
+    def is_running(self) -> bool:
+        return self._running
+
+    def start(self):
+        if self._running:
+            return
+        self._assign_missing_ids()
+        self._manager = self._ctx.Manager()
+        self._market = self._manager.dict()
+        self._events = self._ctx.Queue()
+        self._stop_event = self._ctx.Event()
+        self._stopping.clear()
+        self._running = True
+        self.started_at = time.time()
+        self._refresh_market_data()
+        for idx in range(self.workers):
+            self._spawn(idx)
+        self._monitor = threading.Thread(target=self._monitor_loop, daemon=True)
+        self._monitor.start()
+        self._market_thread = threading.Thread(target=self._market_loop, daemon=True)
+        self._market_thread.start()
+        self.controller.log(f"ShardSupervisor started with {self.workers} workers")
+
+    def stop(self):
+        self._stopping.set()
+        self._running = False
+        if self._stop_event is not None:
+            self._stop_event.set()
+        for proc in self._procs.values():
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        for thread in (self._monitor, self._market_thread):
+            if thread is not None and thread.is_alive():
+                thread.join(timeout=2)
+        self._drain_events(block=False)
+        self.controller.account_store.flush(force=True)
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+        self._procs.clear()
+        self._next_restart_at.clear()
+        self.controller.log("ShardSupervisor stopped")
+
+    def _spawn(self, idx: int):
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(idx, self.workers, self._market, self._events, self._stop_event),
+            name=f"bot-shard-{idx}",
+            daemon=True,
+        )
+        proc.start()
+        self._procs[idx] = proc
+
+    def _assign_missing_ids(self):
+        """Workers need a persisted id to agree on ownership."""
+        with self.controller._file_lock:
+            accounts = self.controller.load_accounts()
+            missing = [a for a in accounts if not a.get("id")]
+            for acct in missing:
+                acct["id"] = str(uuid.uuid4())
+            if missing:
+                self.controller.save_accounts(accounts)
+
+    # ------------------ monitor loop ------------------
+    def _monitor_loop(self):
+        while not self._stopping.is_set():
+            self._drain_events(block=True)
+            self.controller.account_store.flush()
+            self._restart_dead_workers()
+
+    def _market_loop(self):
+        while not self._stopping.is_set():
+            interval = max(1, int(TRADE_SETTINGS.get("scan_interval", 10)))
+            if self._stopping.wait(max(0.0, self._last_market_refresh + interval - time.time())):
+                return
+            self._refresh_market_data()
+
+    def _drain_events(self, block: bool):
+        if self._events is None:
+            return
+        timeout = 0.5 if block else 0
+        while True:
+            try:
+                msg = self._events.get(timeout=timeout) if timeout else self._events.get_nowait()
+            except (queue.Empty, EOFError, OSError):
+                return
+            timeout = 0
+            try:
+                self._apply(msg)
+            except Exception as e:
+                self.controller.log(f"ShardSupervisor apply error: {e}")
+
+    def _apply(self, msg: Dict[str, Any]):
+        kind = msg.get("type")
+        if kind == "add_trade":
+            self.controller.add_trade(msg["trade"])
+        elif kind == "update_trade":
+            self.controller.update_trade(msg["id"], msg["updates"])
+        elif kind == "account_changes":
+            self.controller.account_store.apply(msg.get("changes") or {})
+        elif kind == "health":
+            health = dict(msg)
+            health["pid"] = getattr(self._procs.get(msg.get("shard")), "pid", None)
+            self._health[msg.get("shard")] = health
+
+    def _restart_dead_workers(self):
+        """Respawn exited workers after a backoff, without blocking the monitor loop."""
+        now = time.time()
+        for idx, proc in list(self._procs.items()):
+            if proc.is_alive() or self._stopping.is_set():
+                continue
+            if idx not in self._next_restart_at:
+                self._restarts[idx] = self._restarts.get(idx, 0) + 1
+                self.controller.log(f"Shard worker {idx} exited (code={proc.exitcode}); restart #{self._restarts[idx]}")
+                # crude crash-loop protection
+                self._next_restart_at[idx] = now + min(30.0, 2 ** min(self._restarts[idx], 5))
+            if now >= self._next_restart_at[idx]:
+                del self._next_restart_at[idx]
+                self._spawn(idx)
+
+    # ------------------ shared market data ------------------
+    def _refresh_market_data(self):
+        self._last_market_refresh = time.time()
+        if self._market is None:
+            return
+        try:
+            if self._public_client is None:
+                from pybit.unified_trading import HTTP
+                self._public_client = HTTP(testnet=TRADE_SETTINGS.get("test_on_testnet", False))
+            client = self._public_client
+        except Exception as e:
+            self.controller.log(f"ShardSupervisor public client error: {e}")
+            return
+        now = time.time()
+        try:
+            tickers = self.controller._retry(
+                lambda: self.controller._try_methods(client, ["get_tickers"], category="spot"),
+                endpoint="tickers",
+            )
+            items = (tickers.get("result") or {}).get("list") or [] if isinstance(tickers, dict) else []
+            wanted = set(ALLOWED_COINS)
+            for item in items:
+                if isinstance(item, dict) and item.get("symbol") in wanted:
+                    self._market[f"ticker:{item['symbol']}"] = {"ts": now, "data": item}
+        except Exception as e:
+            self.controller.log(f"ShardSupervisor tickers error: {e}")
+        for symbol in ALLOWED_COINS:
+            if self._stopping.is_set():
+                return
+            try:
+                raw = self.controller._retry(
+                    lambda: self.controller.safe_get_klines(client, symbol, interval=TIMEFRAME,
+                                                            limit=TRADE_SETTINGS["kline_limit"], lane="market"),
+                    endpoint="klines",
+                )
+                self._market[f"klines:{symbol}"] = {"ts": time.time(), "data": raw}
+            except Exception as e:
+                self.controller.log(f"ShardSupervisor klines error {symbol}: {e}")
+
+    # ------------------ status ------------------
+    def status(self) -> Dict[str, Any]:
+        shards = []
+        for idx in range(self.workers):
+            proc = self._procs.get(idx)
+            health = self._health.get(idx, {})
+            shards.append({
+                "shard": idx,
+                "alive": bool(proc and proc.is_alive()),
+                "pid": getattr(proc, "pid", None),
+                "restarts": self._restarts.get(idx, 0),
+                "last_cycle_seconds": health.get("cycle_seconds"),
+                "last_report_age": round(time.time() - health["ts"], 1) if health.get("ts") else None,
+                "accounts": health.get("accounts"),
+                "trades_today": health.get("trades_today"),
+                "last_error": health.get("error"),
+                "scan": health.get("scan"),
+            })
+        return {"workers": self.workers, "market_data_age": round(time.time() - self._last_market_refresh, 1), "shards": shards}
@@ -0,0 +1,152 @@
+"""
+Per-candle signal bus.
+
+Scores and entry plans depend only on market data, so they are computed once
+per base candle and shared by every account instead of being recomputed for
+each one. A SignalSet is keyed by the open time of the newest closed candle and
+is built from the bars up to that one; the bar still forming is left out, so
+the set does not depend on when in the minute it was built. The first caller
+after a candle closes builds it (others wait for that result) and subscribers
+are notified. Accounts then only apply their own limits and sizing, and price
+their orders from the ticker, not from the signal.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class Signal:
+    """One symbol's score and, for candidates, the entry plan (SL/TP, fib levels)."""
+
+    __slots__ = ("symbol", "score", "diagnostics", "entry", "reason")
+
+    def __init__(self, symbol: str, score: int, diagnostics: Dict[str, Any],
+                 entry: Optional[Dict[str, Any]] = None, reason: Optional[str] = None):
+        self.symbol = symbol
+        self.score = score
+        self.diagnostics = diagnostics
+        # {"sl_price", "tp_price", "plan"} when the entry rules pass, else None
+        self.entry = entry
+        self.reason = reason
+
+    @property
+    def price(self) -> Optional[float]:
+        return self.diagnostics.get("current_price")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "score": self.score,
+            "price": self.price,
+            "entry": self.entry,
+            "reason": self.reason,
+        }
+
+
+class SignalSet:
+    __slots__ = ("candle_ts", "computed_at", "computed_ns", "ranked")
+
+    def __init__(self, candle_ts: int, ranked: List[Signal]):
+        self.candle_ts = candle_ts
+        self.computed_at = time.time()
+        self.computed_ns = time.perf_counter_ns()  # signal stamp for latency traces
+        self.ranked = ranked  # best score first
+
+    def candidates(self, min_score: int) -> List[Signal]:
+        return [s for s in self.ranked if s.score >= min_score]
+
+    def get(self, symbol: str) -> Optional[Signal]:
+        for s in self.ranked:
+            if s.symbol == symbol:
+                return s
+        return None
+
+
+class SignalBus:
+    def __init__(self, interval_minutes: int = 1, clock: Callable[[], float] = time.time):
+        self.interval_ms = max(1, int(interval_minutes)) * 60_000
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._latest: Optional[SignalSet] = None
+        self._pending: Dict[int, Any] = {}  # candle -> asyncio future being built
+        self._subscribers: List[Callable[[SignalSet], None]] = []
+        self.builds = 0
+        self.reuses = 0
+
+    def candle_key(self) -> int:
+        """Open time of the newest closed candle."""
+        now_ms = int(self.clock() * 1000)
+        return now_ms - now_ms % self.interval_ms - self.interval_ms
+
+    def latest(self) -> Optional[SignalSet]:
+        return self._latest
+
+    def subscribe(self, callback: Callable[[SignalSet], None]):
+        self._subscribers.append(callback)
+
+    def invalidate(self):
+        self._latest = None
+
+    def _fresh(self, key: int) -> Optional[SignalSet]:
+        latest = self._latest
+        if latest is not None and latest.candle_ts == key:
+            self.reuses += 1
+            return latest
+        return None
+
+    def _publish(self, signals: SignalSet):
+        self._latest = signals
+        self.builds += 1
+        for callback in list(self._subscribers):
+            try:
+                callback(signals)
+            except Exception:
+                pass
+
+    def get(self, build: Callable[[int], SignalSet]) -> SignalSet:
+        """Signals for the last closed candle; build(candle_ts) runs once per candle."""
+        key = self.candle_key()
+        current = self._fresh(key)
+        if current is not None:
+            return current
+        with self._lock:
+            # another thread may have built it while we waited
+            current = self._fresh(key)
+            if current is not None:
+                return current
+            signals = build(key)
+            self._publish(signals)
+            return signals
+
+    async def get_async(self, build: Callable[[int], Awaitable[SignalSet]]) -> SignalSet:
+        """get() for the event loop: concurrent callers in one candle share a single build."""
+        import asyncio  # only async callers pay for the import
+
+        key = self.candle_key()
+        current = self._fresh(key)
+        if current is not None:
+            return current
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(build(key))
+            self._pending[key] = pending
+            try:
+                signals = await pending
+            finally:
+                self._pending.pop(key, None)
+            self._publish(signals)
+            return signals
+        self.reuses += 1
+        return await asyncio.shield(pending)
+
+    def stats(self) -> Dict[str, Any]:
+        latest = self._latest
+        return {
+            "candle_ts": latest.candle_ts if latest else None,
+            "computed_at": latest.computed_at if latest else None,
+            "symbols": len(latest.ranked) if latest else 0,
+            "builds": self.builds,
+            "reuses": self.reuses,
+        }
@@ -0,0 +1,77 @@
+"""
+Small file-persistence helpers shared by the data stores.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Any, Iterator, Optional
+
+
+def atomic_write_json(path: str, data: Any, indent: Optional[int] = 2):
+    """Write JSON to a temp file and rename it over path, so readers never see a partial file."""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(data, fh, indent=indent)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+def file_signature(path: str) -> Optional[tuple]:
+    """(mtime_ns, size) used to notice writes made by someone else."""
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+def iter_json_array(path: str, chunk_size: int = 65536) -> Iterator[Any]:
+    """
+    Yield the elements of a top-level JSON array one by one, reading the file in
+    chunks, so memory stays bounded by the largest element rather than the file.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r") as fh:
+        buf = ""
+        started = False
+        eof = False
+        while True:
+            if not eof and len(buf) < chunk_size:
+                chunk = fh.read(chunk_size)
+                eof = not chunk
+                buf += chunk
+            buf = buf.lstrip()
+            if not started:
+                if not buf:
+                    if eof:
+                        return
+                    continue
+                if buf[0] != "[":
+                    raise ValueError(f"{path} is not a JSON array")
+                buf = buf[1:]
+                started = True
+                continue
+            if buf.startswith(","):
+                buf = buf[1:]
+                continue
+            if buf.startswith("]"):
+                return
+            if not buf:
+                if eof:
+                    return
+                continue
+            try:
+                item, end = decoder.raw_decode(buf)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # element spans the chunk boundary: read more
+                chunk = fh.read(chunk_size)
+                eof = not chunk
+                buf += chunk
+                continue
+            yield item
+            buf = buf[end:]
@@ -0,0 +1,20 @@
+import os
+import sys
+
+# the app modules live at the repository root, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def bfs(tmp_path, monkeypatch):
+    """bot_fib_scoring with its data files in tmp_path."""
+    import bot_fib_scoring
+
+    monkeypatch.setattr(bot_fib_scoring, "ACCOUNTS_FILE", str(tmp_path / "accounts.json"))
+    monkeypatch.setattr(bot_fib_scoring, "TRADES_FILE", str(tmp_path / "trades.json"))
+    monkeypatch.setattr(bot_fib_scoring, "TRADE_ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.setattr(bot_fib_scoring, "CANDLE_CACHE_DIR", str(tmp_path / "candles"))
+    monkeypatch.setitem(bot_fib_scoring.TRADE_SETTINGS, "record_exchange", None)
+    return bot_fib_scoring
@@ -0,0 +1,68 @@
+import json
+
+from account_store import AccountStore
+
+
+def _store(tmp_path, accounts):
+    path = tmp_path / "accounts.json"
+    path.write_text(json.dumps(accounts))
+    return AccountStore(str(path), volatile_flush_interval=0, log=lambda msg: None), path
+
+
+def _on_disk(path):
+    return {a["id"]: a for a in json.loads(path.read_text())}
+
+
+def test_commit_keeps_api_save_made_during_scan(tmp_path):
+    store, path = _store(tmp_path, [
+        {"id": "a", "name": "one", "monitoring": True, "position": "closed"},
+        {"id": "b", "name": "two", "monitoring": True, "position": "closed"},
+    ])
+    scan = store.load()
+
+    # API edit between the scan's load() and its commit()
+    edited = store.load()
+    edited[0]["monitoring"] = False
+    edited[1]["name"] = "renamed"
+    store.save(edited)
+
+    scan[0]["position"] = "open"
+    scan[0]["balance"] = 12.5
+    store.commit(scan)
+    store.flush(force=True)
+
+    disk = _on_disk(path)
+    assert disk["a"]["monitoring"] is False
+    assert disk["a"]["position"] == "open"
+    assert disk["a"]["balance"] == 12.5
+    assert disk["b"]["name"] == "renamed"
+
+
+def test_commit_skips_accounts_deleted_during_scan(tmp_path):
+    store, path = _store(tmp_path, [{"id": "a", "name": "one"}, {"id": "b", "name": "two"}])
+    scan = store.load()
+    store.save([a for a in store.load() if a["id"] != "b"])
+
+    scan[1]["position"] = "open"
+    store.commit(scan)
+    store.flush(force=True)
+
+    assert set(_on_disk(path)) == {"a"}
+
+
+def test_commit_without_changes_does_not_write(tmp_path):
+    store, _ = _store(tmp_path, [{"id": "a", "name": "one"}])
+    writes = store.writes
+    assert store.commit(store.load()) is False
+    assert store.writes == writes
+
+
+def test_subset_keeps_snapshot(tmp_path):
+    store, path = _store(tmp_path, [{"id": "a", "name": "one"}, {"id": "b", "name": "two"}])
+    mine = store.load().subset(lambda a: a["id"] == "a")
+    edited = store.load()
+    edited[0]["name"] = "api"
+    store.save(edited)
+
+    mine[0]["position"] = "open"
+    assert store.diff(mine) == {"a": {"set": {"position": "open"}, "unset": []}}
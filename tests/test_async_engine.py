@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+
+@pytest.fixture
+def controller(bfs, monkeypatch):
+    monkeypatch.setitem(bfs.TRADE_SETTINGS, "scan_interval", 1)
+    from async_engine import AsyncBotController
+
+    bc = AsyncBotController()
+    bc.log = lambda msg: None
+    bc.loops = 0
+    bc.active = 0
+    bc.overlap = False
+
+    async def scan():
+        bc.active += 1
+        bc.overlap |= bc.active > 1
+        bc.loops += 1
+        await asyncio.sleep(0.3)  # a cycle still in flight when stop() is called
+        bc.active -= 1
+
+    async def markets():
+        pass
+
+    bc._scan_once_async = scan
+    bc._scan_markets_logged = markets
+    return bc
+
+
+def test_restart_waits_for_the_previous_loop(controller):
+    bc = controller
+
+    async def main():
+        bc.start()
+        await asyncio.sleep(0.05)
+        bc.stop()
+        bc.start()  # old loop is still mid-cycle
+        assert not bc.is_running()
+        await bc.astop()
+        assert bc._task.done()
+        bc.start()
+        assert bc.is_running()
+        await asyncio.sleep(0.05)
+        await bc.astop()
+        assert not bc.is_running()
+
+    asyncio.run(main())
+    assert bc.loops == 2
+    assert not bc.overlap
+
+
+def test_astop_cancels_a_stuck_loop(controller):
+    bc = controller
+
+    async def stuck():
+        await asyncio.sleep(60)
+
+    bc._scan_once_async = stuck
+
+    async def main():
+        bc.start()
+        await asyncio.sleep(0.05)
+        await bc.astop(timeout=0.2)
+        assert bc._task.cancelled()
+
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+import math
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+
+def _walk(rng, n, start=100.0, vol=0.01):
+    rows, price = [], start
+    for i in range(n):
+        o = price
+        price = max(0.01, price * (1.0 + rng.gauss(0.0, vol)))
+        h = max(o, price) * (1.0 + abs(rng.gauss(0.0, vol / 2)))
+        l = min(o, price) * (1.0 - abs(rng.gauss(0.0, vol / 2)))
+        rows.append([60_000.0 * i, o, h, l, price, 1.0])
+    return rows
+
+
+def _flat(n, price=5.0):
+    return [[60_000.0 * i, price, price, price, price, 1.0] for i in range(n)]
+
+
+def _with_nan(rows, every):
+    out = [list(r) for r in rows]
+    for r in out[::every]:
+        r[4] = math.nan
+    return out
+
+
+def _same(a, b):
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_same(a[k], b[k]) for k in a)
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return a == b
+
+
+def _universe():
+    rng = random.Random(40)
+    universe = {}
+    for i in range(600):
+        n = rng.choice([1, 2, 5, 14, 15, 16, 49, 50, 60, 199, 200, 260, 300])
+        universe[f"R{i}"] = _walk(rng, n, start=rng.uniform(0.1, 1000.0), vol=rng.choice([0.001, 0.01, 0.05]))
+    for n in (1, 5, 15, 50, 200, 300):
+        universe[f"FLAT{n}"] = _flat(n)
+    for n in (20, 300):
+        universe[f"NAN{n}"] = _with_nan(_walk(rng, n), 7)
+        universe[f"NANLAST{n}"] = _walk(rng, n)[:-1] + [[0.0, 1.0, 1.0, 1.0, math.nan, 1.0]]
+    return universe
+
+
+def test_batch_scores_match_score_klines(bfs):
+    from batch_scoring import score_universe
+    from klines import parse_klines
+
+    bc = bfs.BotController()
+    universe = _universe()
+    series = {symbol: parse_klines(rows).series() for symbol, rows in universe.items()}
+    batch = {symbol: (score, diag) for symbol, score, diag in
+             score_universe(series, bfs.SCORE_SETTINGS, bfs.calc_fib_levels)}
+    mismatched = []
+    for symbol, rows in universe.items():
+        score, diag = bc._score_klines(rows)
+        if batch[symbol][0] != score or not _same(batch[symbol][1], diag):
+            mismatched.append((symbol, score, diag, batch[symbol]))
+    assert not mismatched, mismatched[:3]
+
+
+def test_symbols_without_bars(bfs):
+    from batch_scoring import score_universe
+
+    ranked = score_universe({"EMPTY": ([], [], [], [])}, bfs.SCORE_SETTINGS, bfs.calc_fib_levels)
+    assert ranked == [("EMPTY", 0, {"error": "no_closes"})]
@@ -0,0 +1,42 @@
+from candles import CandleStore
+
+MIN = 60_000.0
+
+
+def _bar(i, close=None):
+    c = float(close if close is not None else 100 + i)
+    return [i * MIN, c - 0.5, c + 1.0, c - 1.0, c, 10.0]
+
+
+def test_gap_is_backfilled_by_a_later_fetch():
+    store = CandleStore("1", timeframes=("5",))
+    store.ingest("BTC", [_bar(i) for i in range(10) if i not in (2, 3, 4)])  # failed fetch left a hole
+    assert not store.contiguous("BTC", 10)
+
+    added = store.ingest("BTC", [_bar(i) for i in range(11)])
+    assert added == 4  # the three missing bars and the new one
+    assert store.contiguous("BTC", 11)
+    assert [r[0] for r in store.klines("BTC", "1", 20)] == [i * MIN for i in range(11)]
+
+    # the closed 5m buckets are rebuilt from the filled-in bars
+    five = store.klines("BTC", "5", 10)
+    assert five[0] == [0.0, 99.5, 105.0, 99.0, 104.0, 50.0]
+    assert five[1] == [5 * MIN, 104.5, 110.0, 104.0, 109.0, 50.0]
+
+
+def test_backfill_survives_a_restart(tmp_path):
+    store = CandleStore("1", timeframes=(), directory=str(tmp_path))
+    store.ingest("BTC", [_bar(i) for i in (0, 1, 5, 6)])
+    store.ingest("BTC", [_bar(i) for i in range(7)])
+    store.close()
+
+    reopened = CandleStore("1", timeframes=(), directory=str(tmp_path))
+    assert [r[0] for r in reopened.klines("BTC", "1", 20)] == [i * MIN for i in range(7)]
+    assert reopened.contiguous("BTC", 7)
+
+
+def test_bars_older_than_the_window_are_ignored():
+    store = CandleStore("1", timeframes=(), max_base_bars=3)
+    store.ingest("BTC", [_bar(i) for i in (5, 6, 7)])
+    assert store.ingest("BTC", [_bar(1)]) == 0
+    assert [r[0] for r in store.klines("BTC", "1", 10)] == [5 * MIN, 6 * MIN, 7 * MIN]
@@ -0,0 +1,24 @@
+def _controller(bfs):
+    bc = bfs.BotController()
+    bc.log = lambda msg: None
+    bc.trades_today = bc.MAX_TRADES_DAILY  # limit reached
+    return bc
+
+
+def test_limit_blocks_live_entries_only(bfs):
+    bc = _controller(bfs)
+    assert not bc._can_open({"id": "live", "monitoring": True, "position": "closed"})
+    assert bc._can_open({"id": "paper", "paper": True, "monitoring": True, "position": "closed"})
+
+
+def test_run_loop_keeps_scanning_after_the_limit(bfs):
+    bc = _controller(bfs)
+    scans = []
+
+    def scan():
+        scans.append(1)
+        bc._stop.set()  # one cycle is enough
+
+    bc._scan_once = scan
+    bc._run_loop()
+    assert scans == [1]
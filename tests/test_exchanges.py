@@ -0,0 +1,27 @@
+import asyncio
+
+import pytest
+
+from exchanges import ExchangeAdapter, MockExchange
+
+
+def test_adapter_needs_the_whole_surface():
+    with pytest.raises(TypeError):
+        ExchangeAdapter()
+
+    class OhlcvOnly(ExchangeAdapter):
+        async def fetch_ohlcv(self, symbol, interval="1", limit=200):
+            return []
+
+    with pytest.raises(TypeError):
+        OhlcvOnly()
+
+
+def test_mock_candles_are_deterministic_and_overlap():
+    clock = lambda: 1_700_000_000.0  # noqa: E731
+    a = MockExchange(seed=3, clock=clock)
+    b = MockExchange(seed=3, clock=clock)
+    long = asyncio.run(a.fetch_ohlcv("BTCUSDT", "1", 50))
+    short = asyncio.run(b.fetch_ohlcv("BTCUSDT", "1", 10))
+    assert long[-10:] == short
+    assert asyncio.run(MockExchange(seed=4, clock=clock).fetch_ohlcv("BTCUSDT", "1", 10)) != short
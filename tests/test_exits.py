@@ -0,0 +1,28 @@
+import time
+
+
+def _holding(bc):
+    bc.add_trade({"id": "t1", "symbol": "BTCUSDT", "side": "Buy", "qty": 1.0, "entry_price": 100.0, "open": True})
+    return {"id": "a1", "name": "a1", "position": "open", "open_trade_id": "t1", "current_symbol": "BTCUSDT",
+            "entry_price": 100.0, "entry_qty": 1.0, "entry_time": int(time.time()), "stop_loss_price": 95.0}
+
+
+def test_failed_sell_keeps_the_position_open(bfs):
+    bc = bfs.BotController()
+    bc.log = lambda msg: None
+    acct = _holding(bc)
+
+    bc._close_position(acct, {"error": "qty_below_min"}, 94.0, "stop_loss")
+    assert acct["position"] == "open"
+    assert acct["open_trade_id"] == "t1"
+    assert acct["exit_failures"] == 1
+    assert acct["last_exit_error"] == "qty_below_min"
+    assert bc.health.exits_failed == 1
+    assert next(t for t in bc._read_trades() if t["id"] == "t1")["open"] is True
+
+    # the next cycle's sell goes through
+    bc._close_position(acct, {"orderId": "x", "avgPrice": "94"}, 94.0, "stop_loss")
+    assert acct["position"] == "closed"
+    assert "exit_failures" not in acct
+    trade = next(t for t in bc._read_trades() if t["id"] == "t1")
+    assert trade["open"] is False
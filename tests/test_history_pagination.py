@@ -0,0 +1,61 @@
+import json
+
+from services import history_service
+
+
+def _trade(i, day, exit_day=None):
+    entry = f"2024-01-{day:02d}T10:{i // 60:02d}:{i % 60:02d}"
+    return {"id": f"t{i:04d}", "symbol": "BTCUSDT", "side": "Buy", "qty": 1.0, "open": False,
+            "entry_time": entry, "exit_time": f"2024-01-{exit_day or day:02d}T23:00:00"}
+
+
+def _store(bfs, monkeypatch):
+    bc = bfs.BotController()
+    bc.log = lambda msg: None
+    archived = [_trade(i, 1 + i // 40) for i in range(200)]  # five day segments
+    archived.append(_trade(999, 1, exit_day=5))  # held from day 1 to day 5
+    bc.trade_archive.append(archived)
+    live = [_trade(500 + i, 9) for i in range(10)]
+    with open(bfs.TRADES_FILE, "w") as fh:
+        json.dump(live, fh)
+    monkeypatch.setattr(history_service, "get_bc", lambda: bc)
+    opened = []
+    segment_path = bc.trade_archive._segment_path
+    bc.trade_archive._segment_path = lambda name: (opened.append(name), segment_path(name))[1]
+    return archived + live, opened
+
+
+def test_pages_walk_every_trade_once(bfs, monkeypatch):
+    trades, _ = _store(bfs, monkeypatch)
+    expected = sorted(trades, key=history_service._sort_key, reverse=True)
+    seen, cursor = [], None
+    while True:
+        page, cursor = history_service.get_trades_page(limit=25, cursor=cursor)
+        seen.extend(page)
+        if cursor is None:
+            break
+    assert [t["id"] for t in seen] == [t["id"] for t in expected]
+
+
+def test_pages_read_only_the_segments_they_need(bfs, monkeypatch):
+    _, opened = _store(bfs, monkeypatch)
+    first, cursor = history_service.get_trades_page(limit=5)
+    assert [t["id"] for t in first] == ["t0509", "t0508", "t0507", "t0506", "t0505"]
+    assert opened == []  # the live file fills the page; every segment closed before it
+
+    page, cursor = history_service.get_trades_page(limit=25, cursor=cursor)
+    assert opened == ["trades-2024-01-05.ndjson.gz"]  # day 4 closed before the page's oldest row
+    del opened[:]
+
+    page, cursor = history_service.get_trades_page(limit=25, cursor=cursor)
+    assert page[0]["id"] == "t0179"
+    # day 5 still holds a trade entered on day 1, so it is read; days 1-3 are not
+    assert opened == ["trades-2024-01-05.ndjson.gz", "trades-2024-01-04.ndjson.gz"]
+
+    for _ in range(2):
+        page, cursor = history_service.get_trades_page(limit=25, cursor=cursor)
+    del opened[:]
+    page, cursor = history_service.get_trades_page(limit=25, cursor=cursor)
+    assert [page[0]["id"], page[-1]["id"]] == ["t0104", "t0080"]
+    # day 4 only holds trades entered after the cursor; day 1 closed before the page's oldest row
+    assert opened == ["trades-2024-01-05.ndjson.gz", "trades-2024-01-03.ndjson.gz", "trades-2024-01-02.ndjson.gz"]
@@ -0,0 +1,35 @@
+from instruments import InstrumentSpec
+from paper import FillModel, PaperBroker
+
+
+def _spot(base_precision="0.000001"):
+    return InstrumentSpec.from_bybit("spot", {
+        "symbol": "BTCUSDT",
+        "lotSizeFilter": {"basePrecision": base_precision, "minOrderQty": "0.000048", "minOrderAmt": "1"},
+        "priceFilter": {"tickSize": "0.01"},
+    })
+
+
+def test_spot_buy_holds_qty_net_of_base_fee():
+    spec = _spot()
+    assert spec.held_after_buy(0.01, 0.001) == 0.00999
+    # rounded down to basePrecision, never up
+    assert spec.held_after_buy(0.012345, 0.001) == 0.012332
+    assert spec.format_qty(spec.held_after_buy(0.012345, 0.001)) == "0.012332"
+
+
+def test_derivatives_and_zero_fee_keep_the_qty():
+    linear = InstrumentSpec.from_bybit("linear", {
+        "symbol": "BTCUSDT", "lotSizeFilter": {"qtyStep": "0.001", "minOrderQty": "0.001"},
+    })
+    assert linear.held_after_buy(0.01, 0.001) == 0.01
+    assert _spot().held_after_buy(0.01, 0.0) == 0.01
+
+
+def test_paper_buy_reports_what_it_can_sell():
+    broker = PaperBroker(FillModel(slippage_bps=0, slippage_jitter_bps=0, fee_bps=10), initial_balance=1000.0)
+    buy = broker.market_order("a", "BTCUSDT", "Buy", 1.0, price_hint=100.0)
+    assert buy["held_qty"] < buy["executed_qty"]
+    sell = broker.market_order("a", "BTCUSDT", "Sell", buy["held_qty"], price_hint=100.0)
+    assert sell["executed_qty"] == buy["held_qty"]
+    assert broker.market_order("a", "BTCUSDT", "Sell", 1e-9, price_hint=100.0).get("error")
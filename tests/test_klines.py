@@ -0,0 +1,95 @@
+import pytest
+
+from klines import KlineColumns, parse_klines
+
+MIN = 60_000
+
+
+def _bybit_row(i):
+    c = 100 + i
+    return [str(i * MIN), str(c - 0.5), str(c + 1), str(c - 1), str(c), "10", "1000"]
+
+
+def test_bybit_envelope_newest_first_is_reversed():
+    raw = {"retCode": 0, "result": {"category": "linear", "list": [_bybit_row(i) for i in (3, 2, 1, 0)]}}
+    cols = parse_klines(raw)
+    assert list(cols.ts) == [0.0, MIN, 2 * MIN, 3 * MIN]
+    assert list(cols.close) == [100.0, 101.0, 102.0, 103.0]
+    assert cols.rows()[0] == [0.0, 99.5, 101.0, 99.0, 100.0, 10.0]
+
+
+def test_oldest_first_and_other_envelopes_keep_their_order():
+    rows = [[i * MIN, 1.0, 2.0, 0.5, float(i), 3.0] for i in range(3)]
+    for raw in (rows, {"data": rows}, {"list": rows}):
+        cols = parse_klines(raw)
+        assert list(cols.ts) == [0.0, MIN, 2 * MIN]
+        assert list(cols.close) == [0.0, 1.0, 2.0]
+
+
+def test_short_and_malformed_rows_are_dropped():
+    rows = [
+        _bybit_row(4),
+        [str(3 * MIN), "1", "2"],  # too short
+        "garbage",
+        [str(2 * MIN), "1", None, "0.5", "1.5", "1"],  # null high
+        [str(1 * MIN), "1", "2", "0.5", "abc", "1"],  # garbled close
+        [str(0), "1", "2", "0.5", "1.5"],  # no volume column
+    ]
+    cols = parse_klines({"result": {"list": rows}})
+    assert list(cols.ts) == [0.0, 4 * MIN]
+    assert list(cols.close) == [1.5, 104.0]
+    assert list(cols.volume) == [0.0, 10.0]
+
+
+def test_five_column_rows_get_zero_volume():
+    cols = parse_klines([[0, 1, 2, 0.5, 1.5], [MIN, 1, 2, 0.5, 1.7]])
+    assert list(cols.volume) == [0.0, 0.0]
+
+
+def test_dict_rows_read_the_key_spelling_off_the_first_row():
+    raw = [
+        {"startTime": 2 * MIN, "Open": "1", "High": "3", "Low": "0.5", "Close": "2", "Volume": "4"},
+        {"startTime": 1 * MIN, "Open": "1", "High": "3", "Low": "0.5", "Close": "x"},
+        {"startTime": 0, "Open": "1", "High": "3", "Low": "0.5", "Close": "1"},
+    ]
+    cols = parse_klines(raw)
+    assert list(cols.ts) == [0.0, 2 * MIN]
+    assert list(cols.close) == [1.0, 2.0]
+    assert list(cols.volume) == [0.0, 4.0]
+
+    no_ts = parse_klines([{"o": 1, "h": 2, "l": 0, "c": 1.5}])
+    assert no_ts.ts is None and list(no_ts.close) == [1.5]
+    assert no_ts.rows() == [] and no_ts.until(0) is no_ts
+
+
+def test_unusable_payloads_give_empty_columns():
+    for raw in (None, {}, {"result": {"list": []}}, [1, 2, 3], [{"foo": 1}], {"result": "nope"}):
+        assert len(parse_klines(raw)) == 0
+
+
+def test_until_cuts_off_the_forming_bar():
+    cols = parse_klines([[i * MIN, 1, 2, 0.5, i, 1] for i in range(5)])
+    assert cols.until(10 * MIN) is cols
+    closed = cols.until(3 * MIN)
+    assert list(closed.ts) == [0.0, MIN, 2 * MIN, 3 * MIN]
+    assert len(closed.volume) == 4
+    assert parse_klines(cols) is cols
+
+
+def test_ohlc_view_slices_lazily():
+    cols = parse_klines([[i * MIN, i, i + 1, i - 1, i + 0.5, 1] for i in range(6)])
+    view = cols.ohlc
+    assert len(view) == 6
+    assert view[-1] == {"open": 5.0, "high": 6.0, "low": 4.0, "close": 5.5}
+    tail = view[-3:]
+    assert len(tail) == 3 and tail[0]["open"] == 3.0 and tail[-1]["open"] == 5.0
+    assert [b["open"] for b in tail[1:]] == [4.0, 5.0]
+    assert [b["open"] for b in view[::2]] == [0.0, 2.0, 4.0]
+    assert len(view[4:2]) == 0
+    with pytest.raises(IndexError):
+        view[6]
+
+
+def test_empty_columns():
+    cols = KlineColumns()
+    assert len(cols) == 0 and cols.ts is None and len(cols.volume) == 0
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from rate_limiter import PUBLIC_BUCKET, RateLimiter, RateLimitTimeout, TokenBucket
+
+
+class Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def test_bucket_refills_at_its_rate_up_to_capacity():
+    clock = Clock()
+    bucket = TokenBucket(rate=2.0, capacity=5.0, clock=clock)
+    bucket.take(5.0)
+    assert bucket.wait_time() == 0.5
+    clock.t += 0.25
+    assert bucket.wait_time() == 0.25
+    assert bucket.wait_time(2.0) == 0.75
+    clock.t += 0.25
+    assert bucket.wait_time() == 0.0
+    clock.t += 100.0
+    assert bucket.wait_time(5.0) == 0.0
+    assert bucket.wait_time(6.0) == 0.5  # capped at capacity
+
+
+def test_private_keys_get_their_own_buckets():
+    clock = Clock()
+    limiter = RateLimiter(public_rate=1.0, public_burst=1.0, private_rate=1.0, private_burst=2.0, clock=clock)
+    key = limiter.private_key("k1")
+    assert limiter.acquire(key, lane="order") == 0.0
+    assert limiter.acquire(key, lane="order") == 0.0
+    assert limiter.acquire(PUBLIC_BUCKET) == 0.0  # the public quota is untouched by private calls
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(key, lane="order", timeout=0)
+    assert limiter.stats()["queued"] == {}  # the timed-out waiter left the queue
+    assert limiter.stats()["private_keys"] == 1
+
+
+def test_waiters_are_served_by_lane_priority():
+    clock = Clock()
+    limiter = RateLimiter(public_rate=1.0, public_burst=1.0, clock=clock)
+    limiter.acquire(PUBLIC_BUCKET)  # bucket now empty: one token per fake second
+    served = []
+
+    async def caller(lane):
+        waited = await limiter.acquire_async(PUBLIC_BUCKET, lane=lane)
+        served.append((lane, waited))
+
+    async def main():
+        tasks = [asyncio.create_task(caller(lane)) for lane in ("scoring", "market", "exit")]
+        await asyncio.sleep(0)
+        assert limiter.stats()["queued"] == {PUBLIC_BUCKET: 3}
+        for n in range(1, 4):
+            await asyncio.sleep(0.05)
+            assert len(served) == n - 1  # nobody gets a token before the refill
+            clock.t += 1.0
+            for _ in range(200):
+                if len(served) == n:
+                    break
+                await asyncio.sleep(0.01)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert served == [("exit", 1.0), ("market", 2.0), ("scoring", 3.0)]
+    assert limiter.stats()["lanes"]["exit"]["max_wait_ms"] == 1000.0
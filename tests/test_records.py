@@ -0,0 +1,34 @@
+from records import AccountRecord, TradeRecord
+
+
+def test_uncoercible_values_are_kept_raw():
+    rec = TradeRecord.from_dict({"id": "t1", "qty": "2.5", "exit_price": "n/a", "elapsed_seconds": ""})
+    assert rec.get("qty") == 2.5
+    assert rec.get("exit_price") is None and not rec.has("exit_price")
+    assert rec.get("elapsed_seconds") is None and rec.has("elapsed_seconds")
+    assert rec.invalid_fields() == {"exit_price": "n/a"}
+    assert rec.to_dict()["exit_price"] == "n/a"
+    assert TradeRecord.coerce("exit_price", "n/a") == "n/a"
+
+    rec.update({"exit_price": "101.5"})
+    assert rec.get("exit_price") == 101.5
+    assert rec.invalid_fields() == {}
+    assert rec.to_dict()["exit_price"] == 101.5
+
+
+def test_accounts_round_trip_bad_numbers():
+    data = {"id": "a1", "balance": {"USDT": 10}, "score": "7"}
+    rec = AccountRecord.from_dict(data)
+    assert rec.get("score") == 7
+    assert rec.to_dict() == {"id": "a1", "score": 7, "balance": {"USDT": 10}}
+
+
+def test_add_trade_logs_and_keeps_bad_values(bfs):
+    bc = bfs.BotController()
+    lines = []
+    bc.log = lines.append
+    bc.add_trade({"id": "t1", "symbol": "BTCUSDT", "entry_price": "oops"})
+    assert bc.update_trade("t1", {"exit_price": "?"})
+    (trade,) = bc._read_trades()
+    assert trade["entry_price"] == "oops" and trade["exit_price"] == "?"
+    assert len(lines) == 2 and "entry_price" in lines[0] and "exit_price" in lines[1]
@@ -0,0 +1,38 @@
+from scan_health import ScanHealth
+
+
+class Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def _cycle(health, clock, seconds, score):
+    health.begin_cycle()
+    if score:
+        health.pick_symbols(["A", "B", "C", "D"])
+    clock.t += seconds
+    health.end_cycle()
+
+
+def test_only_scoring_overruns_shrink_the_share():
+    clock = Clock()
+    health = ScanHealth(10.0, clock=clock)
+    _cycle(health, clock, 20.0, score=False)  # slow exits, no scoring
+    assert health.fraction == 1.0
+    _cycle(health, clock, 20.0, score=True)
+    assert health.fraction == 0.45
+    assert health.overruns == 2
+
+
+def test_share_grows_back_on_fast_scoring_cycles():
+    clock = Clock()
+    health = ScanHealth(10.0, clock=clock)
+    _cycle(health, clock, 20.0, score=True)
+    shrunk = health.fraction
+    _cycle(health, clock, 1.0, score=False)
+    assert health.fraction == shrunk
+    _cycle(health, clock, 1.0, score=True)
+    assert health.fraction > shrunk
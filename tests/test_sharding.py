@@ -0,0 +1,46 @@
+import sharding
+from sharding import ShardSupervisor
+
+
+class Proc:
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.exitcode = None if alive else 1
+
+    def is_alive(self):
+        return self.alive
+
+
+class Controller:
+    def __init__(self):
+        self.lines = []
+
+    def log(self, line):
+        self.lines.append(line)
+
+
+def test_dead_worker_restarts_after_backoff_without_blocking(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(sharding.time, "time", lambda: now[0])
+    sup = ShardSupervisor(Controller(), 2)
+    spawned = []
+    monkeypatch.setattr(sup, "_spawn", lambda idx: (spawned.append(idx), sup._procs.__setitem__(idx, Proc())))
+    sup._procs = {0: Proc(), 1: Proc(alive=False)}
+
+    sup._restart_dead_workers()
+    assert spawned == [] and sup._restarts == {1: 1}
+    now[0] += 1.0
+    sup._restart_dead_workers()
+    assert spawned == [] and sup._restarts == {1: 1}  # still backing off, not counted twice
+    now[0] += 1.0
+    sup._restart_dead_workers()
+    assert spawned == [1] and sup._next_restart_at == {}
+
+    sup._procs[1].alive = False  # crashes again: longer backoff
+    sup._restart_dead_workers()
+    now[0] += 3.9
+    sup._restart_dead_workers()
+    assert spawned == [1]
+    now[0] += 0.1
+    sup._restart_dead_workers()
+    assert spawned == [1, 1] and sup._restarts == {1: 2}
@@ -0,0 +1,47 @@
+from array import array
+
+from klines import KlineColumns, parse_klines
+from signals import SignalBus, SignalSet
+
+
+def test_candle_key_is_the_newest_closed_candle():
+    now = {"t": 1_700_000_110.5}  # 10.5s into the minute that opened at ..._100
+    bus = SignalBus(1, clock=lambda: now["t"])
+    assert bus.candle_key() == 1_700_000_040_000
+    now["t"] = 1_700_000_159.9  # still the same closed candle
+    assert bus.candle_key() == 1_700_000_040_000
+    now["t"] = 1_700_000_160.0
+    assert bus.candle_key() == 1_700_000_100_000
+
+
+def test_one_build_per_closed_candle():
+    now = {"t": 1_700_000_105.0}
+    bus = SignalBus(1, clock=lambda: now["t"])
+    built = []
+
+    def build(key):
+        built.append(key)
+        return SignalSet(key, [])
+
+    bus.get(build)
+    now["t"] = 1_700_000_155.0
+    bus.get(build)
+    assert built == [1_700_000_040_000]
+
+
+def test_until_drops_the_forming_bar():
+    # Bybit order: newest first, the first row is the bar still forming
+    raw = {"result": {"list": [
+        ["180000", "3", "3", "3", "3", "1"],
+        ["120000", "2", "2", "2", "2", "1"],
+        ["60000", "1", "1", "1", "1", "1"],
+    ]}}
+    cols = parse_klines(raw).until(120000)
+    assert list(cols.ts) == [60000.0, 120000.0]
+    assert list(cols.close) == [1.0, 2.0]
+    assert len(cols.volume) == 2
+
+
+def test_until_without_timestamps_keeps_every_bar():
+    cols = KlineColumns(None, array("d", [1, 2]), array("d", [1, 2]), array("d", [1, 2]), array("d", [1, 2]))
+    assert cols.until(0) is cols
@@ -0,0 +1,150 @@
+"""
+Compressed archive for closed trades.
+
+Closed trades rolled out of the live trades.json are appended to one gzip NDJSON
+segment per UTC day (by exit time). index.json records each segment's time
+range, its earliest entry time, trade count and per-symbol / per-account
+counts, so readers can skip segments that cannot match a query. Segments are append-only: each roll adds a
+new gzip member, which gzip readers see as one continuous stream.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from storage import atomic_write_json
+
+INDEX_FILE = "index.json"
+SEGMENT_PREFIX = "trades-"
+SEGMENT_SUFFIX = ".ndjson.gz"
+
+
+def partition_key(trade: Dict[str, Any]) -> str:
+    """UTC day the trade belongs to (exit time, falling back to entry time)."""
+    stamp = str(trade.get("exit_time") or trade.get("entry_time") or "")
+    return stamp[:10] if len(stamp) >= 10 else "undated"
+
+
+class TradeArchive:
+    def __init__(self, directory: str, lock: Optional[threading.RLock] = None):
+        self.directory = directory
+        self.lock = lock or threading.RLock()
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+
+    # ------------------ index ------------------
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def _segment_path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def index(self) -> Dict[str, Dict[str, Any]]:
+        """{segment file name: {"start", "end", "entry_start", "count", "symbols", "accounts"}}"""
+        with self.lock:
+            if self._index is None:
+                try:
+                    with open(self._index_path(), "r") as fh:
+                        data = json.load(fh)
+                    self._index = data if isinstance(data, dict) else {}
+                except FileNotFoundError:
+                    self._index = {}
+            return self._index
+
+    # ------------------ writing ------------------
+    def append(self, trades: Iterable[Dict[str, Any]]) -> int:
+        """Append trades to their day segments and update the index. Returns the count written."""
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for trade in trades:
+            groups.setdefault(partition_key(trade), []).append(trade)
+        if not groups:
+            return 0
+        written = 0
+        with self.lock:
+            os.makedirs(self.directory, exist_ok=True)
+            index = self.index()
+            for day, rows in sorted(groups.items()):
+                name = f"{SEGMENT_PREFIX}{day}{SEGMENT_SUFFIX}"
+                payload = "".join(json.dumps(r, default=str) + "\n" for r in rows)
+                with gzip.open(self._segment_path(name), "at", encoding="utf-8") as fh:
+                    fh.write(payload)
+                    fh.flush()
+                    os.fsync(fh.fileno())
+                meta = index.setdefault(name, {"start": None, "end": None, "count": 0, "symbols": {}, "accounts": {}})
+                for r in rows:
+                    stamp = str(r.get("exit_time") or r.get("entry_time") or "")
+                    if stamp:
+                        meta["start"] = min(meta["start"] or stamp, stamp)
+                        meta["end"] = max(meta["end"] or stamp, stamp)
+                    # "" (a row without an entry time, or rows indexed before this field existed)
+                    # keeps the segment from ever being skipped by `until`
+                    entered = str(r.get("entry_time") or "")
+                    meta["entry_start"] = min(meta.get("entry_start", "" if meta["count"] else entered), entered)
+                    sym = str(r.get("symbol") or "")
+                    meta["symbols"][sym] = meta["symbols"].get(sym, 0) + 1
+                    acct = str(r.get("account_id") or "")
+                    meta["accounts"][acct] = meta["accounts"].get(acct, 0) + 1
+                meta["count"] += len(rows)
+                written += len(rows)
+            atomic_write_json(self._index_path(), index)
+        return written
+
+    # ------------------ reading ------------------
+    def segments(self, symbol: Optional[str] = None, since: Optional[str] = None,
+                 until: Optional[str] = None) -> List[str]:
+        """
+        Segment names that may hold matching trades, newest first: trades of
+        `symbol`, closed at or after `since`, entered at or before `until`.
+        """
+        names = []
+        for name, meta in self.index().items():
+            if symbol and symbol not in (meta.get("symbols") or {}):
+                continue
+            if since and meta.get("end") and meta["end"] < since:
+                continue
+            # entry times, not the exit-time range: a trade may be held across days
+            if until and meta.get("entry_start") and meta["entry_start"] > until:
+                continue
+            names.append(name)
+        return sorted(names, reverse=True)
+
+    def iter_trades(self, symbol: Optional[str] = None, since: Optional[str] = None,
+                    until: Optional[str] = None,
+                    stop: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream archived trades from the candidate segments (rows are not filtered
+        here). `stop(meta)` is asked before each segment is opened, with its
+        index entry; True ends the stream there.
+        """
+        index = self.index()
+        for name in self.segments(symbol=symbol, since=since, until=until):
+            if stop is not None and stop(index.get(name) or {}):
+                return
+            path = self._segment_path(name)
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as fh:
+                    for line in fh:
+                        if line.strip():
+                            yield json.loads(line)
+            except FileNotFoundError:
+                continue
+            except EOFError:
+                # a member still being appended; the rows before it were yielded
+                continue
+
+    def find(self, trade_id: str) -> Optional[Dict[str, Any]]:
+        for trade in self.iter_trades():
+            if trade.get("id") == trade_id:
+                return trade
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        index = self.index()
+        return {
+            "segments": len(index),
+            "trades": sum(int(m.get("count", 0)) for m in index.values()),
+            "oldest": min((m["start"] for m in index.values() if m.get("start")), default=None),
+            "newest": max((m["end"] for m in index.values() if m.get("end")), default=None),
+        }